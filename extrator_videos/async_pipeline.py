@@ -0,0 +1,229 @@
+"""
+API assíncrona do pipeline (resolve → ingest → transcribe → summarize → write).
+
+    result = await process(url)              # uma URL → PipelineResult
+    results = await process_many(urls)       # várias URLs em voo no mesmo loop
+
+    async with AsyncPipeline(on_event=...) as p:   # interface web, batch --async
+        results = await p.run_jobs(jobs)
+
+O event loop só orquestra: cada etapa continua sendo a função síncrona do
+batch_cli e roda no executor próprio da etapa, com o limite de concorrência
+da etapa (asyncio.Semaphore). Rede (resolve, ingest, summarize, write) usa
+ASYNC_WORKERS threads por etapa; o Whisper (transcribe) fica num executor
+separado com ASYNC_TRANSCRIBE_WORKERS (1) para não disputar CPU (quem roda o
+pipeline chama batch_cli.set_transcribe_slots com o mesmo valor). Nenhuma
+thread fica parada esperando fila entre etapas; ASYNC_MAX_IN_FLIGHT limita
+quantas URLs estão no pipeline ao mesmo tempo (arquivos temporários em disco).
+"""
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+@dataclass
+class PipelineResult:
+    url: str
+    ok: bool
+    error: Optional[Dict] = None
+    errors: Dict[str, Optional[str]] = field(default_factory=dict)
+    outputs: Dict[str, str] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
+    resumed_from: Optional[str] = None
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name) or default))
+    except Exception:
+        return default
+
+def transcribe_workers() -> int:
+    return _env_int("ASYNC_TRANSCRIBE_WORKERS", 1)
+
+def default_stages() -> list:
+    """Etapas do batch_cli como (nome, função, limite)."""
+    from .batch_cli import STAGES
+    workers = _env_int("ASYNC_WORKERS", 4)
+    transcribe = transcribe_workers()
+    return [(name, fn, transcribe if name == "transcribe" else workers) for name, fn in STAGES]
+
+def to_result(job: dict) -> PipelineResult:
+    return PipelineResult(
+        url=job["url"],
+        ok=not job.get("error"),
+        error=job.get("error"),
+        errors=dict(job.get("errors") or {}),
+        outputs=dict(job.get("outputs") or {}),
+        timings=dict(job.get("timings") or {}),
+        resumed_from=job.get("resumed_from"),
+    )
+
+class AsyncPipeline:
+    def __init__(self, stages: Optional[list] = None, on_event: Optional[Callable] = None, on_done: Optional[Callable] = None,
+                 max_in_flight: Optional[int] = None, on_thread_exit: Optional[Callable] = None):
+        """
+        stages: lista de (nome, função, limite), como no run_pipeline; padrão: etapas do batch_cli.
+        on_event(job, etapa, status): status em "start", "done", "error".
+        on_done(job): chamado uma vez por job ao sair do pipeline (limpeza do workspace).
+        on_thread_exit: roda em cada thread dos executores ao fechar (padrão: fecha o navegador da thread).
+        """
+        self.stages = list(stages) if stages is not None else default_stages()
+        self.on_event = on_event
+        self.on_done = on_done
+        self.max_in_flight = max_in_flight or _env_int("ASYNC_MAX_IN_FLIGHT", 32)
+        if on_thread_exit is None:
+            from .browser_pool import close_thread_pool
+            on_thread_exit = close_thread_pool
+        self.on_thread_exit = on_thread_exit
+        self.stats = [{"stage": name, "workers": max(1, n), "items": 0, "errors": 0, "busy_s": 0.0} for name, _fn, n in self.stages]
+        # o Playwright síncrono é preso à thread: cada worker da etapa é um executor de uma thread só,
+        # que guarda o próprio navegador e recebe o on_thread_exit no fechamento
+        self._executors = [
+            [ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"async-{name}-{k}", initializer=self._register, initargs=(i, k))
+             for k in range(max(1, n))]
+            for i, (name, _fn, n) in enumerate(self.stages)
+        ]
+        self._started = []
+        self._lock = threading.Lock()
+        self._free = None
+        self._in_flight = None
+        self._cancelled = False
+        self._t0 = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    def _register(self, i: int, k: int):
+        # initializer: só os workers cuja thread chegou a existir precisam de on_thread_exit
+        with self._lock:
+            self._started.append(self._executors[i][k])
+
+    def _ensure(self):
+        # filas de workers livres criadas dentro do loop em execução; o tamanho é o limite da etapa
+        if self._free is None:
+            self._free = []
+            for workers in self._executors:
+                q = asyncio.Queue()
+                for ex in workers:
+                    q.put_nowait(ex)
+                self._free.append(q)
+            self._in_flight = asyncio.Semaphore(self.max_in_flight)
+            self._t0 = time.time()
+
+    def cancel(self):
+        """Jobs em andamento terminam a etapa atual e não entram nas seguintes."""
+        self._cancelled = True
+
+    def _emit(self, job: dict, stage: str, status: str):
+        if self.on_event:
+            try:
+                self.on_event(job, stage, status)
+            except Exception:
+                pass
+
+    async def run_job(self, job: dict) -> PipelineResult:
+        self._ensure()
+        loop = asyncio.get_running_loop()
+        job.setdefault("timings", {})
+        async with self._in_flight:
+            try:
+                for i, (name, fn, _n) in enumerate(self.stages):
+                    if self._cancelled:
+                        job["error"] = {"stage": name, "error": "cancelado"}
+                        break
+                    ex = await self._free[i].get()
+                    try:
+                        self._emit(job, name, "start")
+                        t0 = time.time()
+                        ok = True
+                        try:
+                            await loop.run_in_executor(ex, fn, job)
+                        except Exception as e:
+                            ok = False
+                            job["error"] = {"stage": name, "error": str(e)}
+                        busy = time.time() - t0
+                    finally:
+                        self._free[i].put_nowait(ex)
+                    st = self.stats[i]
+                    st["items"] += 1
+                    st["busy_s"] += busy
+                    job["timings"][name] = round(busy, 3)
+                    if not ok:
+                        st["errors"] += 1
+                        self._emit(job, name, "error")
+                        break
+                    self._emit(job, name, "done")
+            finally:
+                if self.on_done:
+                    try:
+                        await loop.run_in_executor(None, self.on_done, job)
+                    except Exception:
+                        pass
+        return to_result(job)
+
+    async def run_jobs(self, jobs: list) -> List[PipelineResult]:
+        """Todos os jobs em voo ao mesmo tempo (limitados por etapa e por max_in_flight), resultados na ordem de entrada."""
+        return list(await asyncio.gather(*(self.run_job(j) for j in jobs)))
+
+    async def process(self, url: str, referer: Optional[str] = None, outdir: str = ".", email: Optional[str] = None,
+                      senha: Optional[str] = None) -> PipelineResult:
+        from .batch_cli import new_job
+        return await self.run_job(new_job(url, referer, outdir, email, senha))
+
+    def report(self) -> dict:
+        """Mesmo formato do run_pipeline (format_utilization)."""
+        wall = max(time.time() - (self._t0 or time.time()), 1e-9)
+        stages = []
+        for st in self.stats:
+            stages.append({**st, "busy_s": round(st["busy_s"], 3), "utilization": round(st["busy_s"] / (st["workers"] * wall), 3)})
+        return {"wall_s": round(wall, 3), "stages": stages}
+
+    def close(self):
+        with self._lock:
+            started = list(self._started)
+            self._started.clear()
+        if self.on_thread_exit:
+            # cada executor tem uma thread só, então o on_thread_exit roda na thread dona do navegador
+            for f in [ex.submit(self.on_thread_exit) for ex in started]:
+                try:
+                    f.result()
+                except Exception:
+                    pass
+        for workers in self._executors:
+            for ex in workers:
+                ex.shutdown(wait=True)
+
+    async def aclose(self):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+async def process(url: str, referer: Optional[str] = None, outdir: str = ".", email: Optional[str] = None,
+                  senha: Optional[str] = None, **kwargs) -> PipelineResult:
+    """Processa uma URL de ponta a ponta (mesmas etapas e saídas do process_url)."""
+    from .batch_cli import finish_job
+    kwargs.setdefault("on_done", finish_job)
+    async with AsyncPipeline(**kwargs) as p:
+        return await p.process(url, referer, outdir, email, senha)
+
+async def process_many(urls: List[str], referer: Optional[str] = None, outdir: str = ".", email: Optional[str] = None,
+                       senha: Optional[str] = None, **kwargs) -> List[PipelineResult]:
+    from .batch_cli import new_job, finish_job
+    kwargs.setdefault("on_done", finish_job)
+    async with AsyncPipeline(**kwargs) as p:
+        return await p.run_jobs([new_job(u, referer, outdir, email, senha) for u in urls])
+
+def run_async(jobs: list, stages: list, on_done: Optional[Callable] = None, on_event: Optional[Callable] = None):
+    """Equivalente síncrono ao run_pipeline: (jobs na ordem de entrada, estatísticas por etapa)."""
+    jobs = list(jobs)
+
+    async def main():
+        async with AsyncPipeline(stages, on_event=on_event, on_done=on_done) as p:
+            await p.run_jobs(jobs)
+            return p.report()
+    report = asyncio.run(main())
+    return jobs, report
@@ -1,8 +1,9 @@
 import re
 import logging
-import requests
+from . import http_client
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse, urljoin
+from .session_store import domain_of, domain_lock, load_state, save_state, invalidate, looks_logged_out, cookie_header
 
 UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36"
 
@@ -15,7 +16,32 @@ def validate_credentials(email: str, senha: str) -> bool:
         return False
     return True
 
+def session_valid(target_url: str, cookies) -> bool:
+    """Validação barata de um estado salvo: um GET com os cookies, sem cair na tela de login."""
+    try:
+        r = http_client.get(target_url, headers={"User-Agent": UA, "Cookie": cookie_header(cookies)}, timeout=15, allow_redirects=True)
+        return r.status_code < 400 and not looks_logged_out(r.url)
+    except Exception:
+        return False
+
 def programmatic_login(target_url: str, email: str, senha: str):
+    if not validate_credentials(email, senha):
+        logging.error("Credenciais inválidas")
+        return None
+    domain = domain_of(target_url)
+    with domain_lock(domain):
+        state = load_state(domain, email)
+        if state and state["cookies"]:
+            if session_valid(target_url, state["cookies"]):
+                logging.info("Sessão salva reaproveitada")
+                return state["cookies"]
+            invalidate(domain, email)
+        cookies = _form_login(target_url, email, senha)
+        if cookies:
+            save_state(domain, email, {"cookies": cookies})
+        return cookies
+
+def _form_login(target_url: str, email: str, senha: str):
     try:
         if not validate_credentials(email, senha):
             logging.error("Credenciais inválidas")
@@ -23,7 +49,8 @@ def programmatic_login(target_url: str, email: str, senha: str):
         parsed = urlparse(target_url)
         base = f"{parsed.scheme}://{parsed.netloc}"
         login_url = urljoin(base, "/login")
-        sess = requests.Session()
+        # cookies próprios do login, conexões do pool compartilhado
+        sess = http_client.session()
         sess.headers.update({"User-Agent": UA, "Referer": base})
         r = sess.get(login_url, timeout=20)
         if r.status_code >= 400:
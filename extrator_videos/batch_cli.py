@@ -2,9 +2,10 @@ import argparse
 import os
 import json
 import datetime
+import threading
 from dotenv import load_dotenv
-from .transcription import ffmpeg_audio_stream
-from .whisper_engine import transcribe_audio
+from .transcription import ffmpeg_audio_stream, ffmpeg_pcm_chunks, transcription_streaming
+from .transcribe_backend import transcribe_chunks
 from .postprocess import segments_to_topics
 from .gemini_client import summarize_transcription_full, parse_raw_json, naive_summary
 from .openrouter_client import summarize_with_fallback
@@ -14,20 +15,65 @@ from .security import hash_input, write_processing_log
 from .logger_json import StepLogger
 from .report_renderer import generate_full_report, try_generate_pdf, build_basename
 from .verifications import validate_log_json, validate_summary_json, validate_access
-from .hls import parse_hls
+from .hls import parse_hls, select_audio_source
+from . import http_client
+from .manifest_cache import stats as manifest_stats
 from .hls_downloader import download_hls_to_wav
-from .transcription_cache import cache_key, load_transcription, save_transcription
+from .transcription_cache import cache_key, fingerprint_key, load_transcription, save_transcription, chunk_cache_enabled
 from .resolve_cache import load as resolve_load, save as resolve_save
-from .transcription import split_wav_chunks
+from .transcription import split_wav_chunks, chunks_in_memory, chunk_split_mode, cleanup_chunks, wav_fingerprint
 from .youtube_downloader import is_supported_platform, download_audio_ytdlp, get_video_info
 from .credential_manager import get_credentials
+from .workspace import Workspace
+from .pipeline import run_pipeline, format_utilization
+from .async_pipeline import run_async
+from .browser_pool import close_thread_pool
+from .batch_state import BatchState
 from urllib.parse import urlparse
 import shutil
 
+_SLOTS_LOCK = threading.Lock()
+_TRANSCRIBE_SLOTS = None
+
+def set_transcribe_slots(n: int):
+    """Quantas transcrições (Whisper) rodam ao mesmo tempo: o limite da etapa transcribe."""
+    global _TRANSCRIBE_SLOTS
+    with _SLOTS_LOCK:
+        _TRANSCRIBE_SLOTS = threading.BoundedSemaphore(max(1, n))
+
+def transcribe_slots() -> threading.BoundedSemaphore:
+    # compartilhado entre a etapa transcribe e o streaming do ingest, que também roda o Whisper
+    global _TRANSCRIBE_SLOTS
+    with _SLOTS_LOCK:
+        if _TRANSCRIBE_SLOTS is None:
+            _TRANSCRIBE_SLOTS = threading.BoundedSemaphore(1)
+        return _TRANSCRIBE_SLOTS
+
 def safe_name(s: str):
     return "".join([c if c.isalnum() else "_" for c in s])
 
+def new_job(u: str, referer: str, outdir: str, email: str, senha: str) -> dict:
+    # cada URL tem seu próprio diretório, fixo por URL: execuções paralelas não colidem e
+    # uma nova execução retoma o download de segmentos interrompido
+    return {"url": u, "referer": referer, "outdir": outdir, "email": email, "senha": senha,
+            "ws": Workspace(name=f"run_{hash_input(u)[:12]}")}
+
+def finish_job(job: dict):
+    # com falha, o workspace (e o manifesto de retomada) fica para a próxima execução
+    if job.get("error") or any((job.get("errors") or {}).values()):
+        return
+    job["ws"].cleanup()
+
 def process_url(u: str, referer: str, outdir: str, email: str, senha: str):
+    job = new_job(u, referer, outdir, email, senha)
+    try:
+        for _name, fn in STAGES:
+            fn(job)
+    finally:
+        finish_job(job)
+
+def stage_resolve(job: dict):
+    u, referer, email, senha = job["url"], job["referer"], job["email"], job["senha"]
     run_id = f"{hash_input(u)[:12]}_{u.split('/')[-1]}"
     level = (os.getenv("LOG_LEVEL") or "info").lower()
     log_dir = os.getenv("LOG_DIR") or "logs"
@@ -71,6 +117,14 @@ def process_url(u: str, referer: str, outdir: str, email: str, senha: str):
         headers["Origin"] = origin
     headers.setdefault("User-Agent", "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36")
     
+    if "transcribe" in job.get("skip", ()):
+        # transcrição retomada do estado do batch: sem login nem Playwright
+        with logger.step("Resolver fonte de mídia", "resolve", level) as st:
+            st.details_update({"resumed_from": job.get("resumed_from")})
+        job.update({"run_id": run_id, "level": level, "logger": logger, "errors": errors_by_stage, "headers": headers,
+                    "input_url": u, "manifest": None, "use_ytdlp_direct": False})
+        return
+
     # Use resolved credentials here
     cookies = programmatic_login(u, c_email or "", c_pwd or "")
     if cookies:
@@ -96,8 +150,12 @@ def process_url(u: str, referer: str, outdir: str, email: str, senha: str):
                     # NOVO: Verificar primeiro captured_manifests.json (extensão do navegador)
                     from .extractor import check_captured_manifests
                     captured_manifest = check_captured_manifests(input_url)
+                    resumed_manifest = ((job.get("checkpoint") or {}).get("resolve") or {}).get("manifest")
                     
-                    if captured_manifest:
+                    if resumed_manifest and not captured_manifest:
+                        manifest = resumed_manifest
+                        st.details_update({"method": "batch_state", "resumed": True})
+                    elif captured_manifest:
                         # Usar manifest capturado pela extensão - NÃO usar cache!
                         manifest = captured_manifest
                         st.details_update({"method": "browser_extension", "source": "captured_manifests.json"})
@@ -123,12 +181,8 @@ def process_url(u: str, referer: str, outdir: str, email: str, senha: str):
                 if manifest:
                     try:
                         h = parse_hls(manifest)
-                        vars = h.get("variants") or []
-                        if vars:
-                            best = sorted(vars, key=lambda v: v.bitrate_bps or 0, reverse=True)[0]
-                            input_url = best.url
-                        else:
-                            input_url = manifest
+                        # só precisamos do áudio: rendition separada ou a variante mais leve que o carrega
+                        input_url = select_audio_source(h, manifest)
                     except Exception:
                         input_url = manifest
                 st.details_update({"manifest": input_url})
@@ -137,18 +191,43 @@ def process_url(u: str, referer: str, outdir: str, email: str, senha: str):
                 st.details_update({"error": str(e)})
                 print(f"[ERRO] Etapa resolve: {e}")
     
+    job.update({"run_id": run_id, "level": level, "logger": logger, "errors": errors_by_stage, "headers": headers,
+                "input_url": input_url, "manifest": manifest, "use_ytdlp_direct": use_ytdlp_direct})
+
+def stage_ingest(job: dict):
+    u, ws, logger, level = job["url"], job["ws"].create(), job["logger"], job["level"]
+    headers, input_url, manifest = job["headers"], job["input_url"], job["manifest"]
+    use_ytdlp_direct, errors_by_stage = job["use_ytdlp_direct"], job["errors"]
     wav = None
     ytdlp_metadata = {}  # Metadados do vídeo (se baixado via yt-dlp)
+    ckdir = os.getenv("SUMARIOS_CACHE_DIR") or "sumarios_cache"
+    ttl = int(os.getenv("CACHE_TTL_HOURS") or "72")
+    chunk_seconds = int(os.getenv("CHUNK_SECONDS") or "90")
+    max_parallel = int(os.getenv("MAX_PARALLEL_CHUNKS") or "2")
+    streamed = None
+    # Streaming: ffmpeg decodifica para um pipe e os chunks vão para o Whisper enquanto o download continua.
+    # Se falhar, segue o fluxo normal (WAV completo + fallbacks).
+    if transcription_streaming() and not use_ytdlp_direct and not load_transcription(ckdir, cache_key(u, input_url, headers), ttl_hours=ttl):
+        with logger.step("Ingestão + transcrição em streaming (ffmpeg → Whisper)", "chunks", level) as st:
+            preview = int(os.getenv("FFMPEG_PREVIEW_SECONDS") or "0")
+            pcm_chunks = ffmpeg_pcm_chunks(input_url, headers=headers, chunk_seconds=chunk_seconds, preview_seconds=preview)
+            # o Whisper roda aqui: ocupa uma vaga da etapa transcribe em vez de somar às de --workers
+            with transcribe_slots():
+                segs, stream_errors, tstats = transcribe_chunks(pcm_chunks, "pt", max_parallel, cache_dir=ckdir if chunk_cache_enabled() else None)
+            st.details_update({"streaming": True, "split": chunk_split_mode(), **tstats})
+            streamed = {"segments": segs, "errors": stream_errors}
     with logger.step("Ingestão de áudio (ffmpeg/yt-dlp)", "ingest", level) as st:
         preview = int(os.getenv("FFMPEG_PREVIEW_SECONDS") or "0")
         ingest_error = None
         
+        if streamed is not None:
+            st.details_update({"method": "ffmpeg-pipe", "streaming": True})
         # Se é plataforma suportada (YouTube, Vimeo, etc), usar yt-dlp diretamente
-        if use_ytdlp_direct:
+        elif use_ytdlp_direct:
             print(f"[INFO] Usando yt-dlp para baixar áudio...")
             st.details_update({"method": "yt-dlp", "platform": "detected"})
             try:
-                wav, ytdlp_metadata = download_audio_ytdlp(u)
+                wav, ytdlp_metadata = download_audio_ytdlp(u, work_dir=ws.path)
                 st.details_update({
                     "wav_path": wav, 
                     "method": "yt-dlp",
@@ -163,20 +242,20 @@ def process_url(u: str, referer: str, outdir: str, email: str, senha: str):
         else:
             # Fluxo padrão: FFmpeg direto
             try:
-                wav = ffmpeg_audio_stream(input_url, headers=headers, preview_seconds=preview)
+                wav = ffmpeg_audio_stream(input_url, headers=headers, out_path=ws.file("input.wav"), preview_seconds=preview)
                 st.details_update({"wav_path": wav, "method": "ffmpeg"})
             except Exception as e1:
                 ingest_error = str(e1)
                 # Tentar master como fallback (apenas se manifest existe)
                 if manifest:
                     try:
-                        wav = ffmpeg_audio_stream(manifest, headers=headers, preview_seconds=preview)
+                        wav = ffmpeg_audio_stream(manifest, headers=headers, out_path=ws.file("master.wav"), preview_seconds=preview)
                         st.details_update({"wav_path": wav, "fallback": "master"})
                         ingest_error = None  # Fallback funcionou
                     except Exception as e2:
                         ingest_error = f"{e1} | fallback master: {e2}"
                         try:
-                            wav = download_hls_to_wav(manifest, headers=headers)
+                            wav = download_hls_to_wav(manifest, headers=headers, work_dir=ws.path)
                             if wav:
                                 st.details_update({"wav_path": wav, "fallback": "segments"})
                                 ingest_error = None  # Fallback funcionou
@@ -190,51 +269,62 @@ def process_url(u: str, referer: str, outdir: str, email: str, senha: str):
                     st.details_update({"wav_error": True, "no_manifest_fallback": True})
                     ingest_error = f"{e1} | Sem manifest HLS para fallback"
         
+        st.details_update({"workspace": ws.path, "workspace_bytes": ws.size_bytes()})
         if ingest_error:
             errors_by_stage["ingest"] = ingest_error
             print(f"[ERRO] Etapa ingest: {ingest_error}")
-    ckdir = os.getenv("SUMARIOS_CACHE_DIR") or "sumarios_cache"
-    ttl = int(os.getenv("CACHE_TTL_HOURS") or "72")
+    job.update({"wav": wav, "ytdlp_metadata": ytdlp_metadata, "streamed": streamed, "ckdir": ckdir, "ttl": ttl,
+                "chunk_seconds": chunk_seconds, "max_parallel": max_parallel})
+
+def stage_transcribe(job: dict):
+    u, ws, logger, level = job["url"], job["ws"], job["logger"], job["level"]
+    headers, input_url, errors_by_stage = job["headers"], job["input_url"], job["errors"]
+    wav, streamed, ckdir, ttl = job["wav"], job["streamed"], job["ckdir"], job["ttl"]
+    chunk_seconds, max_parallel = job["chunk_seconds"], job["max_parallel"]
     with logger.step("Cache de transcrição", "cache", level) as st:
         key = cache_key(u, input_url, headers)
         cached_tr = load_transcription(ckdir, key, ttl_hours=ttl)
-        st.details_update({"cache_hit": bool(cached_tr)})
+        # segunda camada: mesmo áudio por outra URL (token rotacionado, outro Referer, manifest da extensão)
+        fp = wav_fingerprint(wav) if wav and not cached_tr else None
+        akey = fingerprint_key(fp) if fp else None
+        if akey:
+            cached_tr = load_transcription(ckdir, akey, ttl_hours=ttl)
+            if cached_tr:
+                save_transcription(ckdir, key, cached_tr)
+        st.details_update({"cache_hit": bool(cached_tr), "cache_layer": ("audio" if akey else "url") if cached_tr else None, "audio_fingerprint": fp})
     tr = None
     transcription_errors = []
     if cached_tr:
         tr = cached_tr
+    elif streamed is not None:
+        transcription_errors = streamed["errors"]
+        tr = {"language": "pt", "duration": None, "segments": streamed["segments"]}
+        # com chunks faltando, não grava a transcrição final: a próxima execução refaz só os que falharam
+        if not transcription_errors:
+            save_transcription(ckdir, key, tr)
+        if transcription_errors:
+            errors_by_stage["transcription"] = f"{len(transcription_errors)} chunks falharam: " + "; ".join(transcription_errors[:3])
     elif wav:
-        chunk_seconds = int(os.getenv("CHUNK_SECONDS") or "90")
-        max_parallel = int(os.getenv("MAX_PARALLEL_CHUNKS") or "2")
-        chunks = split_wav_chunks(wav, chunk_seconds)
+        chunks = split_wav_chunks(wav, chunk_seconds, in_memory=chunks_in_memory(), work_dir=ws.path)
         results = []
         with logger.step("Transcrever áudio em chunks", "chunks", level) as st:
-            st.details_update({"chunks": len(chunks), "parallel": max_parallel})
-            from concurrent.futures import ThreadPoolExecutor, as_completed
-            with ThreadPoolExecutor(max_workers=max_parallel) as ex:
-                futs = {ex.submit(transcribe_audio, c["path"], "pt"): c for c in chunks}
-                for fut in as_completed(futs):
-                    try:
-                        r = fut.result()
-                        c = futs[fut]
-                        off = c["offset"]
-                        segs = r.get("segments", [])
-                        for s in segs:
-                            s["start"] = (s.get("start") or 0) + off
-                            s["end"] = (s.get("end") or 0) + off
-                        results.extend(segs)
-                    except Exception as chunk_err:
-                        transcription_errors.append(f"chunk {futs[fut].get('offset', '?')}: {chunk_err}")
-        results.sort(key=lambda x: x.get("start", 0))
+            st.details_update({"chunks": len(chunks), "parallel": max_parallel, "in_memory": any(c.get("audio") is not None for c in chunks), "split": chunk_split_mode()})
+            st.details_update({"workspace_bytes": ws.size_bytes(), "workspace_peak_bytes": ws.peak_bytes})
+            with transcribe_slots():
+                results, transcription_errors, tstats = transcribe_chunks(chunks, "pt", max_parallel, cache_dir=ckdir if chunk_cache_enabled() else None)
+            st.details_update(tstats)
+        cleanup_chunks(chunks)
         tr = {"language": "pt", "duration": None, "segments": results}
-        save_transcription(ckdir, key, tr)
+        if not transcription_errors:
+            save_transcription(ckdir, key, tr)
+            if akey:
+                save_transcription(ckdir, akey, tr)
         if transcription_errors:
             errors_by_stage["transcription"] = f"{len(transcription_errors)} chunks falharam: " + "; ".join(transcription_errors[:3])
     else:
         try:
-            import requests
             from bs4 import BeautifulSoup
-            r = requests.get(u, headers=headers, timeout=20)
+            r = http_client.get(u, headers=headers, timeout=20)
             soup = BeautifulSoup(r.text, "html.parser")
             txt = " ".join([t.strip() for t in soup.stripped_strings])
             seg = {"start": 0.0, "end": 60.0, "text": txt[:4000]}
@@ -244,6 +334,12 @@ def process_url(u: str, referer: str, outdir: str, email: str, senha: str):
             tr = {"language": "pt", "duration": None, "segments": []}
     with logger.step("Pós-processamento e segmentação", "postprocess", level):
         tp = segments_to_topics(tr["segments"]) if isinstance(tr, dict) else segments_to_topics(tr)
+    # o áudio não é mais necessário: libera o workspace antes das chamadas ao LLM
+    ws.cleanup()
+    job.update({"tr": tr, "tp": tp})
+
+def stage_summarize(job: dict):
+    logger, level, errors_by_stage, tp = job["logger"], job["level"], job["errors"], job["tp"]
     # Determinar qual serviço usar para resumo
     use_openrouter = os.getenv("USE_OPENROUTER", "false").lower() == "true" and os.getenv("OPENROUTER_API_KEY")
     use_fallback = os.getenv("OPENROUTER_USE_FALLBACK", "true").lower() == "true"
@@ -349,6 +445,13 @@ def process_url(u: str, referer: str, outdir: str, email: str, senha: str):
         # Usar diretamente os dados já parseados
         data_obj = res.get("data") or {}
         sj = json.dumps(data_obj, ensure_ascii=False)
+    job.update({"res": res, "sj": sj, "gemini_error_detail": gemini_error_detail, "openrouter_error_detail": openrouter_error_detail})
+
+def stage_write(job: dict):
+    u, run_id, logger, level = job["url"], job["run_id"], job["logger"], job["level"]
+    headers, errors_by_stage, ytdlp_metadata = job["headers"], job["errors"], job["ytdlp_metadata"]
+    tr, tp, res, sj = job["tr"], job["tp"], job["res"], job["sj"]
+    gemini_error_detail, openrouter_error_detail = job["gemini_error_detail"], job["openrouter_error_detail"]
     # preparar diretórios por dominio/id
     sum_dir = os.getenv("SUMARIOS_DIR") or "sumarios"
     dom = "misc"
@@ -387,9 +490,8 @@ def process_url(u: str, referer: str, outdir: str, email: str, senha: str):
         print(f"[INFO] Título obtido via yt-dlp: {title}")
     else:
         try:
-            import requests
             from bs4 import BeautifulSoup
-            r = requests.get(u, headers=headers, timeout=20)
+            r = http_client.get(u, headers=headers, timeout=20)
             soup = BeautifulSoup(r.text, "html.parser")
             tnode = soup.find("title")
             title = (tnode.text if tnode else "video").strip()
@@ -542,13 +644,81 @@ def process_url(u: str, referer: str, outdir: str, email: str, senha: str):
         os.replace(tmp, log_path)
     except Exception:
         pass
+    job["outputs"] = {"json": jpath, "md": mpath, "log": log_path}
 
-def main():
+STAGES = [
+    ("resolve", stage_resolve),
+    ("ingest", stage_ingest),
+    ("transcribe", stage_transcribe),
+    ("summarize", stage_summarize),
+    ("write", stage_write),
+]
+
+def stage_artifacts(job: dict, name: str, state: BatchState):
+    """Artefatos do checkpoint da etapa, ou None se ela não deve ser marcada como concluída."""
+    errors = job.get("errors") or {}
+    if name == "resolve":
+        return {"manifest": job["manifest"]} if job.get("manifest") and not errors.get("resolve") else None
+    if name == "transcribe":
+        # só marca a transcrição se veio do áudio sem erros; senão a próxima execução tenta de novo
+        if any(errors.get(k) for k in ("resolve", "ingest", "transcription")) or "tr" not in job:
+            return None
+        return {"tr": state.save_artifact(job["url"], name, job["tr"]), "ytdlp_metadata": job.get("ytdlp_metadata") or {}}
+    if name == "summarize":
+        if errors.get("summarize") or "res" not in job:
+            return None
+        keys = ("res", "sj", "gemini_error_detail", "openrouter_error_detail")
+        return {"summary": state.save_artifact(job["url"], name, {k: job.get(k) for k in keys})}
+    if name == "write":
+        return None if any(errors.values()) else {}
+    return None
+
+def restore_job(job: dict, state: BatchState):
+    """Carrega no job os artefatos das etapas já concluídas e marca quais pular."""
+    done = state.stages(job["url"])
+    job["checkpoint"] = {k: v.get("artifacts") or {} for k, v in done.items()}
+    if "write" in done:
+        job["skip"] = {name for name, _fn in STAGES}
+        job["resumed_from"] = "write"
+        return
+    try:
+        if "transcribe" in done:
+            art = done["transcribe"]["artifacts"]
+            tr = state.load_artifact(art["tr"])
+            job.update({"tr": tr, "tp": segments_to_topics(tr["segments"]), "ytdlp_metadata": art.get("ytdlp_metadata") or {}})
+            job["skip"] = {"ingest", "transcribe"}
+            job["resumed_from"] = "transcribe"
+            if "summarize" in done:
+                job.update(state.load_artifact(done["summarize"]["artifacts"]["summary"]))
+                job["skip"].add("summarize")
+                job["resumed_from"] = "summarize"
+    except Exception:
+        # artefato ausente ou corrompido: refaz as etapas
+        for k in ("tr", "tp", "res", "sj", "skip", "resumed_from"):
+            job.pop(k, None)
+
+def checkpointed(name: str, fn, state: BatchState):
+    def run(job: dict):
+        if name in job.get("skip", ()):
+            return
+        fn(job)
+        arts = stage_artifacts(job, name, state)
+        if arts is not None:
+            state.record(job["url"], name, arts)
+    return run
+
+def configure_env():
+    """Padrões de ambiente do batch (também usados por quem roda as etapas no mesmo processo)."""
     load_dotenv()
     import os as _os
     _os.environ.setdefault("CT2_FORCE_CPU", "1")
+    # o batch só usa o manifest: sem ffprobe de cada variante no extract
+    _os.environ.setdefault("METADATA_MODE", "lazy")
     if (_os.getenv("WHISPER_DEVICE") or "").lower() == "cuda":
         _os.environ["WHISPER_DEVICE"] = "cpu"
+
+def main():
+    configure_env()
     p = argparse.ArgumentParser()
     p.add_argument("--file", required=True)
     p.add_argument("--referer", default=os.getenv("REFERER"))
@@ -557,13 +727,49 @@ def main():
     p.add_argument("--logdir", default=os.getenv("LOG_DIR") or "logs")
     p.add_argument("--email", default=os.getenv("EMAIL"))
     p.add_argument("--senha", default=os.getenv("SENHA"))
+    # etapas de rede (resolve/ingest/summarize/write) usam --workers; transcribe usa CPU e fica em 1 por padrão
+    p.add_argument("--workers", type=int, default=int(os.getenv("BATCH_WORKERS") or "1"))
+    for name, _fn in STAGES:
+        p.add_argument(f"--{name}-workers", type=int, default=None)
+    p.add_argument("--queue-size", type=int, default=int(os.getenv("BATCH_QUEUE_SIZE") or "2"))
+    # estado persistente: reexecutar com o mesmo arquivo pula as etapas já concluídas
+    p.add_argument("--state", default=os.getenv("BATCH_STATE_FILE") or None)
+    # asyncio: um event loop orquestra as etapas (sem fila entre elas), cada uma no seu executor
+    p.add_argument("--async", dest="use_async", action="store_true", default=(os.getenv("BATCH_ASYNC") or "").lower() in ("1", "true", "yes"))
     args = p.parse_args()
     with open(args.file, "r", encoding="utf-8") as f:
         urls = [line.strip() for line in f if line.strip()]
     os.makedirs(args.outdir, exist_ok=True)
-    for u in urls:
-        os.makedirs(args.logdir, exist_ok=True)
-        process_url(u, args.referer, args.outdir, args.email, args.senha)
+    os.makedirs(args.logdir, exist_ok=True)
+    state = BatchState(args.state) if args.state else None
+    stages = []
+    for name, fn in STAGES:
+        n = getattr(args, f"{name}_workers")
+        if n is None:
+            n = 1 if name == "transcribe" else args.workers
+        stages.append((name, checkpointed(name, fn, state) if state else fn, max(1, n)))
+        if name == "transcribe":
+            set_transcribe_slots(n)
+    jobs = [new_job(u, args.referer, args.outdir, args.email, args.senha) for u in urls]
+    if state:
+        for job in jobs:
+            restore_job(job, state)
+        resumed = [j for j in jobs if j.get("resumed_from")]
+        finished = [j for j in resumed if j["resumed_from"] == "write"]
+        print(f"[INFO] Estado {args.state}: {len(finished)} URLs concluídas, {len(resumed) - len(finished)} retomadas de etapas intermediárias")
+    if args.use_async:
+        jobs, report = run_async(jobs, stages, on_done=finish_job)
+    else:
+        jobs, report = run_pipeline(jobs, stages, queue_size=args.queue_size, on_done=finish_job, on_thread_exit=close_thread_pool)
+    for job in jobs:
+        if job.get("error"):
+            print(f"[ERRO] {job['url']}: etapa {job['error']['stage']} falhou: {job['error']['error']}")
+    print(format_utilization(report))
+    mc = manifest_stats()
+    print(f"[INFO] Cache de manifests: {mc['hits']} hits, {mc['revalidated']} revalidados, {mc['misses']} downloads")
+    if http_client.stats():
+        print("[INFO] HTTP por host:")
+        print(http_client.format_stats())
 
 if __name__ == "__main__":
     main()
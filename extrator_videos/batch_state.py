@@ -0,0 +1,80 @@
+"""
+Estado persistente de um batch (JSONL append-only).
+
+Cada linha registra uma etapa concluída de uma URL:
+    {"url": ..., "stage": "transcribe", "artifacts": {...}, "ts": ...}
+
+Ao reexecutar o batch com o mesmo arquivo, as etapas já concluídas são
+puladas. Artefatos grandes (transcrição, resumo) ficam em `<estado>.d/`,
+e a linha guarda só o caminho.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+
+class BatchState:
+    def __init__(self, path: str):
+        self.path = path
+        self.artifact_dir = path + ".d"
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except Exception:
+                        # última linha pode estar truncada se o processo caiu no meio da escrita
+                        continue
+                    self._stages.setdefault(rec.get("url"), {})[rec.get("stage")] = rec
+        except FileNotFoundError:
+            pass
+
+    def stages(self, url: str) -> dict:
+        with self._lock:
+            return dict(self._stages.get(url) or {})
+
+    def record(self, url: str, stage: str, artifacts: dict = None):
+        rec = {"url": url, "stage": stage, "artifacts": artifacts or {}, "ts": time.time()}
+        line = json.dumps(rec, ensure_ascii=False) + "\n"
+        with self._lock:
+            d = os.path.dirname(self.path)
+            if d:
+                os.makedirs(d, exist_ok=True)
+            with open(self.path, "a+b") as f:
+                # linha truncada por uma queda: fecha a linha antes, senão este registro cola nela e se perde
+                if f.seek(0, os.SEEK_END) > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        f.write(b"\n")
+                f.write(line.encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+            self._stages.setdefault(url, {})[stage] = rec
+
+    def save_artifact(self, url: str, stage: str, data) -> str:
+        os.makedirs(self.artifact_dir, exist_ok=True)
+        name = f"{hashlib.sha256(url.encode('utf-8')).hexdigest()[:16]}_{stage}.json"
+        path = os.path.join(self.artifact_dir, name)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        return path
+
+    def load_artifact(self, path: str):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def summary(self) -> dict:
+        with self._lock:
+            out = {}
+            for stages in self._stages.values():
+                for st in stages:
+                    out[st] = out.get(st, 0) + 1
+            return out
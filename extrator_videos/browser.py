@@ -1,14 +1,72 @@
 import json
 import os
+import re
 import time
 from typing import Optional, List
 from playwright.sync_api import sync_playwright, Page
 from .network_capture import NetworkCapture
 from .instrumentation import init_scripts
 from .antibot import context_args
+from .browser_pool import BrowserPool, thread_pool, pool_enabled
+from urllib.parse import urlparse
+from .resource_policy import install_for_resolve
+from .session_store import domain_of, domain_lock, load_state, save_state, invalidate, looks_logged_out
+
+# Injetado ANTES de qualquer navegação em cada página
+STEALTH_SCRIPT = """
+    // Mascarar webdriver
+    Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
+    
+    // Mascarar chrome automation
+    window.navigator.chrome = {runtime: {}};
+    
+    // Mascarar permissions
+    const originalQuery = window.navigator.permissions.query;
+    window.navigator.permissions.query = (parameters) => (
+        parameters.name === 'notifications' ?
+            Promise.resolve({ state: Notification.permission }) :
+            originalQuery(parameters)
+    );
+    
+    // Mascarar plugins
+    Object.defineProperty(navigator, 'plugins', {
+        get: () => [1, 2, 3, 4, 5]
+    });
+    
+    // Mascarar languages
+    Object.defineProperty(navigator, 'languages', {
+        get: () => ['pt-BR', 'pt', 'en-US', 'en']
+    });
+"""
+
+# botões de play dos players comuns; `is_play_control` descarta o que só contém "play" no nome
+PLAY_SELECTOR = '.vjs-big-play-button, [class*="play-button"], [class*="play-btn"], button[aria-label*="play" i], button[aria-label*="reproduzir" i], button[class*="play"]'
+_PLAY_CLASSES = ("play", "play-button", "play-btn", "playbutton", "big-play-button", "vjs-big-play-button", "btn-play", "button-play", "play-icon")
+
+def is_play_control(cls: Optional[str], aria: Optional[str]) -> bool:
+    """Controle de play de verdade (não `display`, `playlist`, `player-wrapper`, ...)."""
+    for token in (cls or "").lower().split():
+        if token in _PLAY_CLASSES or token.endswith(("-play-button", "__play-button", "-play-btn")):
+            return True
+    words = re.findall(r"[a-zà-ú]+", (aria or "").lower())
+    return "play" in words or "reproduzir" in words
+
+def resolve_mode() -> str:
+    """event: retorna na primeira resposta de vídeo/manifest; idle: espera networkidle (comportamento antigo)."""
+    m = (os.getenv("RESOLVE_MODE") or "event").lower()
+    return m if m in ("event", "idle") else "event"
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name) or default)
+    except Exception:
+        return default
 
 class BrowserSession:
-    def __init__(self, proxy: Optional[str] = None, cookies_path: Optional[str] = None, email: Optional[str] = None, senha: Optional[str] = None, initial_cookies: Optional[list] = None, headless: bool = False):
+    def __init__(self, proxy: Optional[str] = None, cookies_path: Optional[str] = None, email: Optional[str] = None, senha: Optional[str] = None, initial_cookies: Optional[list] = None, headless: bool = False, pool: Optional[BrowserPool] = None):
+        # pool: navegador reaproveitado entre URLs (padrão: pool da thread, desligado com BROWSER_POOL=0)
+        self.pool = pool if pool is not None else (thread_pool() if pool_enabled() else None)
+        self.shared_context = False
         self.proxy = proxy
         self.cookies_path = cookies_path
         self.email = email
@@ -21,16 +79,37 @@ class BrowserSession:
         self.page = None
         self.capture = NetworkCapture()
         self.ua = None
+        self.stored_state = None
+        self.policy = None
+        self.wait_video = True
 
-    def collect(self, url: str) -> NetworkCapture:
-        self.play = sync_playwright().start()
-        self.browser = self.play.chromium.launch(headless=self.headless)
+    def collect(self, url: str, wait_video: bool = True) -> NetworkCapture:
+        """
+        Login (ou sessão salva) e navegação até `url`, capturando a rede. Com wait_video=False
+        só garante o login e a página carregada (domcontentloaded), sem esperar vídeo nem
+        clicar no player: para páginas de índice, como a lista de aulas do crawler.
+        """
+        self.wait_video = wait_video
         args = context_args(self.proxy)
-        self.context = self.browser.new_context(**args)
-        try:
+        domain = domain_of(url)
+        if self.email and not self.initial_cookies:
+            # sessão salva de um login anterior (cookies + localStorage)
+            self.stored_state = load_state(domain, self.email)
+            if self.stored_state:
+                args["storage_state"] = self.stored_state
+        if self.pool is not None:
+            self.browser = self.pool.browser(self.proxy, self.headless)
+            self.context, self.shared_context, self.ua = self.pool.context(self.browser, urlparse(url).netloc, args)
+        else:
+            self.play = sync_playwright().start()
+            self.browser = self.play.chromium.launch(headless=self.headless)
+            self.context = self.browser.new_context(**args)
             self.ua = args.get("user_agent")
-        except Exception:
-            self.ua = None
+        if self.stored_state and self.shared_context:
+            try:
+                self.context.add_cookies(self.stored_state["cookies"])
+            except Exception:
+                pass
         if self.initial_cookies and isinstance(self.initial_cookies, list):
             try:
                 self.context.add_cookies(self.initial_cookies)
@@ -45,163 +124,217 @@ class BrowserSession:
             except Exception:
                 pass
         self.page = self.context.new_page()
-        
-        # Injetar scripts anti-detecção ANTES de qualquer navegação
-        self.page.add_init_script("""
-            // Mascarar webdriver
-            Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
-            
-            // Mascarar chrome automation
-            window.navigator.chrome = {runtime: {}};
-            
-            // Mascarar permissions
-            const originalQuery = window.navigator.permissions.query;
-            window.navigator.permissions.query = (parameters) => (
-                parameters.name === 'notifications' ?
-                    Promise.resolve({ state: Notification.permission }) :
-                    originalQuery(parameters)
-            );
-            
-            // Mascarar plugins
-            Object.defineProperty(navigator, 'plugins', {
-                get: () => [1, 2, 3, 4, 5]
-            });
-            
-            // Mascarar languages
-            Object.defineProperty(navigator, 'languages', {
-                get: () => ['pt-BR', 'pt', 'en-US', 'en']
-            });
-        """)
-        
-        for s in init_scripts():
-            self.page.add_init_script(s)
-            
+        # captura registrada antes do login: o fluxo do Hub.la já navega até o vídeo
+        self.policy = self._prepare_page(self.page, self.capture)
+
         # Lógica de Login Automático
-        if (not self.initial_cookies) and self.email and self.senha:
-            if "segueadii.com.br" in url:
+        if (not self.initial_cookies) and (not self.stored_state) and self.email and self.senha:
+            with domain_lock(domain):
+                # outro worker pode ter acabado de logar neste domínio
+                self.stored_state = load_state(domain, self.email)
+                if self.stored_state:
+                    self.context.add_cookies(self.stored_state["cookies"])
+                else:
+                    self._login(url)
+                    self._save_state(url)
+
+        # Se urls diferentes, o goto acima já resolveu, mas por garantia:
+        if self.page.url != url:
+            self._goto_target(url)
+
+        if (self.stored_state or self.initial_cookies) and self.email and self.senha and looks_logged_out(self.page.url):
+            # sessão reaproveitada expirou no servidor: descarta e refaz o login
+            with domain_lock(domain):
+                invalidate(domain, self.email)
+                self.stored_state = None
+                self._login(url)
+                self._save_state(url)
+            if self.page.url != url:
+                self.capture.video_seen_at = None
+                self._goto_target(url)
+
+        if self.policy is not None and self.policy.stats["blocked"]:
+            print(f"[INFO] Requisições bloqueadas no resolve: {self.policy.stats['blocked']} {self.policy.stats['by_reason']}")
+        try:
+            flag = self.page.evaluate("() => window.__drmDetected ? 'drm' : null")
+            if flag:
+                self.capture.flags["drm"] = flag
+        except Exception:
+            pass
+        return self.capture
+
+    def _login(self, url: str):
+        """Login pelo formulário do site (fluxos específicos por domínio)."""
+        if "segueadii.com.br" in url:
+            try:
+                self.page.goto("https://alunos.segueadii.com.br/login", wait_until="domcontentloaded")
+                self.page.locator('input[type="email"]').first.fill(self.email)
+                self.page.locator('input[type="password"]').first.fill(self.senha)
+                self.page.locator('button, input[type="submit"]').first.click()
+                self.page.wait_for_url(lambda u: "/login" not in u, timeout=15000)
+            except Exception:
+                pass
+        elif "hub.la" in url:
+            try:
+                print(f"[DEBUG] Detectado Hub.la. Iniciando fluxo de login...")
+                # Forçar ida para página de login direto por email
+                self.page.goto("https://app.hub.la/signin/email", wait_until="domcontentloaded")
+                print(f"[DEBUG] Navegou para login direto. Título: {self.page.title()}")
+                
                 try:
-                    self.page.goto("https://alunos.segueadii.com.br/login", wait_until="domcontentloaded")
-                    self.page.locator('input[type="email"]').first.fill(self.email)
-                    self.page.locator('input[type="password"]').first.fill(self.senha)
-                    self.page.locator('button, input[type="submit"]').first.click()
-                    self.page.wait_for_load_state("networkidle")
-                except Exception:
+                    self.page.wait_for_selector('input[type="email"], input[name="email"]', timeout=5000)
+                except:
                     pass
-            elif "hub.la" in url:
-                try:
-                    print(f"[DEBUG] Detectado Hub.la. Iniciando fluxo de login...")
-                    # Forçar ida para página de login direto por email
-                    self.page.goto("https://app.hub.la/signin/email", wait_until="domcontentloaded")
-                    print(f"[DEBUG] Navegou para login direto. Título: {self.page.title()}")
+                
+                if self.page.locator('input[type="email"], input[name="email"]').count() > 0:
+                    print("[DEBUG] Input de email encontrado. Preenchendo email...")
+                    self.page.locator('input[type="email"], input[name="email"]').first.fill(self.email)
                     
-                    try:
-                        self.page.wait_for_selector('input[type="email"], input[name="email"]', timeout=5000)
-                    except:
-                        pass
+                    # PASSO 1: Clicar em Continuar para ir para tela de senha
+                    print("[DEBUG] Procurando botão Continuar...")
+                    next_btn = self.page.locator('button[type="submit"], button:has-text("Continuar"), button:has-text("Continue"), button:has-text("Next")')
+                    if next_btn.count() > 0:
+                        print("[DEBUG] Clicando em Continuar...")
+                        next_btn.first.click()
+                        
+                        # Aguardar campo de senha aparecer
+                        print("[DEBUG] Aguardando campo de senha aparecer...")
+                        try:
+                            self.page.wait_for_selector('input[type="password"], input[name="password"]', state="visible", timeout=10000)
+                            print("[DEBUG] Campo de senha detectado!")
+                        except:
+                            print("[DEBUG] Timeout aguardando senha. Tentando continuar...")
                     
-                    if self.page.locator('input[type="email"], input[name="email"]').count() > 0:
-                        print("[DEBUG] Input de email encontrado. Preenchendo email...")
-                        self.page.locator('input[type="email"], input[name="email"]').first.fill(self.email)
-                        self.page.wait_for_timeout(1000)
+                    # PASSO 2: Preencher senha e fazer login
+                    if self.page.locator('input[type="password"], input[name="password"]').count() > 0:
+                        print("[DEBUG] Preenchendo senha...")
+                        self.page.locator('input[type="password"], input[name="password"]').first.fill(self.senha)
                         
-                        # PASSO 1: Clicar em Continuar para ir para tela de senha
-                        print("[DEBUG] Procurando botão Continuar...")
-                        next_btn = self.page.locator('button[type="submit"], button:has-text("Continuar"), button:has-text("Continue"), button:has-text("Next")')
-                        if next_btn.count() > 0:
-                            print("[DEBUG] Clicando em Continuar...")
-                            next_btn.first.click()
+                        print("[DEBUG] Clicando em Entrar...")
+                        login_btn = self.page.locator('button[type="submit"], button:has-text("Entrar"), button:has-text("Login"), button:has-text("Sign in")')
+                        if login_btn.count() > 0:
+                            login_btn.first.click()
+                            print(f"[DEBUG] Login submetido. Aguardando autenticação...")
                             
-                            # Aguardar campo de senha aparecer
-                            print("[DEBUG] Aguardando campo de senha aparecer...")
+                            # Aguardar sair da página de login
                             try:
-                                self.page.wait_for_selector('input[type="password"], input[name="password"]', timeout=10000)
-                                print("[DEBUG] Campo de senha detectado!")
+                                self.page.wait_for_url(lambda u: "/signin" not in u, timeout=15000)
+                                print(f"[DEBUG] Navegação pós-login detectada. URL: {self.page.url}")
                             except:
-                                print("[DEBUG] Timeout aguardando senha. Tentando continuar...")
+                                print(f"[AVISO] Timeout aguardando saída do login. URL atual: {self.page.url}")
                         
-                        # PASSO 2: Preencher senha e fazer login
-                        self.page.wait_for_timeout(1000)
-                        if self.page.locator('input[type="password"], input[name="password"]').count() > 0:
-                            print("[DEBUG] Preenchendo senha...")
-                            self.page.locator('input[type="password"], input[name="password"]').first.fill(self.senha)
-                            self.page.wait_for_timeout(500)
-                            
-                            print("[DEBUG] Clicando em Entrar...")
-                            login_btn = self.page.locator('button[type="submit"], button:has-text("Entrar"), button:has-text("Login"), button:has-text("Sign in")')
-                            if login_btn.count() > 0:
-                                login_btn.first.click()
-                                print(f"[DEBUG] Login submetido. Aguardando autenticação...")
-                                
-                                # Aguardar sair da página de login ou aparecer elemento de dashboard
-                                try:
-                                    self.page.wait_for_url(lambda u: "/signin" not in u, timeout=15000)
-                                    print(f"[DEBUG] Navegação pós-login detectada. URL: {self.page.url}")
-                                except:
-                                    print(f"[AVISO] Timeout aguardando saída do login. URL atual: {self.page.url}")
-                                
-                                self.page.wait_for_timeout(3000)
-                            
-                            self.page.wait_for_load_state("networkidle")
-                            
-                            # Agora vai para a URL original do video
-                            print(f"[DEBUG] Redirecionando para alvo: {url}")
-                            self.page.goto(url, wait_until="networkidle", timeout=60000)
-                            
-                            # Aguardar o player de vídeo carregar (elemento source com cloudflarestream)
-                            print("[DEBUG] Aguardando player de vídeo carregar...")
-                            try:
-                                self.page.wait_for_selector('source[src*="cloudflarestream"]', timeout=15000)
-                                print("[DEBUG] Player de vídeo detectado!")
-                            except:
-                                print("[DEBUG] Timeout aguardando player. Tentando scroll...")
-                            
-                            # Scroll para ativar lazy load
-                            print("[DEBUG] Scrollando página para ativar lazy load...")
-                            self.page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                            self.page.wait_for_timeout(2000)
-                            self.page.evaluate("window.scrollTo(0, 0)")
-                            self.page.wait_for_timeout(2000)
-                            
-                            # Tentar clicar em botões de play grandes (comum em players)
-                            print("[DEBUG] Procurando botões de play...")
-                            try:
-                                # Seletores comuns de play
-                                play_btns = self.page.locator('button[class*="play"], div[class*="play"], .vjs-big-play-button')
-                                if play_btns.count() > 0:
-                                    print(f"[DEBUG] Encontrado(s) {play_btns.count()} botões de play. Clicando no primeiro visível...")
-                                    for i in range(play_btns.count()):
-                                        if play_btns.nth(i).is_visible():
-                                            play_btns.nth(i).click(timeout=2000)
-                                            print(f"[DEBUG] Clicou no botão de play {i}")
-                                            self.page.wait_for_timeout(3000) # Dar tempo para o request iniciar
-                                            break
-                            except Exception as e:
-                                print(f"[DEBUG] Erro ao tentar clicar play: {e}")
-                        else:
-                             print("[DEBUG] Campo de senha não apareceu.")
+                        # Agora vai para a URL original do video; scroll e play acontecem dentro
+                        # de wait_for_video se o manifest não aparecer logo (RESOLVE_NUDGE_S)
+                        print(f"[DEBUG] Redirecionando para alvo: {url}")
+                        self._goto_target(url, timeout=60000)
                     else:
-                        print("[DEBUG] Input de email NÃO encontrado em signin/email. Já logado?")
-                        self.page.goto(url, wait_until="networkidle")
-
-                except Exception as e:
-                    print(f"[AVISO] Tentativa de login Hub.la falhou: {e}")
-                    # Tenta ir para URL original de qualquer jeito
-                    self.page.goto(url, wait_until="networkidle")
-        
-        self.page.on("request", self.capture.on_request)
-        self.page.on("response", self.capture.on_response)
-        
-        # Se urls diferentes, o goto acima já resolveu, mas por garantia:
-        if self.page.url != url:
-             self.page.goto(url, wait_until="networkidle", timeout=120000)
+                         print("[DEBUG] Campo de senha não apareceu.")
+                else:
+                    print("[DEBUG] Input de email NÃO encontrado em signin/email. Já logado?")
+                    self._goto_target(url)
+
+            except Exception as e:
+                print(f"[AVISO] Tentativa de login Hub.la falhou: {e}")
+                # Tenta ir para URL original de qualquer jeito
+                self._goto_target(url)
 
+    def _prepare_page(self, page, capture: NetworkCapture):
+        """Scripts anti-detecção, política de recursos e captura de rede; devolve a política instalada."""
+        # imagens, fontes, rastreadores e segmentos pós-manifest não são baixados (RESOLVE_PROFILE)
+        policy = install_for_resolve(page, capture)
+        page.add_init_script(STEALTH_SCRIPT)
+        for s in init_scripts():
+            page.add_init_script(s)
+        page.on("request", capture.on_request)
+        page.on("response", capture.on_response)
+        return policy
+
+    def open_tab(self, url: str, timeout: int = 60000):
+        """Nova aba no contexto autenticado, já navegando (sem esperar o carregamento). Retorna (página, captura)."""
+        page = self.context.new_page()
+        capture = NetworkCapture()
+        self._prepare_page(page, capture)
         try:
-            flag = self.page.evaluate("() => window.__drmDetected ? 'drm' : null")
-            if flag:
-                self.capture.flags["drm"] = flag
+            page.goto(url, wait_until="commit", timeout=timeout)
+        except Exception:
+            page.close()
+            raise
+        return page, capture
+
+    def _goto_target(self, url: str, timeout: int = 120000):
+        if not self.wait_video:
+            self.page.goto(url, wait_until="domcontentloaded", timeout=timeout)
+            return
+        if resolve_mode() == "idle":
+            self.page.goto(url, wait_until="networkidle", timeout=timeout)
+            if self.capture.video_seen_at is None:
+                self._nudge_player()
+                self.page.wait_for_timeout(3000)
+            return
+        # "commit": volta assim que a navegação começa; o resto vem pelos eventos de resposta
+        self.page.goto(url, wait_until="commit", timeout=timeout)
+        self.wait_for_video()
+
+    def wait_for_video(self, timeout_s: Optional[float] = None, grace_ms: Optional[float] = None, nudge_s: Optional[float] = None) -> bool:
+        """
+        Espera a primeira resposta de vídeo/manifest capturada, dá uma janela de graça
+        (RESOLVE_GRACE_MS) para o master playlist e variantes melhores e interrompe o
+        carregamento da página. Sem vídeo após RESOLVE_NUDGE_S, rola a página e clica no
+        play uma vez (players que só pedem o manifest ao tocar). Sem vídeo em
+        RESOLVE_MANIFEST_TIMEOUT_S, espera a página assentar para o fallback pelo HTML.
+        """
+        timeout_s = _env_float("RESOLVE_MANIFEST_TIMEOUT_S", 20) if timeout_s is None else timeout_s
+        grace_ms = _env_float("RESOLVE_GRACE_MS", 1500) if grace_ms is None else grace_ms
+        nudge_s = _env_float("RESOLVE_NUDGE_S", 2) if nudge_s is None else nudge_s
+        t0 = time.time()
+        nudged = False
+        # a API síncrona só entrega eventos durante chamadas ao Playwright: espera em fatias curtas
+        while self.capture.video_seen_at is None and time.time() - t0 < timeout_s:
+            if not nudged and time.time() - t0 >= nudge_s:
+                nudged = True
+                self._nudge_player()
+                continue
+            self.page.wait_for_timeout(100)
+        if self.capture.video_seen_at is None:
+            try:
+                self.page.wait_for_load_state("networkidle", timeout=15000)
+            except Exception:
+                pass
+            return False
+        print(f"[INFO] Vídeo detectado na rede em {self.capture.video_seen_at - t0:.1f}s")
+        remaining = grace_ms - (time.time() - self.capture.video_seen_at) * 1000
+        if remaining > 0:
+            self.page.wait_for_timeout(remaining)
+        try:
+            self.page.evaluate("() => window.stop()")
+        except Exception:
+            pass
+        return True
+
+    def _nudge_player(self):
+        """Rola a página (lazy load) e clica no primeiro botão de play visível (PLAY_SELECTOR + is_play_control)."""
+        print("[DEBUG] Manifest ainda não apareceu. Scrollando e procurando botões de play...")
+        try:
+            self.page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+            self.page.evaluate("window.scrollTo(0, 0)")
+            play_btns = self.page.locator(PLAY_SELECTOR)
+            for i in range(play_btns.count()):
+                btn = play_btns.nth(i)
+                if not is_play_control(btn.get_attribute("class"), btn.get_attribute("aria-label")):
+                    continue
+                if btn.is_visible():
+                    btn.click(timeout=2000)
+                    print(f"[DEBUG] Clicou no botão de play {i}")
+                    break
+        except Exception as e:
+            print(f"[DEBUG] Erro ao tentar clicar play: {e}")
+
+    def _save_state(self, url: str):
+        try:
+            if self.email and not looks_logged_out(self.page.url):
+                save_state(domain_of(url), self.email, self.context.storage_state())
         except Exception:
             pass
-        return self.capture
 
     def cookies_header_for(self, url: str) -> str:
         try:
@@ -217,6 +350,22 @@ class BrowserSession:
         return self.ua
 
     def close(self):
+        if self.pool is not None:
+            # navegador volta para o pool; só a página (ou o contexto descartável) é fechada
+            try:
+                if self.shared_context:
+                    if self.page:
+                        self.page.close()
+                elif self.context:
+                    self.context.close()
+            except Exception:
+                pass
+            try:
+                if self.browser and not self.browser.is_connected():
+                    self.pool.discard(self.proxy, self.headless)
+            except Exception:
+                pass
+            return
         try:
             if self.context:
                 self.context.close()
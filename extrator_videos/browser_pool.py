@@ -0,0 +1,117 @@
+"""
+Pool de navegadores Playwright reaproveitados entre URLs.
+
+Abrir o Playwright e o Chromium custa alguns segundos por URL; o pool mantém
+um Chromium por configuração (proxy, headless) e entrega um contexto novo a
+cada resolve (ou o mesmo contexto por domínio, com BROWSER_REUSE_CONTEXT=1,
+preservando cookies de login). O navegador é reciclado depois de
+BROWSER_POOL_MAX_USES usos ou quando cai.
+
+A API síncrona do Playwright só pode ser usada na thread que a iniciou, então
+cada thread (ex.: workers da etapa resolve do batch) tem seu próprio pool.
+"""
+import os
+import threading
+from playwright.sync_api import sync_playwright
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name) or default)
+    except Exception:
+        return default
+
+def pool_enabled() -> bool:
+    return (os.getenv("BROWSER_POOL") or "1").lower() in ("1", "true", "yes")
+
+def reuse_contexts() -> bool:
+    return (os.getenv("BROWSER_REUSE_CONTEXT") or "0").lower() in ("1", "true", "yes")
+
+class BrowserPool:
+    def __init__(self, max_uses: int = None):
+        self.max_uses = max_uses or max(1, _env_int("BROWSER_POOL_MAX_USES", 20))
+        self.play = None
+        self._browsers = {}
+        self._contexts = {}
+        self.stats = {"launches": 0, "reuses": 0, "recycled": 0, "crashed": 0}
+
+    def _start(self):
+        if self.play is None:
+            self.play = sync_playwright().start()
+        return self.play
+
+    def browser(self, proxy=None, headless: bool = False):
+        key = (proxy, bool(headless))
+        entry = self._browsers.get(key)
+        if entry is not None:
+            alive = True
+            try:
+                alive = entry["browser"].is_connected()
+            except Exception:
+                alive = False
+            if not alive:
+                self.stats["crashed"] += 1
+                self.discard(proxy, headless)
+                entry = None
+            elif entry["uses"] >= self.max_uses:
+                self.stats["recycled"] += 1
+                self.discard(proxy, headless)
+                entry = None
+        if entry is None:
+            b = self._start().chromium.launch(headless=headless)
+            entry = {"browser": b, "uses": 0}
+            self._browsers[key] = entry
+            self.stats["launches"] += 1
+        else:
+            self.stats["reuses"] += 1
+        entry["uses"] += 1
+        return entry["browser"]
+
+    def context(self, browser, domain: str, args: dict):
+        """(contexto, compartilhado, user agent): novo a cada chamada, ou reaproveitado por domínio."""
+        if not reuse_contexts():
+            return browser.new_context(**args), False, args.get("user_agent")
+        key = (id(browser), domain)
+        entry = self._contexts.get(key)
+        if entry is None:
+            # o contexto reaproveitado mantém o user agent com que foi criado
+            entry = (browser.new_context(**args), args.get("user_agent"))
+            self._contexts[key] = entry
+        return entry[0], True, entry[1]
+
+    def discard(self, proxy=None, headless: bool = False):
+        entry = self._browsers.pop((proxy, bool(headless)), None)
+        if entry is None:
+            return
+        bid = id(entry["browser"])
+        for k in [k for k in self._contexts if k[0] == bid]:
+            self._contexts.pop(k, None)
+        try:
+            entry["browser"].close()
+        except Exception:
+            pass
+
+    def close(self):
+        for proxy, headless in list(self._browsers):
+            self.discard(proxy, headless)
+        if self.play is not None:
+            try:
+                self.play.stop()
+            except Exception:
+                pass
+            self.play = None
+
+_LOCAL = threading.local()
+
+def thread_pool() -> BrowserPool:
+    """Pool da thread atual."""
+    pool = getattr(_LOCAL, "pool", None)
+    if pool is None:
+        pool = BrowserPool()
+        _LOCAL.pool = pool
+    return pool
+
+def close_thread_pool():
+    pool = getattr(_LOCAL, "pool", None)
+    if pool is not None:
+        pool.close()
+        _LOCAL.pool = None
@@ -0,0 +1,336 @@
+"""
+Backend comum dos caches (resolve_cache, transcription_cache).
+
+Padrão: um único arquivo SQLite por diretório de cache (`<dir>/cache.db`)
+com índice por (namespace, chave), TTL pela data de criação, despejo LRU
+quando o total passa de CACHE_MAX_MB (mantido numa tabela `totals`, sem somar
+a tabela a cada escrita) e contadores de hit/miss persistentes.
+CACHE_BACKEND=files mantém o layout antigo (um JSON por chave).
+
+Entradas antigas em `<dir>/<chave>.json` são importadas na primeira leitura.
+
+Uso:
+    python -m extrator_videos.cache_store stats [--dir DIR ...]
+    python -m extrator_videos.cache_store prune [--dir DIR ...] [--ttl-hours N] [--max-mb N]
+"""
+import os
+import json
+import time
+import sqlite3
+import argparse
+import threading
+
+DB_NAME = "cache.db"
+# quantas entradas o despejo LRU remove por consulta
+EVICT_BATCH = 64
+# namespaces que já existiam como <dir>/<chave>.json
+LEGACY_NAMESPACES = ("transcription", "resolve")
+
+def cache_backend() -> str:
+    b = (os.getenv("CACHE_BACKEND") or "sqlite").lower()
+    return b if b in ("sqlite", "files") else "sqlite"
+
+def cache_max_bytes() -> int:
+    try:
+        return int(float(os.getenv("CACHE_MAX_MB") or "2048") * 1024 * 1024)
+    except Exception:
+        return 0
+
+def _expired(created: float, ttl_hours) -> bool:
+    return ttl_hours is not None and time.time() - created > ttl_hours * 3600
+
+class SqliteStore:
+    def __init__(self, dir_path: str, max_bytes: int = None):
+        self.dir_path = dir_path
+        self.path = os.path.join(dir_path, DB_NAME)
+        self.max_bytes = cache_max_bytes() if max_bytes is None else max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(dir_path, exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS entries (ns TEXT, key TEXT, value BLOB, size INTEGER, created REAL, accessed REAL, PRIMARY KEY (ns, key))")
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS counters (ns TEXT, name TEXT, value INTEGER, PRIMARY KEY (ns, name))")
+        self._db.execute("CREATE TABLE IF NOT EXISTS totals (name TEXT PRIMARY KEY, value INTEGER)")
+        # bancos criados antes da tabela totals: soma uma única vez
+        self._db.execute("INSERT OR IGNORE INTO totals SELECT 'bytes', COALESCE(SUM(size), 0) FROM entries WHERE NOT EXISTS (SELECT 1 FROM totals WHERE name = 'bytes')")
+
+    def _count(self, ns: str, name: str, n: int = 1):
+        self._db.execute("INSERT INTO counters VALUES (?, ?, ?) ON CONFLICT(ns, name) DO UPDATE SET value = value + excluded.value", (ns, name, n))
+
+    def _add_bytes(self, n: int):
+        if n:
+            self._db.execute("UPDATE totals SET value = value + ? WHERE name = 'bytes'", (n,))
+
+    def _total_bytes(self) -> int:
+        row = self._db.execute("SELECT value FROM totals WHERE name = 'bytes'").fetchone()
+        return row[0] if row else 0
+
+    def _legacy(self, ns: str, key: str, ttl_hours):
+        if ns not in LEGACY_NAMESPACES:
+            return None
+        p = os.path.join(self.dir_path, key + ".json")
+        try:
+            created = os.path.getmtime(p)
+            if _expired(created, ttl_hours):
+                return None
+            with open(p, "rb") as f:
+                value = f.read()
+        except OSError:
+            return None
+        self.put(ns, key, value, created=created)
+        try:
+            os.remove(p)
+        except OSError:
+            pass
+        return value
+
+    def get(self, ns: str, key: str, ttl_hours=None):
+        with self._lock:
+            row = self._db.execute("SELECT value, created FROM entries WHERE ns = ? AND key = ?", (ns, key)).fetchone()
+            if row and not _expired(row[1], ttl_hours):
+                self._db.execute("BEGIN")
+                self._db.execute("UPDATE entries SET accessed = ? WHERE ns = ? AND key = ?", (time.time(), ns, key))
+                self._count(ns, "hits")
+                self._db.execute("COMMIT")
+                return row[0]
+        value = None if row else self._legacy(ns, key, ttl_hours)
+        with self._lock:
+            self._count(ns, "hits" if value is not None else "misses")
+        return value
+
+    def put(self, ns: str, key: str, value: bytes, created: float = None):
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                old = self._db.execute("SELECT size FROM entries WHERE ns = ? AND key = ?", (ns, key)).fetchone()
+                self._db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)", (ns, key, sqlite3.Binary(value), len(value), created or now, now))
+                self._add_bytes(len(value) - (old[0] if old else 0))
+                self._count(ns, "writes")
+                self._evict(self.max_bytes)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def delete(self, ns: str, key: str):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            old = self._db.execute("SELECT size FROM entries WHERE ns = ? AND key = ?", (ns, key)).fetchone()
+            if old:
+                self._db.execute("DELETE FROM entries WHERE ns = ? AND key = ?", (ns, key))
+                self._add_bytes(-old[0])
+            self._db.execute("COMMIT")
+
+    def scan(self, ns: str):
+        """(chave, valor, criado) de todas as entradas do namespace, incluindo JSONs antigos ainda não importados."""
+        if ns in LEGACY_NAMESPACES:
+            for fn in os.listdir(self.dir_path):
+                if fn.endswith(".json"):
+                    self._legacy(ns, fn[:-5], None)
+        with self._lock:
+            keys = [r[0] for r in self._db.execute("SELECT key FROM entries WHERE ns = ?", (ns,))]
+        for key in keys:
+            with self._lock:
+                row = self._db.execute("SELECT value, created FROM entries WHERE ns = ? AND key = ?", (ns, key)).fetchone()
+            if row:
+                yield key, bytes(row[0]), row[1]
+
+    def _evict(self, max_bytes: int) -> int:
+        if not max_bytes or max_bytes <= 0:
+            return 0
+        total = self._total_bytes()
+        evicted = 0
+        # lotes pelo índice de `accessed`: só lê as entradas que vão sair
+        while total > max_bytes:
+            rows = self._db.execute("SELECT ns, key, size FROM entries ORDER BY accessed LIMIT ?", (EVICT_BATCH,)).fetchall()
+            if not rows:
+                break
+            for ns, key, size in rows:
+                self._db.execute("DELETE FROM entries WHERE ns = ? AND key = ?", (ns, key))
+                self._count(ns, "evictions")
+                self._add_bytes(-size)
+                evicted += 1
+                total -= size
+                if total <= max_bytes:
+                    break
+        return evicted
+
+    def prune(self, ttl_hours=None, max_bytes: int = None) -> dict:
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            expired = 0
+            if ttl_hours is not None:
+                cutoff = time.time() - ttl_hours * 3600
+                freed = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries WHERE created < ?", (cutoff,)).fetchone()[0]
+                cur = self._db.execute("DELETE FROM entries WHERE created < ?", (cutoff,))
+                expired = cur.rowcount
+                self._add_bytes(-freed)
+            evicted = self._evict(self.max_bytes if max_bytes is None else max_bytes)
+            self._db.execute("COMMIT")
+            self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return {"expired": expired, "evicted": evicted}
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = {"backend": "sqlite", "path": self.path, "max_bytes": self.max_bytes, "namespaces": {}}
+            for ns, n, size in self._db.execute("SELECT ns, COUNT(*), SUM(size) FROM entries GROUP BY ns"):
+                out["namespaces"].setdefault(ns, {}).update({"entries": n, "bytes": size or 0})
+            for ns, name, value in self._db.execute("SELECT ns, name, value FROM counters"):
+                out["namespaces"].setdefault(ns, {})[name] = value
+        out["bytes"] = sum(v.get("bytes", 0) for v in out["namespaces"].values())
+        return out
+
+class FileStore:
+    """Layout antigo: um arquivo por chave, TTL e LRU pelo mtime."""
+
+    def __init__(self, dir_path: str, max_bytes: int = None):
+        self.dir_path = dir_path
+        self.max_bytes = cache_max_bytes() if max_bytes is None else max_bytes
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def _path(self, ns: str, key: str) -> str:
+        d = self.dir_path if ns in LEGACY_NAMESPACES else os.path.join(self.dir_path, ns)
+        return os.path.join(d, key + ".json")
+
+    def _count(self, ns: str, name: str):
+        with self._lock:
+            c = self._counters.setdefault(ns, {})
+            c[name] = c.get(name, 0) + 1
+
+    def get(self, ns: str, key: str, ttl_hours=None):
+        p = self._path(ns, key)
+        try:
+            if _expired(os.path.getmtime(p), ttl_hours):
+                raise OSError(p)
+            with open(p, "rb") as f:
+                value = f.read()
+        except OSError:
+            self._count(ns, "misses")
+            return None
+        self._count(ns, "hits")
+        return value
+
+    def put(self, ns: str, key: str, value: bytes, created: float = None):
+        p = self._path(ns, key)
+        os.makedirs(os.path.dirname(p), exist_ok=True)
+        tmp = f"{p}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(value)
+        os.replace(tmp, p)
+        if created:
+            os.utime(p, (created, created))
+        self._count(ns, "writes")
+
+    def delete(self, ns: str, key: str):
+        try:
+            os.remove(self._path(ns, key))
+        except OSError:
+            pass
+
+    def scan(self, ns: str):
+        d = os.path.dirname(self._path(ns, "x"))
+        if not os.path.isdir(d):
+            return
+        for fn in os.listdir(d):
+            if not fn.endswith(".json"):
+                continue
+            p = os.path.join(d, fn)
+            try:
+                created = os.path.getmtime(p)
+                with open(p, "rb") as f:
+                    value = f.read()
+            except OSError:
+                continue
+            yield fn[:-5], value, created
+
+    def _files(self):
+        for root, _dirs, files in os.walk(self.dir_path):
+            for fn in files:
+                if fn.endswith(".json"):
+                    p = os.path.join(root, fn)
+                    try:
+                        st = os.stat(p)
+                    except OSError:
+                        continue
+                    yield p, st.st_size, st.st_mtime
+
+    def prune(self, ttl_hours=None, max_bytes: int = None) -> dict:
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        expired = evicted = 0
+        files = []
+        for p, size, mtime in self._files():
+            if _expired(mtime, ttl_hours):
+                os.remove(p)
+                expired += 1
+            else:
+                files.append((mtime, size, p))
+        total = sum(f[1] for f in files)
+        if max_bytes and max_bytes > 0:
+            for _mtime, size, p in sorted(files):
+                if total <= max_bytes:
+                    break
+                os.remove(p)
+                total -= size
+                evicted += 1
+        return {"expired": expired, "evicted": evicted}
+
+    def stats(self) -> dict:
+        files = list(self._files())
+        return {"backend": "files", "path": self.dir_path, "max_bytes": self.max_bytes,
+                "entries": len(files), "bytes": sum(f[1] for f in files), "namespaces": dict(self._counters)}
+
+_STORES = {}
+_STORES_LOCK = threading.Lock()
+
+def get_store(dir_path: str):
+    """Store compartilhado por diretório (uma conexão por processo)."""
+    key = (os.path.abspath(dir_path), cache_backend())
+    with _STORES_LOCK:
+        st = _STORES.get(key)
+        if st is None:
+            st = SqliteStore(dir_path) if key[1] == "sqlite" else FileStore(dir_path)
+            _STORES[key] = st
+        return st
+
+def get_json(dir_path: str, ns: str, key: str, ttl_hours=None):
+    try:
+        value = get_store(dir_path).get(ns, key, ttl_hours)
+        return json.loads(value) if value is not None else None
+    except Exception:
+        return None
+
+def put_json(dir_path: str, ns: str, key: str, data) -> bool:
+    try:
+        get_store(dir_path).put(ns, key, json.dumps(data, ensure_ascii=False).encode("utf-8"))
+        return True
+    except Exception:
+        return False
+
+def _default_dirs():
+    return [os.getenv("SUMARIOS_CACHE_DIR") or "sumarios_cache", os.getenv("RESOLVE_CACHE_DIR") or "resolve_cache"]
+
+def main():
+    p = argparse.ArgumentParser(description="Estatísticas e limpeza dos caches")
+    p.add_argument("command", choices=["stats", "prune"])
+    p.add_argument("--dir", action="append", default=None)
+    p.add_argument("--ttl-hours", type=float, default=None)
+    p.add_argument("--max-mb", type=float, default=None)
+    args = p.parse_args()
+    out = {}
+    for d in args.dir or _default_dirs():
+        if not os.path.isdir(d):
+            continue
+        st = get_store(d)
+        if args.command == "prune":
+            max_bytes = int(args.max_mb * 1024 * 1024) if args.max_mb is not None else None
+            out[d] = {**st.prune(args.ttl_hours, max_bytes), **st.stats()}
+        else:
+            out[d] = st.stats()
+    print(json.dumps(out, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ from .extractor import extract
 from .credential_manager import get_credentials
 from .downloader import download_hls
 from .browser import BrowserSession
+from .session_store import domain_of, invalidate
 
 def main():
     load_dotenv()
@@ -19,12 +20,15 @@ def main():
     p.add_argument("--email", dest="email", default=None)
     p.add_argument("--senha", dest="senha", default=None)
     p.add_argument("--download", dest="download", default=None)
+    p.add_argument("--reset-session", dest="reset_session", action="store_true", help="Descarta a sessão salva e força novo login")
     args = p.parse_args()
     email_arg = args.email or os.getenv("EMAIL")
     senha_arg = args.senha or os.getenv("SENHA")
     
     # Resolve credentials via manager
     email, senha = get_credentials(args.url, email_arg, senha_arg)
+    if args.reset_session and email:
+        invalidate(domain_of(args.url), email)
     
     res = extract(args.url, cookies_path=args.cookies, proxy=args.proxy, email=email, senha=senha)
     if args.download:
@@ -71,6 +75,7 @@ def main():
                 pass
             ck = sess.cookies_header_for(target)
             ua = sess.user_agent() or None
+            sess.close()
             if ck:
                 headers["Cookie"] = ck
             if ua:
@@ -0,0 +1,187 @@
+"""
+Crawl de um curso inteiro com um único login.
+
+Abre a página do curso/módulo com BrowserSession (login ou sessão salva),
+lista os links de aula e resolve os manifests em várias abas do mesmo
+contexto autenticado. Os manifests vão para o resolve_cache, então o batch
+sobre a lista gerada não abre o Playwright de novo para essas aulas.
+
+Uso:
+    python -m extrator_videos.crawler URL_DO_CURSO --out targets.txt [--tabs 4] [--pattern REGEX] [--limit N]
+"""
+import os
+import re
+import json
+import time
+import argparse
+from typing import Dict, List, Optional
+from urllib.parse import urlparse, urldefrag
+from dotenv import load_dotenv
+from .browser import BrowserSession
+from .credential_manager import get_credentials
+from .dom_scan import scan_frames
+from .network_capture import NetworkCapture
+from .resolve_cache import save as resolve_save
+
+# caminho das aulas por plataforma (buscado no path da URL)
+LESSON_PATTERNS = {
+    "hub.la": r"/m/[^/?#]+/p/[^/?#]+",
+    "segueadii.com.br": r"/area/produto/item/\d+",
+}
+GENERIC_PATTERN = r"/(aula|aulas|lesson|lessons|licao|item|video)/[^/?#]+"
+
+LINKS_JS = "() => Array.from(document.querySelectorAll('a[href]')).map(a => a.href)"
+
+def lesson_pattern(url: str) -> str:
+    host = (urlparse(url).hostname or "").lower()
+    for domain, rx in LESSON_PATTERNS.items():
+        if host == domain or host.endswith("." + domain):
+            return rx
+    return GENERIC_PATTERN
+
+def filter_lessons(hrefs, course_url: str, pattern: Optional[str] = None) -> List[str]:
+    """Links de aula do mesmo site, sem âncoras nem repetidos, na ordem da página."""
+    rx = re.compile(pattern or lesson_pattern(course_url))
+    host = urlparse(course_url).hostname
+    course = urldefrag(course_url)[0].rstrip("/")
+    out, seen = [], set()
+    for h in hrefs or []:
+        u = urldefrag(h or "")[0]
+        p = urlparse(u)
+        if p.scheme not in ("http", "https") or p.hostname != host:
+            continue
+        if u.rstrip("/") == course or u in seen or not rx.search(p.path):
+            continue
+        seen.add(u)
+        out.append(u)
+    return out
+
+def lesson_links(page, course_url: str, pattern: Optional[str] = None, timeout_s: float = 15) -> List[str]:
+    """Espera os links de aula aparecerem (SPAs renderizam a lista depois do load) em todos os frames."""
+    t0 = time.time()
+    links: List[str] = []
+    while True:
+        hrefs = []
+        for frame in page.frames:
+            try:
+                hrefs.extend(frame.evaluate(LINKS_JS))
+            except Exception:
+                pass
+        links = filter_lessons(hrefs, course_url, pattern)
+        if links or time.time() - t0 >= timeout_s:
+            return links
+        page.wait_for_timeout(250)
+
+def pick_manifest(capture: NetworkCapture) -> Optional[str]:
+    """Mesma preferência do extract: HLS, depois DASH, depois o primeiro arquivo de vídeo."""
+    for found in (capture.find(ext=".m3u8"), capture.find(content_type="application/vnd.apple.mpegurl"),
+                  capture.find(content_type="application/x-mpegurl"), capture.find(ext=".mpd"),
+                  capture.find(content_type="application/dash+xml"), capture.video_candidates()):
+        if found:
+            return found[0]["url"]
+    return None
+
+def resolve_in_tabs(session, links: List[str], tabs: int = 4, timeout_s: float = 30, grace_ms: float = 1500, on_result=None) -> Dict[str, Optional[str]]:
+    """
+    Resolve os links em até `tabs` abas simultâneas do contexto autenticado.
+    Cada aba fecha assim que vê o manifest (mais a janela de graça) ou no tempo limite.
+    """
+    pending = list(links)
+    active = []
+    results: Dict[str, Optional[str]] = {}
+
+    def done(u, manifest):
+        results[u] = manifest
+        if on_result:
+            on_result(u, manifest)
+
+    while pending or active:
+        while pending and len(active) < max(1, tabs):
+            u = pending.pop(0)
+            try:
+                page, capture = session.open_tab(u)
+            except Exception as e:
+                print(f"[AVISO] Falha ao abrir {u}: {e}")
+                done(u, None)
+                continue
+            active.append((u, page, capture, time.time()))
+        if not active:
+            continue
+        # a API síncrona entrega os eventos de todas as abas durante qualquer espera
+        active[0][1].wait_for_timeout(100)
+        now = time.time()
+        still = []
+        for u, page, capture, started in active:
+            seen = capture.video_seen_at
+            if (seen is not None and (now - seen) * 1000 >= grace_ms) or now - started >= timeout_s:
+                manifest = pick_manifest(capture)
+                if not manifest:
+                    found = scan_frames(page)
+                    manifest = found[0] if found else None
+                done(u, manifest)
+                try:
+                    page.close()
+                except Exception:
+                    pass
+            else:
+                still.append((u, page, capture, started))
+        active = still
+    return results
+
+def crawl_course(course_url: str, email: Optional[str] = None, senha: Optional[str] = None, proxy: Optional[str] = None,
+                 tabs: int = 4, pattern: Optional[str] = None, limit: Optional[int] = None, cache_dir: Optional[str] = None) -> List[Dict]:
+    """Lista as aulas do curso com os manifests resolvidos (None quando não achou) e grava no resolve_cache."""
+    headless = os.getenv("HEADLESS", "false").lower() in ("true", "1", "yes")
+    if "hub.la" in course_url:
+        headless = False
+    rcdir = cache_dir or os.getenv("RESOLVE_CACHE_DIR") or "resolve_cache"
+    timeout_s = float(os.getenv("RESOLVE_MANIFEST_TIMEOUT_S") or 20) + 10
+    grace_ms = float(os.getenv("RESOLVE_GRACE_MS") or 1500)
+
+    def cache(u, manifest):
+        print(f"[INFO] {'OK' if manifest else '--'} {u}")
+        if manifest:
+            resolve_save(rcdir, u, {"manifest": manifest})
+
+    session = BrowserSession(proxy=proxy, email=email, senha=senha, headless=headless)
+    try:
+        # índice do curso: só login e DOM, sem esperar vídeo nem clicar em cards de aula
+        session.collect(course_url, wait_video=False)
+        links = lesson_links(session.page, course_url, pattern)
+        if limit:
+            links = links[:limit]
+        print(f"[INFO] {len(links)} aulas encontradas em {course_url}")
+        results = resolve_in_tabs(session, links, tabs=tabs, timeout_s=timeout_s, grace_ms=grace_ms, on_result=cache)
+    finally:
+        session.close()
+    return [{"url": u, "manifest": results.get(u)} for u in links]
+
+def main():
+    load_dotenv()
+    p = argparse.ArgumentParser(description="Lista e resolve todas as aulas de um curso com um único login")
+    p.add_argument("url")
+    p.add_argument("--out", default=None, help="Arquivo no formato do targets.txt (padrão: stdout)")
+    p.add_argument("--json", action="store_true", help="Imprime as aulas com os manifests em JSON")
+    p.add_argument("--tabs", type=int, default=int(os.getenv("CRAWL_TABS") or "4"))
+    p.add_argument("--pattern", default=os.getenv("CRAWL_LESSON_PATTERN") or None, help="Regex do caminho das aulas")
+    p.add_argument("--limit", type=int, default=None)
+    p.add_argument("--email", default=None)
+    p.add_argument("--senha", default=None)
+    p.add_argument("--proxy", default=os.getenv("PROXY") or None)
+    args = p.parse_args()
+    email, senha = get_credentials(args.url, args.email or os.getenv("EMAIL"), args.senha or os.getenv("SENHA"))
+    lessons = crawl_course(args.url, email=email, senha=senha, proxy=args.proxy, tabs=args.tabs, pattern=args.pattern, limit=args.limit)
+    resolved = sum(1 for x in lessons if x["manifest"])
+    print(f"[INFO] {resolved}/{len(lessons)} manifests gravados no resolve_cache")
+    if args.json:
+        print(json.dumps(lessons, ensure_ascii=False, indent=2))
+    lines = "\n".join(x["url"] for x in lessons) + ("\n" if lessons else "")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(lines)
+        print(f"[INFO] Lista salva em {args.out}")
+    elif not args.json:
+        print(lines, end="")
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,9 @@
 from typing import Dict, List
-import requests
 from .schema import VideoVariant
+from .manifest_cache import fetch_text
 
-def parse_dash(url: str) -> Dict:
-    xml = requests.get(url, timeout=20).text
+def parse_dash(url: str, headers: Dict = None) -> Dict:
+    xml = fetch_text(url, headers)
     drm = None
     if "cenc:" in xml or "ContentProtection" in xml:
         drm = "dash_drm"
@@ -0,0 +1,66 @@
+"""
+Busca de URLs de vídeo no DOM, usada quando a rede não mostrou nenhum manifest.
+
+Em vez de trazer o HTML inteiro de cada frame (page.content()/frame.content())
+e rodar regex no Python, um script roda dentro de cada frame e devolve só as
+URLs encontradas: links do Cloudflare Stream, src de <video>/<source>,
+.m3u8/.mpd no HTML e em JSON embutido nos <script> (barras escapadas como
+\\/ ou \\u002F).
+"""
+from typing import List
+from .network_capture import is_video_url
+
+SCAN_JS = r"""
+() => {
+  const out = [];
+  const seen = new Set();
+  const add = (u) => {
+    if (!u || typeof u !== 'string') return;
+    u = u.replace(/\\u002F/gi, '/').replace(/\\\//g, '/');
+    if (!/^https?:\/\//i.test(u) || seen.has(u)) return;
+    seen.add(u);
+    out.push(u);
+  };
+  const CF = /https?:\\?\/\\?\/[a-zA-Z0-9-]+\.cloudflarestream\.com\\?\/[^"'\s<>]+?\\?\/manifest\\?\/video\.m3u8/g;
+  const M3U8 = /https?:\\?\/\\?\/[^"'\s<>)]+\.m3u8/g;
+  const MPD = /https?:\\?\/\\?\/[^"'\s<>)]+\.mpd/g;
+  const html = document.documentElement ? document.documentElement.outerHTML : '';
+  (html.match(CF) || []).forEach(add);
+  document.querySelectorAll('video[src], video source[src], source[src]').forEach(el => add(el.src));
+  document.querySelectorAll('video').forEach(v => add(v.currentSrc));
+  (html.match(M3U8) || []).forEach(add);
+  document.querySelectorAll('script').forEach(s => {
+    const t = (s.textContent || '').replace(/\\u002F/gi, '/');
+    (t.match(M3U8) || []).forEach(add);
+    (t.match(MPD) || []).forEach(add);
+  });
+  (html.match(MPD) || []).forEach(add);
+  return out.slice(0, 50);
+}
+"""
+
+def is_candidate(url: str) -> bool:
+    low = (url or "").lower()
+    return is_video_url(low) or ".m3u8" in low or ".mpd" in low
+
+def scan_frame(frame) -> List[str]:
+    try:
+        return [u for u in frame.evaluate(SCAN_JS) or [] if is_candidate(u)]
+    except Exception as e:
+        print(f"[DEBUG] Erro ao ler frame: {e}")
+        return []
+
+def scan_frames(page) -> List[str]:
+    """URLs de vídeo do frame principal; se não houver, do primeiro iframe que tiver alguma."""
+    try:
+        main = page.main_frame
+        frames = [main] + [f for f in page.frames if f is not main]
+    except Exception:
+        return []
+    for i, frame in enumerate(frames):
+        urls = scan_frame(frame)
+        if urls:
+            if i:
+                print(f"[INFO] Link de vídeo encontrado no FRAME: {frame.url}")
+            return urls
+    return []
@@ -1,7 +1,8 @@
-import requests
+from . import http_client
 import m3u8
 from urllib.parse import urljoin
-import time
+from .manifest_cache import fetch_text
+from .segment_fetcher import fetch_segments, segment_concurrency
 
 UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36"
 
@@ -9,18 +10,15 @@ def download_hls(manifest_url: str, out_path: str, headers: dict = None, sleep_m
     h = {"User-Agent": UA}
     if headers:
         h.update(headers)
-    m = m3u8.load(manifest_url, headers=h)
-    sess = requests.Session()
-    if proxy:
-        sess.proxies = {"http": proxy, "https": proxy}
-    with open(out_path, "wb") as f:
-        for s in m.segments:
-            u = s.uri
-            if not u.startswith("http"):
-                u = urljoin(manifest_url, u)
-            r = sess.get(u, stream=True, headers=h, timeout=30)
-            for chunk in r.iter_content(chunk_size=1024 * 256):
-                if chunk:
-                    f.write(chunk)
-            if sleep_ms and sleep_ms > 0:
-                time.sleep(sleep_ms / 1000.0)
+    m = m3u8.loads(fetch_text(manifest_url, h), uri=manifest_url)
+    # fetch_segments já faz as próprias retentativas por segmento
+    sess = http_client.session(proxy=proxy, pool=segment_concurrency(), retries=False)
+    urls = []
+    for s in m.segments:
+        u = s.uri
+        if not u.startswith("http"):
+            u = urljoin(manifest_url, u)
+        urls.append(u)
+    # SLOW_DOWNLOAD: um segmento por vez, respeitando o intervalo entre requisições
+    concurrency = 1 if sleep_ms and sleep_ms > 0 else None
+    return fetch_segments(sess, urls, out_path, headers=h, concurrency=concurrency, sleep_ms=sleep_ms)
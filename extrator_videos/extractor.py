@@ -3,12 +3,13 @@ from .schema import VideoExtractionResult, VideoSource, VideoVariant
 from .browser import BrowserSession
 from .auth import programmatic_login
 from .network_capture import NetworkCapture, is_video_url
-import requests
+from . import http_client
 from .resolver import canonicalize
 from .hls import parse_hls
 from .dash import parse_dash
 from .metadata import enrich_metadata
 from .drm import detect_drm_playlist, detect_drm_eme_flag
+from .dom_scan import scan_frames
 import os
 import json
 from pathlib import Path
@@ -57,7 +58,7 @@ def extract(url: str, cookies_path: Optional[str] = None, proxy: Optional[str] =
     if is_video_url(url):
         ct = None
         try:
-            r = requests.head(url, timeout=15, allow_redirects=True)
+            r = http_client.head(url, timeout=15, allow_redirects=True)
             ct = r.headers.get("content-type")
         except Exception:
             ct = None
@@ -103,53 +104,22 @@ def extract(url: str, cookies_path: Optional[str] = None, proxy: Optional[str] =
         print(f"[INFO] Hub.la detectado: Forçando modo VISUAL (headless=False) para garantir carregamento.")
 
     session = BrowserSession(proxy=proxy, cookies_path=cookies_path, email=email, senha=senha, initial_cookies=initial_cookies, headless=headless)
-    capture = session.collect(url)
+    try:
+        capture = session.collect(url)
+    except Exception:
+        session.close()
+        raise
     candidates = capture.video_candidates()
     eme_drm = detect_drm_eme_flag(capture)
     # Fallback: Se não achou nada na rede, tentar achar no HTML (ex: Cloudflare Stream link escondido)
     if not candidates:
         try:
-            content = session.page.content()
-            import re
-            # Regex priorities
-            # 1. Cloudflare Stream (Specific, handles escaped slashes like https:\/\/...)
-            # 2. Generic .m3u8 (Fallback)
-            regexes = [
-                r'https?:\\?/\\?/[a-zA-Z0-9-]+\.cloudflarestream\.com\\?/.+?\\?/manifest\\?/video\.m3u8',
-                r'https?:\\?/\\?/[^"\'\s<>)]+\.m3u8'
-            ]
-            
-            cf_matches = []
-            
-            # Helper to search content with multiple regexes
-            def find_video_url(text):
-                for rx in regexes:
-                    ms = re.findall(rx, text)
-                    if ms:
-                         # Clean escaped slashes if present
-                         return [m.replace("\\/", "/") for m in ms]
-                return []
-
-            # 1. Busca na página principal
-            cf_matches = find_video_url(content)
-            
-            # 2. Se não achar, busca nos iframes
-            if not cf_matches:
-                print(f"[DEBUG] Vídeo não encontrado no HTML principal. Buscando em {len(session.page.frames)} frames...")
-                for frame in session.page.frames:
-                    try:
-                        fc = frame.content()
-                        matches = find_video_url(fc)
-                        if matches:
-                            print(f"[INFO] Link de vídeo encontrado no FRAME: {frame.url}")
-                            cf_matches = matches
-                            break
-                    except Exception as e:
-                        print(f"[DEBUG] Erro ao ler frame: {e}")
+            # script no DOM de cada frame: volta só com as URLs, sem trafegar o HTML inteiro
+            cf_matches = scan_frames(session.page)
 
             if cf_matches:
                 video_url = cf_matches[0]
-                print(f"[INFO] Link de vídeo encontrado (Regex): {video_url}")
+                print(f"[INFO] Link de vídeo encontrado no DOM: {video_url}")
                 # Criar um objeto de resposta fake para compatibilidade
                 # Add basic headers to avoid 403
                 headers = {
@@ -158,12 +128,11 @@ def extract(url: str, cookies_path: Optional[str] = None, proxy: Optional[str] =
                 }
                 candidates.append({
                     "url": video_url,
-                    "type": "application/x-mpegURL",
+                    "type": "application/dash+xml" if ".mpd" in video_url.lower() else ("application/x-mpegURL" if ".m3u8" in video_url.lower() else None),
                     "headers": headers
                 })
             else:
-                print(f"[DEBUG] Fallback HTML falhou. Comprimento do conteúdo: {len(content)}")
-                # print(f"[DEBUG] Snippet do conteúdo (início): {content[:500]}")
+                print(f"[DEBUG] Fallback HTML falhou em {len(session.page.frames)} frames")
         except Exception as e:
             print(f"[AVISO] Erro ao buscar fallback no HTML: {e}")
 
@@ -1,17 +1,23 @@
 from typing import Dict, List
 from .schema import VideoVariant
 import m3u8
+import os
 from urllib.parse import urljoin
+from .manifest_cache import fetch_text
 UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36"
 
-def parse_hls(url: str) -> Dict:
-    m = m3u8.load(url, headers={"User-Agent": UA})
+def parse_hls(url: str, headers: Dict = None) -> Dict:
+    h = {"User-Agent": UA}
+    if headers:
+        h.update(headers)
+    m = m3u8.loads(fetch_text(url, h), uri=url)
     variants: List[VideoVariant] = []
     for pl in m.playlists or []:
         info = pl.stream_info
         res = None
         br = None
         frv = None
+        codecs = None
         if info:
             if info.resolution:
                 res = f"{info.resolution[0]}x{info.resolution[1]}"
@@ -19,7 +25,8 @@ def parse_hls(url: str) -> Dict:
                 br = int(info.bandwidth)
             if info.frame_rate:
                 frv = float(info.frame_rate)
-        variants.append(VideoVariant(url=absolute(url, pl.uri), type="hls", resolution=res, bitrate_bps=br, frame_rate=frv))
+            codecs = getattr(info, 'codecs', None)
+        variants.append(VideoVariant(url=absolute(url, pl.uri), type="hls", resolution=res, bitrate_bps=br, frame_rate=frv, codec=codecs))
     # audio media renditions
     audios = []
     for media in getattr(m, 'media', []) or []:
@@ -37,6 +44,32 @@ def parse_hls(url: str) -> Dict:
     raw = m.dumps()
     return {"variants": variants, "audios": audios, "raw": raw}
 
+AUDIO_CODECS = ("mp4a", "ac-3", "ec-3", "opus", "mp3", "flac")
+
+def carries_audio(v: VideoVariant) -> bool:
+    # sem CODECS no master não dá para saber: assumir áudio multiplexado
+    if not v.codec:
+        return True
+    return any(c.strip().lower().startswith(AUDIO_CODECS) for c in v.codec.split(","))
+
+def select_audio_variant(variants: List[VideoVariant]):
+    """Variante de menor bitrate que ainda carrega áudio (o áudio costuma ser igual em toda a escada)."""
+    cands = [v for v in variants if carries_audio(v)] or list(variants)
+    if not cands:
+        return None
+    if (os.getenv("HLS_AUDIO_VARIANT") or "lowest").lower() == "highest":
+        return sorted(cands, key=lambda v: v.bitrate_bps or 0, reverse=True)[0]
+    return sorted(cands, key=lambda v: (v.bitrate_bps is None, v.bitrate_bps or 0))[0]
+
+def select_audio_source(h: Dict, fallback: str) -> str:
+    """Rendition de áudio separada se houver; senão, a variante mais leve com áudio."""
+    auds = h.get("audios") or []
+    if auds:
+        default = next((a for a in auds if a.get('default')), None)
+        return (default or auds[0]).get('uri')
+    v = select_audio_variant(h.get("variants") or [])
+    return v.url if v else fallback
+
 def absolute(base: str, path: str) -> str:
     if not path:
         return base
@@ -1,24 +1,18 @@
 import os
 import tempfile
-import requests
+from . import http_client
 import subprocess
 import m3u8
 from urllib.parse import urljoin
-from .hls import parse_hls
+from .hls import parse_hls, select_audio_source
+from .manifest_cache import fetch_text
+from .segment_fetcher import fetch_segments, stream_segments, segment_concurrency, resume_attempts
 
 UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36"
 
 def select_stream(manifest_url: str, headers: dict):
     h = parse_hls(manifest_url)
-    auds = h.get("audios") or []
-    if auds:
-        default = next((a for a in auds if a.get('default')), None)
-        return (default or auds[0]).get('uri')
-    vars = h.get("variants") or []
-    if vars:
-        best = sorted(vars, key=lambda v: v.bitrate_bps or 0, reverse=True)[0]
-        return best.url
-    return manifest_url
+    return select_audio_source(h, manifest_url)
 
 def _headers(headers: dict):
     h = {"User-Agent": UA}
@@ -26,22 +20,67 @@ def _headers(headers: dict):
         h.update(headers)
     return h
 
-def download_segments_to_ts(stream_url: str, headers: dict, out_ts: str):
-    sess = requests.Session()
-    sess.headers.update(_headers(headers))
-    m = m3u8.load(stream_url, headers=_headers(headers))
+def _session(headers: dict):
+    # fetch_segments já faz as próprias retentativas por segmento
+    return http_client.session(pool=segment_concurrency(), headers=_headers(headers), retries=False)
+
+def segment_urls(stream_url: str, headers: dict):
+    """Lista absoluta de segmentos da playlist; None se estiver cifrada."""
+    m = m3u8.loads(fetch_text(stream_url, _headers(headers)), uri=stream_url)
     txt = m.dumps()
     if "#EXT-X-KEY" in txt:
+        return None
+    urls = []
+    for s in m.segments:
+        u = s.uri
+        if not u.startswith("http"):
+            u = urljoin(stream_url, u)
+        urls.append(u)
+    return urls
+
+def download_segments_to_ts(stream_url: str, headers: dict, out_ts: str, attempts: int = None):
+    """
+    Baixa os segmentos para `out_ts` com manifesto de retomada. Uma falha no meio
+    não perde o que já foi gravado: a próxima tentativa (até HLS_SEGMENT_RESUME_ATTEMPTS)
+    continua do último segmento salvo.
+    """
+    urls = segment_urls(stream_url, headers)
+    if urls is None:
+        return False
+    attempts = resume_attempts() if attempts is None else max(1, attempts)
+    sess = _session(headers)
+    for i in range(attempts):
+        try:
+            stats = fetch_segments(sess, urls, out_ts)
+            if stats["resumed_from"]:
+                print(f"[INFO] Segmentos retomados a partir do {stats['resumed_from']}/{stats['segments']}")
+            return True
+        except Exception:
+            if i + 1 >= attempts:
+                raise
+
+def download_segments_to_wav(stream_url: str, headers: dict, wav_path: str):
+    """Envia os segmentos direto ao stdin do ffmpeg, que demultiplexa só o áudio: sem .ts intermediário."""
+    urls = segment_urls(stream_url, headers)
+    if urls is None:
         return False
-    with open(out_ts, "wb") as f:
-        for s in m.segments:
-            u = s.uri
-            if not u.startswith("http"):
-                u = urljoin(stream_url, u)
-            r = sess.get(u, stream=True, timeout=30)
-            for chunk in r.iter_content(chunk_size=1024 * 256):
-                if chunk:
-                    f.write(chunk)
+    cmd = [
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-i", "pipe:0",
+        "-vn", "-ac", "1", "-ar", "16000",
+        wav_path,
+    ]
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+    try:
+        stream_segments(_session(headers), urls, proc.stdin)
+    finally:
+        try:
+            proc.stdin.close()
+        except Exception:
+            pass
+        rc = proc.wait()
+    if rc != 0:
+        raise subprocess.CalledProcessError(rc, cmd[0])
     return True
 
 def convert_ts_to_wav(ts_path: str, wav_path: str):
@@ -54,12 +93,28 @@ def convert_ts_to_wav(ts_path: str, wav_path: str):
     subprocess.run(cmd, check=True)
     return wav_path
 
-def download_hls_to_wav(manifest_url: str, headers: dict):
+def download_hls_to_wav(manifest_url: str, headers: dict, work_dir: str = None):
+    """
+    Streaming direto ao ffmpeg (sem .ts em disco); se falhar no meio, refaz pelo
+    caminho retomável (.ts + manifesto de retomada) e converte ao final.
+    """
     stream = select_stream(manifest_url, headers)
-    ts_path = os.path.join(tempfile.gettempdir(), "hls_concat.ts")
-    ok = download_segments_to_ts(stream, headers, ts_path)
-    if not ok:
+    base = work_dir or tempfile.gettempdir()
+    wav_path = os.path.join(base, "hls_audio.wav")
+    ts_path = os.path.join(base, "hls_audio.ts")
+    if not os.path.exists(ts_path + ".resume.json"):
+        try:
+            ok = download_segments_to_wav(stream, headers, wav_path)
+            if not ok:
+                return None
+            return wav_path
+        except Exception as e:
+            print(f"[AVISO] Streaming de segmentos falhou ({e}); usando download retomável")
+    if not download_segments_to_ts(stream, headers, ts_path):
         return None
-    wav_path = os.path.join(tempfile.gettempdir(), "hls_audio.wav")
     convert_ts_to_wav(ts_path, wav_path)
+    try:
+        os.remove(ts_path)
+    except Exception:
+        pass
     return wav_path
@@ -0,0 +1,131 @@
+"""
+Cliente HTTP comum dos módulos de rede.
+
+Todas as sessões montam o mesmo pool de conexões por host (keep-alive,
+HTTP_POOL_SIZE conexões por host) com retentativas e backoff unificados
+(HTTP_RETRIES, HTTP_BACKOFF_S; 429/5xx e falhas de conexão, só em métodos
+idempotentes), então o handshake TLS com um CDN acontece uma vez por
+processo e não a cada chamada.
+
+    shared()                sessão sem cookies, para GET/HEAD/POST avulsos
+    session(proxy=..., ...) sessão com cookies próprios (login) sobre o mesmo pool
+    stats()                 requisições, erros e tempo médio por host
+
+Proxy: `proxy=` na sessão ou as variáveis HTTP_PROXY/HTTPS_PROXY de sempre.
+HTTP/2 não é suportado pelo requests/urllib3; as conexões são HTTP/1.1 persistentes.
+"""
+import os
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36"
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+_LOCK = threading.Lock()
+_ADAPTERS = {}
+_SHARED = None
+_METRICS = {}
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(0, int(os.getenv(name) or default))
+    except Exception:
+        return default
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name) or default)
+    except Exception:
+        return default
+
+def pool_size() -> int:
+    return max(1, _env_int("HTTP_POOL_SIZE", 16))
+
+def retry_policy() -> Retry:
+    return Retry(
+        total=_env_int("HTTP_RETRIES", 2),
+        backoff_factor=_env_float("HTTP_BACKOFF_S", 0.5),
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=frozenset(["GET", "HEAD", "OPTIONS"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+class _SharedAdapter(HTTPAdapter):
+    # o pool vive o processo todo: fechar uma sessão não derruba as conexões das outras
+    def close(self):
+        pass
+
+def adapter(size: int = None, retries: bool = True) -> HTTPAdapter:
+    """Adapter (pool de conexões) compartilhado por tamanho e política de retentativa."""
+    size = size or pool_size()
+    key = (size, retries)
+    with _LOCK:
+        a = _ADAPTERS.get(key)
+        if a is None:
+            a = _SharedAdapter(pool_connections=size, pool_maxsize=size, max_retries=retry_policy() if retries else 0)
+            _ADAPTERS[key] = a
+        return a
+
+def _record(r, *args, **kwargs):
+    host = urlparse(r.url).hostname or ""
+    with _LOCK:
+        m = _METRICS.setdefault(host, {"requests": 0, "errors": 0, "total_s": 0.0})
+        m["requests"] += 1
+        m["total_s"] += r.elapsed.total_seconds() if r.elapsed else 0.0
+        if r.status_code >= 400:
+            m["errors"] += 1
+    return r
+
+def session(proxy: str = None, pool: int = None, headers: dict = None, cookies: bool = True, retries: bool = True) -> requests.Session:
+    """
+    Sessão nova sobre o pool compartilhado.
+    cookies=False descarta os Set-Cookie (sessão compartilhada entre contas/sites).
+    retries=False para quem já faz as próprias retentativas (segmentos).
+    """
+    s = requests.Session()
+    a = adapter(pool, retries)
+    s.mount("http://", a)
+    s.mount("https://", a)
+    s.headers["User-Agent"] = UA
+    if headers:
+        s.headers.update(headers)
+    if proxy:
+        s.proxies = {"http": proxy, "https": proxy}
+    if not cookies:
+        s.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    s.hooks["response"].append(_record)
+    return s
+
+def shared() -> requests.Session:
+    global _SHARED
+    if _SHARED is None:
+        s = session(cookies=False)
+        with _LOCK:
+            if _SHARED is None:
+                _SHARED = s
+    return _SHARED
+
+def get(url: str, **kwargs) -> requests.Response:
+    return shared().get(url, **kwargs)
+
+def head(url: str, **kwargs) -> requests.Response:
+    return shared().head(url, **kwargs)
+
+def post(url: str, **kwargs) -> requests.Response:
+    return shared().post(url, **kwargs)
+
+def stats() -> dict:
+    with _LOCK:
+        out = {}
+        for host, m in _METRICS.items():
+            out[host] = {**m, "total_s": round(m["total_s"], 3), "avg_ms": round(m["total_s"] * 1000 / m["requests"], 1) if m["requests"] else 0.0}
+        return out
+
+def format_stats(top: int = 5) -> str:
+    st = sorted(stats().items(), key=lambda kv: kv[1]["requests"], reverse=True)[:top]
+    return "\n".join(f"[INFO]   {h:<40} req={m['requests']} erros={m['errors']} médio={m['avg_ms']:.0f}ms" for h, m in st)
@@ -0,0 +1,150 @@
+"""
+Cache em memória de manifests (HLS/DASH) dentro do processo.
+
+O mesmo master e as mesmas playlists de variante são pedidos várias vezes
+numa execução (extract, escolha da variante, metadados, downloaders). Aqui
+cada manifest é baixado uma vez por (URL canônica, hash dos cabeçalhos de
+autenticação) e reaproveitado por MANIFEST_CACHE_TTL_S segundos; depois
+disso é revalidado com If-None-Match/If-Modified-Since (304 reaproveita o
+texto). Playlists ao vivo (sem #EXT-X-ENDLIST) não são guardadas.
+
+Entradas vencidas cuja revalidação falha saem do cache, e no máximo
+MANIFEST_CACHE_MAX_ENTRIES (padrão 256) ficam guardadas; acima disso a menos
+usada recentemente é descartada. MANIFEST_CACHE=0 desliga o cache.
+"""
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+import requests
+from . import http_client
+from .resolver import canonicalize
+
+UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36"
+AUTH_HEADERS = ("cookie", "authorization")
+
+_ENTRIES = OrderedDict()
+_KEY_LOCKS = {}
+_LOCK = threading.Lock()
+_STATS = {"hits": 0, "revalidated": 0, "misses": 0}
+
+def cache_enabled() -> bool:
+    return (os.getenv("MANIFEST_CACHE") or "1").lower() in ("1", "true", "yes")
+
+def cache_ttl() -> float:
+    try:
+        return float(os.getenv("MANIFEST_CACHE_TTL_S") or "30")
+    except Exception:
+        return 30.0
+
+def max_entries() -> int:
+    try:
+        return max(1, int(os.getenv("MANIFEST_CACHE_MAX_ENTRIES") or "256"))
+    except Exception:
+        return 256
+
+def _session() -> requests.Session:
+    return http_client.shared()
+
+def cache_key(url: str, headers: dict = None) -> tuple:
+    auth = sorted((k.lower(), v) for k, v in (headers or {}).items() if k.lower() in AUTH_HEADERS and v)
+    return canonicalize(url), hashlib.sha256(repr(auth).encode("utf-8")).hexdigest()[:16]
+
+def _is_live(text: str) -> bool:
+    return "#EXTINF" in text and "#EXT-X-ENDLIST" not in text
+
+def _key_lock(key) -> threading.Lock:
+    with _LOCK:
+        lk = _KEY_LOCKS.get(key)
+        if lk is None:
+            lk = threading.Lock()
+            _KEY_LOCKS[key] = lk
+        return lk
+
+def _get(key):
+    with _LOCK:
+        entry = _ENTRIES.get(key)
+        if entry is not None:
+            _ENTRIES.move_to_end(key)
+        return entry
+
+def _put(key, entry):
+    with _LOCK:
+        _ENTRIES[key] = entry
+        _ENTRIES.move_to_end(key)
+        cap = max_entries()
+        while len(_ENTRIES) > cap:
+            old, _ = _ENTRIES.popitem(last=False)
+            lk = _KEY_LOCKS.get(old)
+            if lk is not None and not lk.locked():
+                del _KEY_LOCKS[old]
+
+def _drop(key):
+    with _LOCK:
+        _ENTRIES.pop(key, None)
+
+def _release_lock(key):
+    # sem entrada guardada o lock da chave não serve para nada; só sai se ninguém o segura
+    with _LOCK:
+        lk = _KEY_LOCKS.get(key)
+        if key not in _ENTRIES and lk is not None and not lk.locked():
+            del _KEY_LOCKS[key]
+
+def _count(name: str):
+    with _LOCK:
+        _STATS[name] += 1
+
+def fetch_text(url: str, headers: dict = None, timeout: int = 20) -> str:
+    """Texto do manifest, do cache quando possível. Erros HTTP sobem como requests.HTTPError."""
+    h = {"User-Agent": UA}
+    if headers:
+        h.update(headers)
+    if not cache_enabled():
+        r = _session().get(url, headers=h, timeout=timeout)
+        r.raise_for_status()
+        return r.text
+    key = cache_key(url, h)
+    try:
+        # requisições simultâneas ao mesmo manifest esperam um único download
+        with _key_lock(key):
+            entry = _get(key)
+            if entry and time.time() - entry["fetched_at"] <= cache_ttl():
+                _count("hits")
+                return entry["text"]
+            cond = dict(h)
+            if entry and entry.get("etag"):
+                cond["If-None-Match"] = entry["etag"]
+            if entry and entry.get("last_modified"):
+                cond["If-Modified-Since"] = entry["last_modified"]
+            try:
+                r = _session().get(url, headers=cond, timeout=timeout)
+                if entry and r.status_code == 304:
+                    entry["fetched_at"] = time.time()
+                    _count("revalidated")
+                    return entry["text"]
+                r.raise_for_status()
+            except Exception:
+                # entrada vencida que não revalida não volta a ser servida
+                _drop(key)
+                raise
+            _count("misses")
+            text = r.text
+            if _is_live(text):
+                _drop(key)
+            else:
+                _put(key, {"text": text, "etag": r.headers.get("ETag"), "last_modified": r.headers.get("Last-Modified"), "fetched_at": time.time()})
+            return text
+    finally:
+        _release_lock(key)
+
+def stats() -> dict:
+    with _LOCK:
+        return {**_STATS, "entries": len(_ENTRIES)}
+
+def clear():
+    with _LOCK:
+        _ENTRIES.clear()
+        _KEY_LOCKS.clear()
+        for k in _STATS:
+            _STATS[k] = 0
@@ -1,52 +1,111 @@
+import os
 import shutil
+import threading
 import subprocess
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
-import requests
+from . import http_client
 from .schema import VideoExtractionResult, VideoSource, VideoVariant
+from .manifest_cache import fetch_text
 
-def enrich_metadata(result: VideoExtractionResult):
+_LOCK = threading.Lock()
+_FFPROBE_SLOTS = None
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name) or default))
+    except Exception:
+        return default
+
+def metadata_mode() -> str:
+    """full: playlist + ffprobe de cada variante; lazy: uma playlist só, sem ffprobe; off: nada."""
+    m = (os.getenv("METADATA_MODE") or "full").lower()
+    return m if m in ("full", "lazy", "off") else "full"
+
+def _ffprobe_slots() -> threading.BoundedSemaphore:
+    global _FFPROBE_SLOTS
+    with _LOCK:
+        if _FFPROBE_SLOTS is None:
+            _FFPROBE_SLOTS = threading.BoundedSemaphore(_env_int("FFPROBE_CONCURRENCY", 2))
+        return _FFPROBE_SLOTS
+
+def _apply_info(v: VideoVariant, info: Optional[dict]):
+    if not info:
+        return
+    v.codec = info.get("codec") or v.codec
+    if not v.resolution and info.get("width") and info.get("height"):
+        v.resolution = f"{info.get('width')}x{info.get('height')}"
+    if not v.frame_rate and info.get("frame_rate"):
+        v.frame_rate = info.get("frame_rate")
+    if not v.bitrate_bps and info.get("bit_rate"):
+        v.bitrate_bps = info.get("bit_rate")
+    if not v.duration_seconds and info.get("duration"):
+        v.duration_seconds = info.get("duration")
+
+def _set_duration(v: VideoVariant, d: Optional[float]):
+    v.duration_seconds = d
+    if v.bitrate_bps and d:
+        v.estimated_size_bytes = int(v.bitrate_bps * d / 8)
+
+def probe_variant(v: VideoVariant):
+    """ffprobe de uma variante (stream de vídeo: codec, resolução, bitrate, duração)."""
+    if has_ffprobe():
+        _apply_info(v, ffprobe_info(v.url))
+
+def _enrich_hls(v: VideoVariant, probe: bool):
+    _set_duration(v, hls_duration(v.url))
+    if probe:
+        probe_variant(v)
+
+def _enrich_file(v: VideoVariant, probe: bool):
+    v.estimated_size_bytes = content_length(v.url)
+    if probe:
+        probe_variant(v)
+
+def _enrich_ladder(s: VideoSource):
+    # as variantes de um mesmo master têm a mesma duração: uma playlist basta
+    d = hls_duration(s.variants[0].url)
+    for v in s.variants:
+        _set_duration(v, d)
+
+def _run(task):
+    try:
+        task()
+    except Exception:
+        pass
+
+def enrich_metadata(result: VideoExtractionResult, mode: Optional[str] = None):
+    """Enriquece as variantes em paralelo (METADATA_WORKERS), conforme METADATA_MODE."""
+    mode = mode or metadata_mode()
+    if mode == "off":
+        return
+    probe = mode == "full"
+    tasks = []
     for s in result.sources:
-        if s.type == "hls":
-            for v in s.variants:
-                d = hls_duration(v.url)
-                v.duration_seconds = d
-                if v.bitrate_bps and d:
-                    v.estimated_size_bytes = int(v.bitrate_bps * d / 8)
-                if has_ffprobe():
-                    info = ffprobe_info(v.url)
-                    if info:
-                        v.codec = info.get("codec") or v.codec
-                        if not v.resolution and info.get("width") and info.get("height"):
-                            v.resolution = f"{info.get('width')}x{info.get('height')}"
-                        if not v.frame_rate and info.get("frame_rate"):
-                            v.frame_rate = info.get("frame_rate")
-                        if not v.bitrate_bps and info.get("bit_rate"):
-                            v.bitrate_bps = info.get("bit_rate")
-                        if not v.duration_seconds and info.get("duration"):
-                            v.duration_seconds = info.get("duration")
+        if s.type == "hls" and s.variants:
+            if probe:
+                tasks.extend(lambda v=v: _enrich_hls(v, True) for v in s.variants)
+            else:
+                tasks.append(lambda s=s: _enrich_ladder(s))
         elif s.type == "file":
-            for v in s.variants:
-                size = content_length(v.url)
-                v.estimated_size_bytes = size
-                if has_ffprobe():
-                    info = ffprobe_info(v.url)
-                    if info:
-                        v.codec = info.get("codec") or v.codec
-                        if not v.resolution and info.get("width") and info.get("height"):
-                            v.resolution = f"{info.get('width')}x{info.get('height')}"
-                        if not v.frame_rate and info.get("frame_rate"):
-                            v.frame_rate = info.get("frame_rate")
-                        if not v.bitrate_bps and info.get("bit_rate"):
-                            v.bitrate_bps = info.get("bit_rate")
-                        if not v.duration_seconds and info.get("duration"):
-                            v.duration_seconds = info.get("duration")
+            tasks.extend(lambda v=v: _enrich_file(v, probe) for v in s.variants)
+    workers = min(len(tasks), _env_int("METADATA_WORKERS", 6))
+    if workers <= 1:
+        for t in tasks:
+            _run(t)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        list(ex.map(_run, tasks))
 
+@lru_cache(maxsize=1)
 def has_ffprobe() -> bool:
     return shutil.which("ffprobe") is not None
 
 def hls_duration(url: str) -> Optional[float]:
     try:
-        txt = requests.get(url, timeout=20).text
+        # a mesma playlist de variante é relida pelo downloader: passa pelo cache de manifests
+        txt = fetch_text(url)
         total = 0.0
         for line in txt.splitlines():
             if line.startswith("#EXTINF:"):
@@ -61,7 +120,7 @@ def hls_duration(url: str) -> Optional[float]:
 
 def content_length(url: str) -> Optional[int]:
     try:
-        r = requests.head(url, timeout=20, allow_redirects=True)
+        r = http_client.head(url, timeout=20, allow_redirects=True)
         cl = r.headers.get("content-length")
         if cl and cl.isdigit():
             return int(cl)
@@ -80,7 +139,9 @@ def ffprobe_info(url: str) -> Optional[dict]:
             "-of", "json",
             url,
         ]
-        p = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+        # no máximo FFPROBE_CONCURRENCY processos ao mesmo tempo
+        with _ffprobe_slots():
+            p = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
         if p.returncode != 0:
             return None
         import json
@@ -1,42 +1,118 @@
-from typing import Dict, List
+import os
+import time
+from collections import deque
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+from .resolver import canonicalize
 
 VIDEO_EXTS = [".mp4", ".m3u8", ".ts", ".mov", ".webm", ".ogg", ".mpd"]
+MANIFEST_TYPES = ["application/vnd.apple.mpegurl", "application/x-mpegURL", "application/dash+xml"]
+MANIFEST_EXTS = (".m3u8", ".mpd")
+# segmentos: depois do primeiro manifest não viram candidatos (o manifest já os lista)
+SEGMENT_EXTS = (".ts", ".m4s")
 
 def is_video_url(url: str) -> bool:
     u = url.lower().split("?")[0]
     return any(u.endswith(e) for e in VIDEO_EXTS)
 
+def is_video_response(url: str, content_type: Optional[str]) -> bool:
+    t = content_type or ""
+    return is_video_url(url or "") or t.startswith("video/") or t in MANIFEST_TYPES
+
+def capture_mode() -> str:
+    """bounded: só candidatos completos + ring buffer do resto; full: guarda tudo (comportamento antigo)."""
+    m = (os.getenv("CAPTURE_MODE") or "bounded").lower()
+    return m if m in ("bounded", "full") else "bounded"
+
+def _max_candidates() -> int:
+    try:
+        return max(1, int(os.getenv("CAPTURE_MAX_CANDIDATES") or 200))
+    except Exception:
+        return 200
+
+def _ring_size() -> int:
+    try:
+        return max(1, int(os.getenv("CAPTURE_RING_SIZE") or 500))
+    except Exception:
+        return 500
+
+def _ext(url: str) -> str:
+    return os.path.splitext(urlparse(url or "").path)[1].lower()
+
+def _base_type(ct: Optional[str]) -> str:
+    return (ct or "").split(";")[0].strip().lower()
+
 class NetworkCapture:
-    def __init__(self):
-        self.requests: List[Dict] = []
-        self.responses: List[Dict] = []
+    def __init__(self, mode: Optional[str] = None, ring_size: Optional[int] = None):
+        self.mode = mode or capture_mode()
+        maxlen = None if self.mode == "full" else (ring_size or _ring_size())
+        # no modo bounded são ring buffers só com os campos leves
+        self.requests = [] if maxlen is None else deque(maxlen=maxlen)
+        self.responses = [] if maxlen is None else deque(maxlen=maxlen)
         self.flags: Dict[str, bool] = {}
+        # instante (time.time()) da primeira resposta de vídeo/manifest
+        self.video_seen_at: Optional[float] = None
+        # candidatos classificados na chegada, com cabeçalhos completos, e índices por tipo/extensão
+        self.candidates: List[Dict] = []
+        self.by_type: Dict[str, List[Dict]] = {}
+        self.by_ext: Dict[str, List[Dict]] = {}
+        self.seen = {"requests": 0, "responses": 0}
+        # URLs canônicas já indexadas, manifest visto e respostas de vídeo não indexadas
+        self._keys = set()
+        self._manifest_seen = False
+        self.max_candidates = _max_candidates()
+        self.dropped = 0
 
     def on_request(self, req):
-        self.requests.append({
-            "url": req.url,
-            "method": req.method,
-            "resource_type": req.resource_type,
-            "headers": dict(req.headers)
-        })
+        self.seen["requests"] += 1
+        entry = {"url": req.url, "method": req.method, "resource_type": req.resource_type}
+        if self.mode == "full":
+            entry["headers"] = dict(req.headers)
+        self.requests.append(entry)
 
     def on_response(self, res):
+        self.seen["responses"] += 1
         try:
-            ct = res.headers.get("content-type")
+            headers = res.headers
+            ct = headers.get("content-type")
         except Exception:
-            ct = None
-        self.responses.append({
-            "url": res.url,
-            "status": res.status,
-            "headers": dict(res.headers),
-            "type": ct
-        })
+            headers, ct = {}, None
+        video = is_video_response(res.url, ct)
+        entry = {"url": res.url, "status": res.status, "type": ct}
+        if video or self.mode == "full":
+            entry["headers"] = dict(headers)
+        self.responses.append(entry)
+        if video:
+            self._index(entry)
+            if self.video_seen_at is None:
+                self.video_seen_at = time.time()
+
+    def _index(self, entry: Dict):
+        ext = _ext(entry.get("url"))
+        key = canonicalize(entry.get("url"))
+        if key in self._keys:
+            return
+        if (ext in SEGMENT_EXTS and self._manifest_seen) or len(self.candidates) >= self.max_candidates:
+            self.dropped += 1
+            return
+        if ext in MANIFEST_EXTS or _base_type(entry.get("type")) in (t.lower() for t in MANIFEST_TYPES):
+            self._manifest_seen = True
+        self._keys.add(key)
+        self.candidates.append(entry)
+        self.by_type.setdefault(_base_type(entry.get("type")), []).append(entry)
+        self.by_ext.setdefault(ext, []).append(entry)
+
+    def find(self, content_type: Optional[str] = None, ext: Optional[str] = None) -> List[Dict]:
+        """Candidatos por content-type (sem parâmetros) e/ou extensão (ex.: ".m3u8")."""
+        out = self.candidates
+        if content_type is not None:
+            out = self.by_type.get(_base_type(content_type), [])
+        if ext is not None:
+            e = ext.lower() if ext.startswith(".") else "." + ext.lower()
+            keep = self.by_ext.get(e, [])
+            ids = {id(r) for r in keep}
+            out = keep if content_type is None else [r for r in out if id(r) in ids]
+        return list(out)
 
     def video_candidates(self) -> List[Dict]:
-        cands: List[Dict] = []
-        for r in self.responses:
-            u = r.get("url")
-            t = r.get("type") or ""
-            if is_video_url(u) or (t.startswith("video/") if t else False) or t in ["application/vnd.apple.mpegurl", "application/x-mpegURL", "application/dash+xml"]:
-                cands.append(r)
-        return cands
+        return list(self.candidates)
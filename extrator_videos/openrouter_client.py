@@ -9,6 +9,7 @@ import json
 import re
 from typing import Dict, List, Optional
 from . import prompt_loader
+from . import http_client
 
 # Importar load_prompt do gemini_client para configuração unificada
 def _load_prompt_config():
@@ -178,7 +179,7 @@ def summarize_with_openrouter(
     
     # Fazer requisição
     try:
-        response = requests.post(
+        response = http_client.post(
             url="https://openrouter.ai/api/v1/chat/completions",
             headers=headers,
             json=payload,
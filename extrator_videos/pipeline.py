@@ -0,0 +1,96 @@
+"""
+Pipeline em etapas para processar várias URLs em paralelo.
+
+Cada etapa (resolve → ingest → transcribe → summarize → write) tem seu próprio
+grupo de threads e uma fila limitada na entrada, então a resolução de rede de
+uma URL sobrepõe a transcrição (CPU) de outra sem acumular trabalho sem fim
+entre etapas. Ao final, `run_pipeline` devolve a utilização de cada etapa
+(tempo ocupado / (workers × tempo total)).
+"""
+import time
+import queue
+import threading
+
+_DONE = object()
+
+def run_pipeline(items, stages, queue_size: int = 2, on_done=None, on_thread_exit=None):
+    """
+    stages: lista de (nome, função, workers); cada função recebe e altera o job.
+    Jobs cuja etapa lança exceção saem do pipeline com job["error"] preenchido.
+    on_thread_exit: chamado por cada worker ao terminar (recursos por thread, ex.: navegador).
+    Retorna (jobs na ordem de entrada, estatísticas por etapa).
+    """
+    items = list(items)
+    queues = [queue.Queue(maxsize=max(1, queue_size)) for _ in stages]
+    stats = [{"stage": name, "workers": max(1, n), "items": 0, "errors": 0, "busy_s": 0.0} for name, _fn, n in stages]
+    lock = threading.Lock()
+    alive = [max(1, n) for _name, _fn, n in stages]
+
+    def finish(job):
+        if on_done:
+            try:
+                on_done(job)
+            except Exception:
+                pass
+
+    def worker(i):
+        name, fn, _n = stages[i]
+        st = stats[i]
+        while True:
+            job = queues[i].get()
+            if job is _DONE:
+                break
+            t0 = time.time()
+            ok = True
+            try:
+                fn(job)
+            except Exception as e:
+                ok = False
+                job["error"] = {"stage": name, "error": str(e)}
+            busy = time.time() - t0
+            with lock:
+                st["items"] += 1
+                st["busy_s"] += busy
+                if not ok:
+                    st["errors"] += 1
+            if ok and i + 1 < len(stages):
+                queues[i + 1].put(job)
+            else:
+                finish(job)
+        if on_thread_exit:
+            try:
+                on_thread_exit()
+            except Exception:
+                pass
+        # o último worker da etapa avisa a etapa seguinte
+        with lock:
+            alive[i] -= 1
+            last = alive[i] == 0
+        if last and i + 1 < len(stages):
+            for _ in range(alive[i + 1]):
+                queues[i + 1].put(_DONE)
+
+    t0 = time.time()
+    threads = []
+    for i, st in enumerate(stats):
+        for k in range(st["workers"]):
+            th = threading.Thread(target=worker, args=(i,), name=f"{st['stage']}-{k}", daemon=True)
+            th.start()
+            threads.append(th)
+    for job in items:
+        queues[0].put(job)
+    for _ in range(stats[0]["workers"]):
+        queues[0].put(_DONE)
+    for th in threads:
+        th.join()
+    wall = max(time.time() - t0, 1e-9)
+    for st in stats:
+        st["busy_s"] = round(st["busy_s"], 3)
+        st["utilization"] = round(st["busy_s"] / (st["workers"] * wall), 3)
+    return items, {"wall_s": round(wall, 3), "stages": stats}
+
+def format_utilization(report: dict) -> str:
+    lines = [f"[INFO] Pipeline concluído em {report['wall_s']:.1f}s"]
+    for st in report["stages"]:
+        lines.append(f"[INFO]   {st['stage']:<10} workers={st['workers']} itens={st['items']} erros={st['errors']} ocupado={st['busy_s']:.1f}s utilização={st['utilization'] * 100:.0f}%")
+    return "\n".join(lines)
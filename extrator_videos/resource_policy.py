@@ -0,0 +1,97 @@
+"""
+Política de recursos da página durante o resolve.
+
+Para resolver um vídeo só precisamos do documento, dos scripts do player e
+do manifest. Com RESOLVE_PROFILE=light (padrão), a página é roteada e
+imagens, fontes, rastreadores e segmentos de mídia baixados depois do
+manifest são abortados. RESOLVE_PROFILE=full não bloqueia nada.
+
+Ajustes:
+    RESOLVE_BLOCK_TYPES  tipos de recurso bloqueados (padrão: image,font)
+    RESOLVE_DENY         hosts/trechos de URL bloqueados além dos rastreadores
+    RESOLVE_ALLOW        hosts/trechos de URL sempre liberados (vence o deny)
+"""
+import os
+from urllib.parse import urlparse
+
+TRACKER_HOSTS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "facebook.net", "facebook.com/tr", "connect.facebook.net", "hotjar.com", "clarity.ms",
+    "segment.io", "segment.com", "mixpanel.com", "amplitude.com", "sentry.io", "intercom.io",
+    "analytics.tiktok.com", "bat.bing.com", "fullstory.com", "newrelic.com", "nr-data.net",
+)
+# segmentos de HLS/DASH: depois do manifest não servem para o resolve
+SEGMENT_EXTS = (".ts", ".m4s", ".m4a", ".m4v", ".aac", ".cmfv", ".cmfa", ".mp4", ".webm")
+MANIFEST_EXTS = (".m3u8", ".mpd")
+
+def resolve_profile() -> str:
+    p = (os.getenv("RESOLVE_PROFILE") or "light").lower()
+    return p if p in ("light", "full") else "light"
+
+def _env_list(name: str, default: str = "") -> list:
+    return [x.strip().lower() for x in (os.getenv(name) or default).split(",") if x.strip()]
+
+def _matches(url: str, patterns) -> bool:
+    host = (urlparse(url).hostname or "").lower()
+    low = url.lower()
+    for p in patterns:
+        if "/" in p:
+            if p in low:
+                return True
+        elif host == p or host.endswith("." + p):
+            return True
+    return False
+
+class ResourcePolicy:
+    def __init__(self, block_types=None, deny=None, allow=None):
+        self.block_types = set(block_types if block_types is not None else _env_list("RESOLVE_BLOCK_TYPES", "image,font"))
+        self.deny = list(TRACKER_HOSTS) + list(deny if deny is not None else _env_list("RESOLVE_DENY"))
+        self.allow = list(allow if allow is not None else _env_list("RESOLVE_ALLOW"))
+        self.stats = {"allowed": 0, "blocked": 0, "by_reason": {}}
+
+    def decide(self, url: str, resource_type: str, video_seen: bool = False):
+        """None para liberar, ou o motivo do bloqueio."""
+        path = urlparse(url).path.lower()
+        if self.allow and _matches(url, self.allow):
+            return None
+        if path.endswith(MANIFEST_EXTS):
+            return None
+        if _matches(url, self.deny):
+            return "tracker"
+        if resource_type in self.block_types:
+            return resource_type
+        if video_seen and (resource_type == "media" or path.endswith(SEGMENT_EXTS)):
+            return "segment"
+        return None
+
+    def _count(self, reason):
+        if reason is None:
+            self.stats["allowed"] += 1
+        else:
+            self.stats["blocked"] += 1
+            self.stats["by_reason"][reason] = self.stats["by_reason"].get(reason, 0) + 1
+
+    def install(self, page, capture=None):
+        """Roteia todas as requisições da página pela política. capture: NetworkCapture que sinaliza o manifest."""
+        def handler(route):
+            req = route.request
+            try:
+                reason = self.decide(req.url, req.resource_type, capture is not None and capture.video_seen_at is not None)
+            except Exception:
+                reason = None
+            self._count(reason)
+            try:
+                if reason is None:
+                    route.continue_()
+                else:
+                    route.abort()
+            except Exception:
+                pass
+        page.route("**/*", handler)
+        return self
+
+def install_for_resolve(page, capture=None):
+    """Instala a política do perfil atual; None quando RESOLVE_PROFILE=full."""
+    if resolve_profile() == "full":
+        return None
+    return ResourcePolicy().install(page, capture)
@@ -0,0 +1,160 @@
+"""
+Download concorrente de segmentos HLS com escrita ordenada e retomada.
+
+Os segmentos são baixados por um pool de threads limitado, reordenados em
+memória (janela de no máximo `concurrency * 2` segmentos) e gravados em
+sequência no arquivo de saída. Um manifesto de retomada (`<saida>.resume.json`)
+registra quantos segmentos já foram gravados, permitindo continuar um
+download interrompido.
+"""
+import os
+import json
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from requests.adapters import HTTPAdapter
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name) or default)
+    except Exception:
+        return default
+
+def segment_concurrency() -> int:
+    return max(1, _env_int("HLS_SEGMENT_CONCURRENCY", 8))
+
+def resume_attempts() -> int:
+    return max(1, _env_int("HLS_SEGMENT_RESUME_ATTEMPTS", 3))
+
+def _urls_hash(urls) -> str:
+    h = hashlib.sha256()
+    for u in urls:
+        h.update((u or "").encode("utf-8"))
+        h.update(b"\n")
+    return h.hexdigest()
+
+def _resume_path(out_path: str) -> str:
+    return out_path + ".resume.json"
+
+def load_resume(out_path: str, urls) -> dict:
+    try:
+        with open(_resume_path(out_path), "r", encoding="utf-8") as f:
+            st = json.load(f)
+        if st.get("urls_hash") != _urls_hash(urls):
+            return {}
+        if not os.path.exists(out_path) or os.path.getsize(out_path) < int(st.get("bytes") or 0):
+            return {}
+        return st
+    except Exception:
+        return {}
+
+def _save_resume(out_path: str, st: dict):
+    tmp = _resume_path(out_path) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(st, f)
+    os.replace(tmp, _resume_path(out_path))
+
+def mount_pool(sess, size: int):
+    adapter = HTTPAdapter(pool_connections=size, pool_maxsize=size)
+    sess.mount("http://", adapter)
+    sess.mount("https://", adapter)
+    return sess
+
+def fetch_segment(sess, url: str, headers: dict = None, retries: int = 3, backoff_ms: int = 500, timeout: int = 30, sleep_ms: int = None) -> bytes:
+    attempt = 0
+    while True:
+        try:
+            r = sess.get(url, headers=headers, timeout=timeout)
+            r.raise_for_status()
+            data = r.content
+            if sleep_ms and sleep_ms > 0:
+                time.sleep(sleep_ms / 1000.0)
+            return data
+        except Exception:
+            if attempt >= retries:
+                raise
+            time.sleep((backoff_ms / 1000.0) * (2 ** attempt))
+            attempt += 1
+
+def _fetch_ordered(sess, urls, f, state: dict, headers, concurrency: int, retries: int, backoff_ms: int, sleep_ms, checkpoint=None):
+    pending = {}
+    ready = {}
+    nxt = state["done"]
+    error = None
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        window = concurrency * 2
+        while (nxt < len(urls) and error is None) or pending:
+            # manter no máximo `window` segmentos em voo/aguardando escrita
+            while error is None and nxt < len(urls) and len(pending) + len(ready) < window:
+                fut = ex.submit(fetch_segment, sess, urls[nxt], headers, retries, backoff_ms, 30, sleep_ms)
+                pending[fut] = nxt
+                nxt += 1
+            finished, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for fut in finished:
+                idx = pending.pop(fut)
+                try:
+                    ready[idx] = fut.result()
+                except Exception as e:
+                    # parar de submeter, mas gravar o que já chegou em ordem para a retomada
+                    error = error or e
+            while state["done"] in ready:
+                data = ready.pop(state["done"])
+                f.write(data)
+                state["done"] += 1
+                state["bytes"] += len(data)
+            if checkpoint:
+                checkpoint()
+    if error is not None:
+        raise error
+
+def _options(concurrency, retries, backoff_ms):
+    concurrency = concurrency or segment_concurrency()
+    retries = _env_int("HLS_SEGMENT_RETRIES", 3) if retries is None else retries
+    backoff_ms = _env_int("HLS_SEGMENT_BACKOFF_MS", 500) if backoff_ms is None else backoff_ms
+    return concurrency, retries, backoff_ms
+
+def fetch_segments(sess, urls, out_path: str, headers: dict = None, concurrency: int = None, retries: int = None, backoff_ms: int = None, sleep_ms: int = None, resume: bool = True) -> dict:
+    """Baixa `urls` em paralelo e grava em ordem em `out_path`; retorna estatísticas."""
+    urls = list(urls)
+    concurrency, retries, backoff_ms = _options(concurrency, retries, backoff_ms)
+    st = load_resume(out_path, urls) if resume else {}
+    done = int(st.get("done") or 0)
+    written = int(st.get("bytes") or 0)
+    state = {"urls_hash": _urls_hash(urls), "segments": len(urls), "done": done, "bytes": written}
+    t0 = time.time()
+    mode = "r+b" if done and os.path.exists(out_path) else "wb"
+    with open(out_path, mode) as f:
+        f.seek(written)
+        f.truncate()
+
+        def checkpoint():
+            f.flush()
+            _save_resume(out_path, state)
+
+        _fetch_ordered(sess, urls, f, state, headers, concurrency, retries, backoff_ms, sleep_ms, checkpoint if resume else None)
+    if resume:
+        try:
+            os.remove(_resume_path(out_path))
+        except Exception:
+            pass
+    return {
+        "segments": len(urls),
+        "resumed_from": done,
+        "bytes": state["bytes"],
+        "concurrency": concurrency,
+        "elapsed_ms": int((time.time() - t0) * 1000),
+    }
+
+def stream_segments(sess, urls, stream, headers: dict = None, concurrency: int = None, retries: int = None, backoff_ms: int = None, sleep_ms: int = None) -> dict:
+    """Como `fetch_segments`, mas escreve em ordem num stream (ex.: stdin do ffmpeg), sem arquivo intermediário."""
+    urls = list(urls)
+    concurrency, retries, backoff_ms = _options(concurrency, retries, backoff_ms)
+    state = {"done": 0, "bytes": 0}
+    t0 = time.time()
+    _fetch_ordered(sess, urls, stream, state, headers, concurrency, retries, backoff_ms, sleep_ms)
+    return {
+        "segments": len(urls),
+        "bytes": state["bytes"],
+        "concurrency": concurrency,
+        "elapsed_ms": int((time.time() - t0) * 1000),
+    }
@@ -0,0 +1,97 @@
+"""
+Estado de sessão autenticada por domínio (cookies + localStorage).
+
+Depois de um login bem-sucedido, o storage state (formato do Playwright) é
+salvo em SESSION_STATE_DIR/<domínio>_<hash da conta>.json. As próximas
+execuções reaproveitam esse estado em vez de refazer o login; ele só é
+descartado quando expira (SESSION_STATE_TTL_HOURS ou todos os cookies
+vencidos) ou quando o site redireciona para a tela de login.
+
+Usado por auth.programmatic_login, BrowserSession e cli.py.
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from urllib.parse import urlparse
+
+_LOCKS = {}
+_LOCKS_LOCK = threading.Lock()
+LOGIN_MARKERS = ("/login", "/signin", "/sign-in", "/entrar")
+
+def state_dir() -> str:
+    return os.getenv("SESSION_STATE_DIR") or "session_state"
+
+def state_ttl_hours() -> float:
+    try:
+        return float(os.getenv("SESSION_STATE_TTL_HOURS") or "24")
+    except Exception:
+        return 24.0
+
+def domain_of(url: str) -> str:
+    return (urlparse(url).hostname or "").lower()
+
+def looks_logged_out(url: str) -> bool:
+    path = urlparse(url or "").path.lower()
+    return any(m in path for m in LOGIN_MARKERS)
+
+def _path(domain: str, email: str) -> str:
+    acct = hashlib.sha256((email or "").lower().encode("utf-8")).hexdigest()[:12]
+    return os.path.join(state_dir(), f"{domain}_{acct}.json")
+
+def domain_lock(domain: str):
+    """Lock por domínio: workers paralelos esperam um único login em vez de logar todos ao mesmo tempo."""
+    with _LOCKS_LOCK:
+        lk = _LOCKS.get(domain)
+        if lk is None:
+            lk = threading.Lock()
+            _LOCKS[domain] = lk
+        return lk
+
+def _cookies_alive(cookies) -> bool:
+    now = time.time()
+    for c in cookies or []:
+        exp = c.get("expires")
+        if exp is None or exp < 0 or exp > now:
+            return True
+    return False
+
+def load_state(domain: str, email: str):
+    """Storage state salvo para o domínio/conta, ou None se ausente ou expirado."""
+    p = _path(domain, email)
+    try:
+        with open(p, "r", encoding="utf-8") as f:
+            st = json.load(f)
+    except Exception:
+        return None
+    if time.time() - (st.get("saved_at") or 0) > state_ttl_hours() * 3600 or not _cookies_alive(st.get("cookies")):
+        invalidate(domain, email)
+        return None
+    return {"cookies": st.get("cookies") or [], "origins": st.get("origins") or []}
+
+def save_state(domain: str, email: str, state: dict) -> bool:
+    try:
+        os.makedirs(state_dir(), exist_ok=True)
+        p = _path(domain, email)
+        tmp = f"{p}.{os.getpid()}.tmp"
+        payload = {"domain": domain, "saved_at": time.time(), "cookies": state.get("cookies") or [], "origins": state.get("origins") or []}
+        # contém cookies de sessão: só o dono lê
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp, p)
+        return True
+    except Exception:
+        logging.error("Falha ao salvar estado de sessão")
+        return False
+
+def invalidate(domain: str, email: str):
+    try:
+        os.remove(_path(domain, email))
+    except OSError:
+        pass
+
+def cookie_header(cookies) -> str:
+    return "; ".join(f"{c['name']}={c['value']}" for c in cookies or [])
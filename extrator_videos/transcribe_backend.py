@@ -0,0 +1,195 @@
+import os
+import atexit
+import threading
+import multiprocessing
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from .whisper_engine import transcribe_audio, get_model, set_cpu_threads, model_config, model_pool_stats
+from .transcription import chunk_source, chunk_digest
+from .transcription_cache import chunk_key, load_chunk, save_chunk
+
+def transcribe_backend() -> str:
+    b = (os.getenv("TRANSCRIBE_BACKEND") or "thread").lower()
+    return b if b in ("thread", "process") else "thread"
+
+def cpu_budget(workers: int, cores: int = None):
+    """Divide os núcleos entre os workers para que workers × threads = núcleos."""
+    cores = cores or os.cpu_count() or 1
+    workers = max(1, min(int(workers or 1), cores))
+    return workers, max(1, cores // workers)
+
+def _attach(name: str):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+_POOL = None
+_POOL_KEY = None
+_POOL_LOCK = threading.Lock()
+
+def _init_worker(key, cpu_threads: int):
+    # cada processo carrega um único modelo aquecido com orçamento fixo de threads
+    set_cpu_threads(cpu_threads)
+    get_model(key)
+
+def process_pool(workers: int, threads: int) -> ProcessPoolExecutor:
+    """
+    Pool de processos do processo inteiro, reaproveitado entre chamadas (e URLs) enquanto
+    modelo, workers e threads não mudam. Usa spawn: um fork herdaria os modelos e as
+    threads do CTranslate2 do pai.
+    """
+    global _POOL, _POOL_KEY
+    key = (model_config(), workers, threads)
+    with _POOL_LOCK:
+        if _POOL is not None and _POOL_KEY == key:
+            return _POOL
+        if _POOL is not None:
+            _POOL.shutdown(wait=True)
+        _POOL = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                    initializer=_init_worker, initargs=(model_config(), threads))
+        _POOL_KEY = key
+        return _POOL
+
+def shutdown_process_pool():
+    global _POOL, _POOL_KEY
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.shutdown(wait=True)
+        _POOL = None
+        _POOL_KEY = None
+
+atexit.register(shutdown_process_pool)
+
+def read_shared_chunk(name: str, start: int, end: int):
+    shm = _attach(name)
+    try:
+        view = np.ndarray((end - start,), dtype="<i2", buffer=shm.buf, offset=start * 2)
+        audio = view.astype(np.float32) / 32768.0
+        del view
+        return audio
+    finally:
+        shm.close()
+
+def _worker_transcribe(task, language: str):
+    if task.get("shm"):
+        audio = read_shared_chunk(task["shm"], task["start"], task["end"])
+    elif task.get("pcm") is not None:
+        audio = task["pcm"]
+    else:
+        audio = task["path"]
+    return transcribe_audio(audio, language)
+
+def _share_chunks(chunks):
+    """Copia o PCM dos chunks em memória para um único bloco de memória compartilhada."""
+    total = sum(len(c["audio"]) for c in chunks if c.get("audio") is not None)
+    if total <= 0:
+        return None, [{"path": c["path"]} for c in chunks]
+    shm = shared_memory.SharedMemory(create=True, size=total * 2)
+    buf = np.ndarray((total,), dtype="<i2", buffer=shm.buf)
+    tasks = []
+    pos = 0
+    for c in chunks:
+        if c.get("audio") is None:
+            tasks.append({"path": c["path"]})
+            continue
+        n = len(c["audio"])
+        buf[pos:pos + n] = c["audio"]
+        tasks.append({"shm": shm.name, "start": pos, "end": pos + n})
+        pos += n
+    del buf
+    return shm, tasks
+
+def _inline_task(c):
+    return {"pcm": c["audio"]} if c.get("audio") is not None else {"path": c["path"]}
+
+def _shift(segs, off: float):
+    for s in segs:
+        s["start"] = (s.get("start") or 0) + off
+        s["end"] = (s.get("end") or 0) + off
+    return segs
+
+def _cache_misses(chunks, cache_dir: str, language: str, results: list, stats: dict):
+    """Repõe em `results` os chunks já transcritos e devolve só os que faltam."""
+    model = "/".join(str(x) for x in model_config()[:3])
+    stats["chunk_cache_hits"] = 0
+    for c in chunks:
+        try:
+            digest, start, end = chunk_digest(c)
+            key = chunk_key(digest, model, language, start, end)
+        except Exception:
+            yield c
+            continue
+        hit = load_chunk(cache_dir, key)
+        if hit is not None:
+            results.extend(_shift(hit.get("segments") or [], c["offset"]))
+            stats["chunk_cache_hits"] += 1
+            continue
+        c["cache_key"] = key
+        yield c
+
+def _collect(futs, results: list, errors: list, cache_dir: str = None):
+    for fut in as_completed(futs):
+        c = futs[fut]
+        try:
+            r = fut.result()
+            off = c["offset"]
+            segs = r.get("segments", [])
+            if cache_dir and c.get("cache_key"):
+                save_chunk(cache_dir, c["cache_key"], [dict(s) for s in segs])
+            results.extend(_shift(segs, off))
+        except Exception as chunk_err:
+            errors.append(f"chunk {c.get('offset', '?')}: {chunk_err}")
+
+def transcribe_chunks(chunks, language: str = "pt", max_parallel: int = 2, backend: str = None, cache_dir: str = None):
+    """Transcreve chunks em paralelo; retorna (segmentos ordenados, erros, stats).
+
+    `chunks` pode ser uma lista ou um gerador (streaming): cada chunk é
+    submetido assim que produzido, sobrepondo ingestão e transcrição.
+    Com `cache_dir`, chunks já transcritos (mesmo áudio, modelo, idioma e
+    limites) vêm do cache e só os que faltam vão para o Whisper.
+    """
+    backend = backend or transcribe_backend()
+    results = []
+    errors = []
+    cstats = {}
+    if cache_dir:
+        pending = _cache_misses(chunks, cache_dir, language, results, cstats)
+        chunks = list(pending) if isinstance(chunks, list) else pending
+    if backend == "process":
+        workers, threads = cpu_budget(max_parallel)
+        stats = {"backend": "process", "workers": workers, "cpu_threads": threads}
+        shm = None
+        if isinstance(chunks, list):
+            shm, tasks = _share_chunks(chunks)
+            pairs = zip(tasks, chunks)
+        else:
+            # chunks chegando de um pipe: enviados direto ao worker, sem bloco compartilhado
+            pairs = ((_inline_task(c), c) for c in chunks)
+        try:
+            ex = process_pool(workers, threads)
+            futs = {ex.submit(_worker_transcribe, t, language): c for t, c in pairs}
+            _collect(futs, results, errors, cache_dir)
+            stats["chunks"] = len(futs)
+            if any(not f.cancelled() and isinstance(f.exception(), BrokenProcessPool) for f in futs):
+                # um worker morreu: a próxima chamada recria o pool
+                shutdown_process_pool()
+        except BrokenProcessPool:
+            shutdown_process_pool()
+            raise
+        finally:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+    else:
+        stats = {"backend": "thread", "workers": max_parallel}
+        with ThreadPoolExecutor(max_workers=max_parallel) as ex:
+            futs = {ex.submit(transcribe_audio, chunk_source(c), language): c for c in chunks}
+            _collect(futs, results, errors, cache_dir)
+        stats["chunks"] = len(futs)
+        stats["whisper_pool"] = model_pool_stats()
+    stats.update(cstats)
+    results.sort(key=lambda x: x.get("start", 0))
+    return results, errors, stats
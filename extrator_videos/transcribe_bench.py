@@ -0,0 +1,55 @@
+"""
+Benchmark dos backends de transcrição (thread x process).
+
+Uso:
+    python -m extrator_videos.transcribe_bench audio.wav --workers 4 --backends thread,process
+
+Mede tempo de parede, fator de tempo real e throughput por núcleo
+(segundos de áudio transcritos por segundo por núcleo).
+"""
+import argparse
+import json
+import os
+import time
+import wave
+from dotenv import load_dotenv
+from .transcription import split_wav_chunks, chunks_in_memory, cleanup_chunks
+from .transcribe_backend import transcribe_chunks, cpu_budget
+
+def run(wav: str, backend: str, workers: int, chunk_seconds: int):
+    chunks = split_wav_chunks(wav, chunk_seconds, in_memory=chunks_in_memory())
+    with wave.open(wav, "rb") as w:
+        audio_s = w.getnframes() / float(w.getframerate())
+    t0 = time.time()
+    segs, errors, stats = transcribe_chunks(chunks, "pt", workers, backend=backend)
+    wall = time.time() - t0
+    cleanup_chunks(chunks)
+    cores = os.cpu_count() or 1
+    return {
+        "backend": backend,
+        "workers": stats.get("workers"),
+        "cpu_threads": stats.get("cpu_threads"),
+        "chunks": len(chunks),
+        "segments": len(segs),
+        "errors": len(errors),
+        "audio_seconds": round(audio_s, 1),
+        "wall_seconds": round(wall, 2),
+        "realtime_factor": round(audio_s / wall, 2) if wall > 0 else None,
+        "audio_seconds_per_core_second": round(audio_s / wall / cores, 3) if wall > 0 else None,
+    }
+
+def main():
+    load_dotenv()
+    p = argparse.ArgumentParser()
+    p.add_argument("wav")
+    p.add_argument("--workers", type=int, default=int(os.getenv("MAX_PARALLEL_CHUNKS") or "2"))
+    p.add_argument("--backends", default="thread,process")
+    p.add_argument("--chunk-seconds", type=int, default=int(os.getenv("CHUNK_SECONDS") or "90"))
+    args = p.parse_args()
+    out = {"cores": os.cpu_count(), "budget": dict(zip(("workers", "cpu_threads"), cpu_budget(args.workers))), "runs": []}
+    for b in [x.strip() for x in args.backends.split(",") if x.strip()]:
+        out["runs"].append(run(args.wav, b, args.workers, args.chunk_seconds))
+    print(json.dumps(out, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,8 @@ import argparse
 import os
 import json
 from dotenv import load_dotenv
-from .transcription import ffmpeg_audio_stream
-from .whisper_engine import transcribe_audio
+from .transcription import ffmpeg_audio_stream, ffmpeg_pcm_chunks, transcription_streaming
+from .transcribe_backend import transcribe_chunks
 from .postprocess import segments_to_topics
 from .gemini_client import summarize_transcription_full, parse_raw_json, naive_summary
 from .openrouter_client import summarize_with_openrouter, summarize_with_fallback
@@ -12,16 +12,17 @@ from .security import hash_input, write_processing_log
 from .logger_json import StepLogger
 from .report_renderer import generate_full_report, try_generate_pdf, build_basename
 from .verifications import validate_log_json, validate_summary_json, validate_access
-from .hls import parse_hls
+from .hls import parse_hls, select_audio_source
+from . import http_client
 from .hls_downloader import download_hls_to_wav
-from .transcription_cache import cache_key, load_transcription, save_transcription
+from .transcription_cache import cache_key, fingerprint_key, load_transcription, save_transcription, chunk_cache_enabled
 from .resolve_cache import load as resolve_load, save as resolve_save
-from .transcription import split_wav_chunks
+from .transcription import split_wav_chunks, chunks_in_memory, chunk_split_mode, cleanup_chunks, wav_fingerprint
 from urllib.parse import urlparse
 import shutil
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from .extractor import extract
+from .workspace import Workspace
 
 def main():
     load_dotenv()
@@ -40,6 +41,12 @@ def main():
     p.add_argument("--loglevel", default=os.getenv("LOG_LEVEL") or "info")
     p.add_argument("--logdir", default=os.getenv("LOG_DIR") or "logs")
     args = p.parse_args()
+    # mesmo diretório por URL; mantido se o download de segmentos falhar (a próxima execução retoma)
+    ws = Workspace(name=f"run_{hash_input(args.input)[:12]}").create()
+    run(args, ws)
+    ws.cleanup()
+
+def run(args, ws: Workspace):
     run_id = f"{hash_input(args.input)[:12]}_{args.input.split('/')[-1]}"
     log_dir = args.logdir
     level = (args.loglevel or "info").lower()
@@ -85,89 +92,92 @@ def main():
                             break
                 resolve_save(rcdir, input_url, {"manifest": manifest})
             if manifest:
-                # preferir áudio rendition; senão, melhor variante por bitrate
+                # preferir áudio rendition; senão, a variante mais leve que carrega áudio
                 try:
                     h = parse_hls(manifest)
-                    auds = h.get("audios") or []
-                    if auds:
-                        # escolher default ou primeira disponível
-                        default = next((a for a in auds if a.get('default')), None)
-                        input_url = (default or auds[0]).get('uri')
-                    else:
-                        vars = h.get("variants") or []
-                        if vars:
-                            best = sorted(vars, key=lambda v: v.bitrate_bps or 0, reverse=True)[0]
-                            input_url = best.url
-                        else:
-                            input_url = manifest
+                    input_url = select_audio_source(h, manifest)
                 except Exception:
                     input_url = manifest
             st.details_update({"manifest": input_url})
     with logger.step("Construir cabeçalhos de rede", "resolve", level) as st:
         st.details_update({"headers": headers})
     wav = None
-    if input_url.startswith("http"):
+    ckdir = os.getenv("SUMARIOS_CACHE_DIR") or "sumarios_cache"
+    ttl = int(os.getenv("CACHE_TTL_HOURS") or "72")
+    chunk_seconds = int(os.getenv("CHUNK_SECONDS") or "90")
+    max_parallel = int(os.getenv("MAX_PARALLEL_CHUNKS") or "2")
+    streamed = None
+    if input_url.startswith("http") and transcription_streaming() and not load_transcription(ckdir, cache_key(args.input, input_url, headers), ttl_hours=ttl):
+        with logger.step("Ingestão + transcrição em streaming (ffmpeg → Whisper)", "chunks", level) as st:
+            preview = int(os.getenv("FFMPEG_PREVIEW_SECONDS") or "0")
+            pcm_chunks = ffmpeg_pcm_chunks(input_url, headers=headers, chunk_seconds=chunk_seconds, preview_seconds=preview)
+            segs, stream_errors, tstats = transcribe_chunks(pcm_chunks, "pt", max_parallel, cache_dir=ckdir if chunk_cache_enabled() else None)
+            st.details_update({"streaming": True, "split": chunk_split_mode(), **tstats})
+            streamed = {"segments": segs, "errors": stream_errors}
+    if input_url.startswith("http") and streamed is None:
         with logger.step("Ingestão de áudio (ffmpeg)", "ingest", level) as st:
             preview = int(os.getenv("FFMPEG_PREVIEW_SECONDS") or "0")
             try:
-                wav = ffmpeg_audio_stream(input_url, headers=headers, preview_seconds=preview)
+                wav = ffmpeg_audio_stream(input_url, headers=headers, out_path=ws.file("input.wav"), preview_seconds=preview)
                 st.details_update({"wav_path": wav})
             except Exception:
                 # tentar master como fallback
                 try:
-                    wav = ffmpeg_audio_stream(manifest, headers=headers, preview_seconds=preview)
+                    wav = ffmpeg_audio_stream(manifest, headers=headers, out_path=ws.file("master.wav"), preview_seconds=preview)
                     st.details_update({"wav_path": wav, "fallback": "master"})
                 except Exception:
                     # baixar segmentos via navegador-sessão (requests) e montar TS -> WAV
                     try:
-                        wav = download_hls_to_wav(manifest, headers=headers)
+                        wav = download_hls_to_wav(manifest, headers=headers, work_dir=ws.path)
                         if wav:
                             st.details_update({"wav_path": wav, "fallback": "segments"})
                         else:
                             st.details_update({"wav_error": True})
                     except Exception:
                         st.details_update({"wav_error": True})
-    else:
+                        # download incompleto: mantém o workspace para a próxima execução retomar
+                        ws.keep = True
+            st.details_update({"workspace": ws.path, "workspace_bytes": ws.size_bytes()})
+    elif not input_url.startswith("http"):
         wav = args.input
-    ckdir = os.getenv("SUMARIOS_CACHE_DIR") or "sumarios_cache"
-    ttl = int(os.getenv("CACHE_TTL_HOURS") or "72")
     with logger.step("Cache de transcrição", "cache", level) as st:
         key = cache_key(args.input, input_url, headers)
         cached_tr = load_transcription(ckdir, key, ttl_hours=ttl)
-        st.details_update({"cache_hit": bool(cached_tr)})
+        # segunda camada: mesmo áudio por outra URL (token rotacionado, outro Referer, manifest da extensão)
+        fp = wav_fingerprint(wav) if wav and not cached_tr else None
+        akey = fingerprint_key(fp) if fp else None
+        if akey:
+            cached_tr = load_transcription(ckdir, akey, ttl_hours=ttl)
+            if cached_tr:
+                save_transcription(ckdir, key, cached_tr)
+        st.details_update({"cache_hit": bool(cached_tr), "cache_layer": ("audio" if akey else "url") if cached_tr else None, "audio_fingerprint": fp})
     if cached_tr:
         tr = cached_tr
     else:
-        if wav:
-            chunk_seconds = int(os.getenv("CHUNK_SECONDS") or "90")
-            max_parallel = int(os.getenv("MAX_PARALLEL_CHUNKS") or "2")
-            chunks = split_wav_chunks(wav, chunk_seconds)
+        if streamed is not None:
+            tr = {"language": "pt", "duration": None, "segments": streamed["segments"]}
+            # com chunks faltando, não grava a transcrição final: a próxima execução refaz só os que falharam
+            if not streamed["errors"]:
+                save_transcription(ckdir, key, tr)
+        elif wav:
+            chunks = split_wav_chunks(wav, chunk_seconds, in_memory=chunks_in_memory(), work_dir=ws.path)
             results = []
+            errors = []
             with logger.step("Transcrever áudio em chunks", "chunks", level) as st:
-                st.details_update({"chunks": len(chunks), "parallel": max_parallel})
-                with ThreadPoolExecutor(max_workers=max_parallel) as ex:
-                    futs = {ex.submit(transcribe_audio, c["path"], "pt"): c for c in chunks}
-                    for fut in as_completed(futs):
-                        try:
-                            r = fut.result()
-                            c = futs[fut]
-                            off = c["offset"]
-                            segs = r.get("segments", [])
-                            for s in segs:
-                                s["start"] = (s.get("start") or 0) + off
-                                s["end"] = (s.get("end") or 0) + off
-                            results.extend(segs)
-                        except Exception:
-                            pass
-            results.sort(key=lambda x: x.get("start", 0))
+                st.details_update({"chunks": len(chunks), "parallel": max_parallel, "in_memory": any(c.get("audio") is not None for c in chunks), "split": chunk_split_mode()})
+                results, errors, tstats = transcribe_chunks(chunks, "pt", max_parallel, cache_dir=ckdir if chunk_cache_enabled() else None)
+                st.details_update(tstats)
+            cleanup_chunks(chunks)
             tr = {"language": "pt", "duration": None, "segments": results}
-            save_transcription(ckdir, key, tr)
+            if not errors:
+                save_transcription(ckdir, key, tr)
+                if akey:
+                    save_transcription(ckdir, akey, tr)
         else:
             # fallback: obter texto da página e criar pseudo-segmentos
             try:
-                import requests
                 from bs4 import BeautifulSoup
-                resp = requests.get(original_url, headers=headers, timeout=20)
+                resp = http_client.get(original_url, headers=headers, timeout=20)
                 soup = BeautifulSoup(resp.text, "html.parser")
                 txt = " ".join([t.strip() for t in soup.stripped_strings])
                 seg = {"start": 0.0, "end": 60.0, "text": txt[:4000]}
@@ -276,9 +286,8 @@ def main():
             # título e nomeação
             title = None
             try:
-                import requests
                 from bs4 import BeautifulSoup
-                r = requests.get(original_url, headers=headers, timeout=20)
+                r = http_client.get(original_url, headers=headers, timeout=20)
                 soup = BeautifulSoup(r.text, "html.parser")
                 tnode = soup.find("title")
                 title = (tnode.text if tnode else "video").strip()
@@ -3,9 +3,14 @@ import tempfile
 import subprocess
 from urllib.parse import urlparse, parse_qs
 import wave
+import struct
+import hashlib
+import numpy as np
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
-def ffmpeg_audio_stream(input_url: str, headers: dict = None, out_path: str = None, preview_seconds: int = None):
+SAMPLE_RATE = 16000
+
+def ffmpeg_input_args(input_url: str, headers: dict = None, preview_seconds: int = None):
     h = headers or {}
     hs = []
     ua_val = None
@@ -30,7 +35,6 @@ def ffmpeg_audio_stream(input_url: str, headers: dict = None, out_path: str = No
             ua_val = sv
         hs.append(f"{k}: {sv}")
     hdr = None if is_cf_manifest else ("\r\n".join(hs) if hs else None)
-    tmp = out_path or os.path.join(tempfile.gettempdir(), "transcribe_input.wav")
     cmd = ["ffmpeg", "-y", "-loglevel", "error"]
     if hdr:
         cmd += ["-headers", hdr]
@@ -41,14 +45,231 @@ def ffmpeg_audio_stream(input_url: str, headers: dict = None, out_path: str = No
     except Exception:
         rw_ms = 15000
     cmd += ["-rw_timeout", str(rw_ms * 1000)]
-    cmd += ["-i", src, "-vn", "-map", "0:a:0?", "-ac", "1", "-ar", "16000"]
+    cmd += ["-i", src, "-vn", "-map", "0:a:0?", "-ac", "1", "-ar", str(SAMPLE_RATE)]
     if preview_seconds and preview_seconds > 0:
         cmd += ["-t", str(preview_seconds)]
-    cmd += [tmp]
+    return cmd
+
+def ffmpeg_audio_stream(input_url: str, headers: dict = None, out_path: str = None, preview_seconds: int = None):
+    tmp = out_path or os.path.join(tempfile.gettempdir(), "transcribe_input.wav")
+    cmd = ffmpeg_input_args(input_url, headers, preview_seconds) + [tmp]
     subprocess.run(cmd, check=True)
     return tmp
 
-def split_wav_chunks(path: str, chunk_seconds: int):
+def transcription_streaming() -> bool:
+    return (os.getenv("TRANSCRIBE_STREAMING") or "0").lower() in ("1", "true", "yes")
+
+def iter_pcm_chunks(stream, chunk_seconds: int, split_mode: str = None, tolerance_seconds: float = None, frame_ms: int = 30):
+    """Monta chunks a partir de PCM s16le lido de um stream, emitindo cada um assim que fica completo."""
+    mode = split_mode or chunk_split_mode()
+    tol_s = chunk_silence_tolerance() if tolerance_seconds is None else tolerance_seconds
+    size = SAMPLE_RATE * chunk_seconds
+    tol = min(int(SAMPLE_RATE * tol_s), size // 2) if mode == "silence" else 0
+    frame_samples = max(1, int(SAMPLE_RATE * frame_ms / 1000))
+    need = (size + tol) * 2
+    buf = bytearray()
+    consumed = 0
+    eof = False
+    while not eof:
+        data = stream.read(SAMPLE_RATE * 2)
+        if not data:
+            eof = True
+        else:
+            buf += data
+        while len(buf) >= need or (eof and len(buf) >= 2):
+            n = len(buf) // 2
+            cut = n
+            if len(buf) >= need:
+                cut = size
+                if tol:
+                    pcm = np.frombuffer(bytes(buf[:need]), dtype="<i2")
+                    lo = size - tol
+                    window = frame_energy(pcm[lo:], frame_samples)
+                    cut = lo + find_silence_cut(window, tol, 0, 2 * tol, frame_samples)
+            audio = np.frombuffer(bytes(buf[:cut * 2]), dtype="<i2")
+            del buf[:cut * 2]
+            yield {"audio": audio, "path": None, "offset": consumed / SAMPLE_RATE}
+            consumed += cut
+
+def ffmpeg_pcm_chunks(input_url: str, headers: dict = None, chunk_seconds: int = 90, preview_seconds: int = None):
+    """Decodifica com ffmpeg para um pipe e entrega chunks enquanto o download ainda está em andamento."""
+    cmd = ffmpeg_input_args(input_url, headers, preview_seconds) + ["-f", "s16le", "pipe:1"]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        for c in iter_pcm_chunks(proc.stdout, chunk_seconds):
+            yield c
+        err = proc.stderr.read()
+        rc = proc.wait()
+        if rc != 0:
+            raise subprocess.CalledProcessError(rc, cmd[0], stderr=err)
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+
+def chunks_in_memory() -> bool:
+    return (os.getenv("CHUNK_IN_MEMORY") or "1").lower() in ("1", "true", "yes")
+
+def _wav_data_region(path: str):
+    # localizar o chunk "data" do RIFF para mapear o PCM sem copiar
+    with open(path, "rb") as f:
+        riff = f.read(12)
+        if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+            return None
+        pos = 12
+        while True:
+            hdr = f.read(8)
+            if len(hdr) < 8:
+                return None
+            cid, size = hdr[:4], struct.unpack("<I", hdr[4:])[0]
+            pos += 8
+            if cid == b"data":
+                return pos, size
+            pos += size + (size & 1)
+            f.seek(pos)
+
+def load_pcm(path: str):
+    """Mapeia o PCM int16 mono do WAV em memória (np.memmap, sem cópia)."""
+    with wave.open(path, 'rb') as w:
+        fr = w.getframerate()
+        ch = w.getnchannels()
+        sw = w.getsampwidth()
+        total_frames = w.getnframes()
+    if ch != 1 or sw != 2 or fr != SAMPLE_RATE:
+        return None
+    region = _wav_data_region(path)
+    if not region:
+        return None
+    offset, size = region
+    n = min(total_frames, size // 2)
+    if n <= 0:
+        return np.zeros(0, dtype="<i2")
+    return np.memmap(path, dtype="<i2", mode="r", offset=offset, shape=(n,))
+
+def audio_fingerprint(pcm, windows: int = 16, window_seconds: float = 1.0) -> str:
+    """Hash do PCM decodificado (duração + janelas espaçadas): o mesmo áudio gera o mesmo valor, qualquer que seja a URL."""
+    n = len(pcm)
+    w = max(1, int(SAMPLE_RATE * window_seconds))
+    h = hashlib.sha256()
+    h.update(f"pcm16k:{n}".encode("ascii"))
+    if n <= w * windows:
+        h.update(np.ascontiguousarray(pcm).tobytes())
+    else:
+        for i in range(windows):
+            start = (n - w) * i // (windows - 1)
+            h.update(np.ascontiguousarray(pcm[start:start + w]).tobytes())
+    return h.hexdigest()
+
+def wav_fingerprint(path: str):
+    try:
+        pcm = load_pcm(path)
+        if pcm is None:
+            return None
+        return audio_fingerprint(pcm)
+    except Exception:
+        return None
+
+def chunk_source(c: dict):
+    return c["audio"] if c.get("audio") is not None else c["path"]
+
+def chunk_pcm(c: dict):
+    if c.get("audio") is not None:
+        return c["audio"]
+    with wave.open(c["path"], 'rb') as w:
+        return np.frombuffer(w.readframes(w.getnframes()), dtype="<i2")
+
+def chunk_digest(c: dict):
+    """(sha256 do PCM do chunk, amostra inicial, amostra final) — identifica o chunk pelo conteúdo."""
+    pcm = chunk_pcm(c)
+    start = int(round((c.get("offset") or 0) * SAMPLE_RATE))
+    return hashlib.sha256(np.ascontiguousarray(pcm).tobytes()).hexdigest(), start, start + len(pcm)
+
+def cleanup_chunks(chunks):
+    for c in chunks:
+        p = c.get("path")
+        if p and os.path.exists(p):
+            try:
+                os.remove(p)
+            except Exception:
+                pass
+
+def chunk_split_mode() -> str:
+    return (os.getenv("CHUNK_SPLIT") or "silence").lower()
+
+def chunk_silence_tolerance() -> float:
+    try:
+        return float(os.getenv("CHUNK_SILENCE_TOLERANCE") or "5")
+    except Exception:
+        return 5.0
+
+def frame_energy(pcm, frame_samples: int):
+    n = len(pcm) // frame_samples
+    if n <= 0:
+        return np.zeros(0, dtype=np.float32)
+    x = np.asarray(pcm[:n * frame_samples], dtype=np.float32).reshape(n, frame_samples)
+    return np.einsum("ij,ij->i", x, x) / frame_samples
+
+def fixed_bounds(total: int, frames_per_chunk: int):
+    return [(s, min(s + frames_per_chunk, total)) for s in range(0, total, frames_per_chunk)]
+
+def find_silence_cut(energy, target: int, lo: int, hi: int, frame_samples: int) -> int:
+    """Retorna a amostra de corte no frame mais silencioso de [lo, hi), o mais próximo possível do alvo."""
+    f_lo = max(0, lo // frame_samples)
+    f_hi = min(len(energy), max(f_lo + 1, hi // frame_samples))
+    if f_hi <= f_lo:
+        return target
+    window = energy[f_lo:f_hi]
+    dist = np.abs(np.arange(f_lo, f_hi) * frame_samples + frame_samples // 2 - target)
+    best = f_lo + int(np.lexsort((dist, window))[0])
+    return best * frame_samples + frame_samples // 2
+
+def plan_chunks(pcm, chunk_seconds: int, tolerance_seconds: float = 5.0, frame_ms: int = 30, rate: int = SAMPLE_RATE):
+    """Planeja limites de chunks cortando no silêncio mais próximo de cada fronteira."""
+    total = len(pcm)
+    if total == 0:
+        return []
+    frames_per_chunk = max(1, int(rate * chunk_seconds))
+    n = -(-total // frames_per_chunk)
+    if n <= 1:
+        return [(0, total)]
+    # chunks balanceados: n partes iguais em vez de um resto curto no final
+    size = total / n
+    frame_samples = max(1, int(rate * frame_ms / 1000))
+    tol = int(rate * max(0.0, tolerance_seconds))
+    energy = frame_energy(pcm, frame_samples)
+    bounds = [0]
+    for k in range(1, n):
+        target = int(k * size)
+        lo = max(bounds[-1] + frame_samples, target - tol)
+        hi = min(total - frame_samples, target + tol)
+        cut = find_silence_cut(energy, target, lo, hi, frame_samples) if hi > lo else target
+        bounds.append(min(max(cut, bounds[-1] + 1), total - 1))
+    bounds.append(total)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def split_wav_chunks(path: str, chunk_seconds: int, in_memory: bool = False, split_mode: str = None, work_dir: str = None):
+    work_dir = work_dir or tempfile.gettempdir()
+    pcm = load_pcm(path)
+    if pcm is not None:
+        mode = split_mode or chunk_split_mode()
+        if mode == "silence":
+            bounds = plan_chunks(pcm, chunk_seconds, chunk_silence_tolerance())
+        else:
+            bounds = fixed_bounds(len(pcm), SAMPLE_RATE * chunk_seconds)
+        out = []
+        for idx, (start, end) in enumerate(bounds):
+            if in_memory:
+                # fatias de memmap são views: nenhum byte é copiado até o Whisper ler
+                out.append({"audio": pcm[start:end], "path": None, "offset": start / SAMPLE_RATE})
+                continue
+            cpath = os.path.join(work_dir, f"chunk_{os.path.basename(path)}_{idx}.wav")
+            with wave.open(cpath, 'wb') as cw:
+                cw.setnchannels(1)
+                cw.setsampwidth(2)
+                cw.setframerate(SAMPLE_RATE)
+                cw.writeframes(pcm[start:end].tobytes())
+            out.append({"path": cpath, "offset": start / SAMPLE_RATE})
+        return out
     out = []
     with wave.open(path, 'rb') as w:
         fr = w.getframerate()
@@ -62,7 +283,7 @@ def split_wav_chunks(path: str, chunk_seconds: int):
             end = min(start + frames_per_chunk, total_frames)
             w.setpos(start)
             data = w.readframes(end - start)
-            cpath = os.path.join(tempfile.gettempdir(), f"chunk_{os.path.basename(path)}_{idx}.wav")
+            cpath = os.path.join(work_dir, f"chunk_{os.path.basename(path)}_{idx}.wav")
             with wave.open(cpath, 'wb') as cw:
                 cw.setnchannels(ch)
                 cw.setsampwidth(sw)
@@ -1,7 +1,17 @@
 import os
+import sys
 import json
+import zlib
+import struct
 import hashlib
-import time
+import argparse
+import numpy as np
+from .cache_store import get_store
+
+# Formato compacto: MAGIC + zlib(cabeçalho JSON | início em ms (delta) | duração em ms | tamanho dos textos | textos UTF-8).
+# Tempos são guardados em milissegundos; entradas antigas em JSON continuam legíveis.
+MAGIC = b"TRZ1"
+SEGMENT_FIELDS = {"start", "end", "text"}
 
 def cache_key(input_url: str, manifest_url: str, headers: dict) -> str:
     h = hashlib.sha256()
@@ -15,29 +25,162 @@ def cache_key(input_url: str, manifest_url: str, headers: dict) -> str:
         h.update((k + ":" + str(v)).encode("utf-8"))
     return h.hexdigest()
 
-def _file_path(dir_path: str, key: str) -> str:
-    return os.path.join(dir_path, key + ".json")
+def fingerprint_key(fingerprint: str) -> str:
+    # chave pelo conteúdo do áudio: independe de token na URL, Referer ou origem do manifest
+    return hashlib.sha256(("audio:" + (fingerprint or "")).encode("utf-8")).hexdigest()
 
-def load_transcription(dir_path: str, key: str, ttl_hours: int = None):
+def _ms(v) -> int:
+    return int(round((v or 0) * 1000))
+
+def encode_transcription(data: dict) -> bytes:
+    segs = data.get("segments") or []
+    meta = {k: v for k, v in data.items() if k != "segments"}
+    if not all(isinstance(s, dict) and set(s) <= SEGMENT_FIELDS for s in segs):
+        # segmentos com campos extras: guarda o JSON comprimido, sem colunas
+        meta["_json_segments"] = segs
+        segs = []
+    starts = np.array([_ms(s.get("start")) for s in segs], dtype=np.int64)
+    ends = np.array([_ms(s.get("end")) for s in segs], dtype=np.int64)
+    texts = [(s.get("text") or "").encode("utf-8") for s in segs]
+    meta["n"] = len(segs)
+    header = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+    body = b"".join([
+        struct.pack("<I", len(header)), header,
+        np.diff(starts, prepend=0).astype("<i4").tobytes(),
+        (ends - starts).astype("<i4").tobytes(),
+        np.array([len(t) for t in texts], dtype="<u4").tobytes(),
+    ] + texts)
+    return MAGIC + zlib.compress(body, 6)
+
+class CompactTranscription:
+    """Transcrição decodificada sob demanda: colunas como views numpy, texto fatiado por segmento."""
+
+    def __init__(self, raw: bytes):
+        body = zlib.decompress(raw[len(MAGIC):])
+        hlen = struct.unpack_from("<I", body)[0]
+        self.meta = json.loads(body[4:4 + hlen].decode("utf-8"))
+        n = self.meta.pop("n")
+        self._extra = self.meta.pop("_json_segments", None)
+        pos = 4 + hlen
+        self._dstart = np.frombuffer(body, dtype="<i4", count=n, offset=pos)
+        self._dur = np.frombuffer(body, dtype="<i4", count=n, offset=pos + 4 * n)
+        lens = np.frombuffer(body, dtype="<u4", count=n, offset=pos + 8 * n)
+        self._offsets = np.concatenate([[0], np.cumsum(lens, dtype=np.int64)]) + pos + 12 * n
+        self._body = body
+        self._starts = None
+
+    def __len__(self):
+        return len(self._extra) if self._extra is not None else len(self._dstart)
+
+    @property
+    def starts(self):
+        if self._starts is None:
+            self._starts = np.cumsum(self._dstart, dtype=np.int64)
+        return self._starts / 1000.0
+
+    @property
+    def ends(self):
+        return (np.cumsum(self._dstart, dtype=np.int64) + self._dur) / 1000.0
+
+    def text(self, i: int) -> str:
+        return self._body[self._offsets[i]:self._offsets[i + 1]].decode("utf-8")
+
+    def segment(self, i: int) -> dict:
+        if self._extra is not None:
+            return self._extra[i]
+        st = self.starts
+        return {"start": float(st[i]), "end": float(st[i] + self._dur[i] / 1000.0), "text": self.text(i)}
+
+    def segments(self) -> list:
+        if self._extra is not None:
+            return list(self._extra)
+        st = self.starts.tolist()
+        ends = self.ends.tolist()
+        return [{"start": a, "end": b, "text": self.text(i)} for i, (a, b) in enumerate(zip(st, ends))]
+
+    def to_dict(self) -> dict:
+        return {**self.meta, "segments": self.segments()}
+
+def decode_transcription(raw: bytes) -> dict:
+    if raw[:len(MAGIC)] == MAGIC:
+        return CompactTranscription(raw).to_dict()
+    return json.loads(raw)
+
+def _load(dir_path: str, ns: str, key: str, ttl_hours=None):
     try:
-        p = _file_path(dir_path, key)
-        if not os.path.exists(p):
-            return None
-        if ttl_hours is not None:
-            age = time.time() - os.path.getmtime(p)
-            if age > ttl_hours * 3600:
-                return None
-        with open(p, "r", encoding="utf-8") as f:
-            return json.load(f)
+        raw = get_store(dir_path).get(ns, key, ttl_hours)
+        return decode_transcription(bytes(raw)) if raw is not None else None
     except Exception:
         return None
 
-def save_transcription(dir_path: str, key: str, data: dict):
+def _save(dir_path: str, ns: str, key: str, data: dict):
     try:
-        os.makedirs(dir_path, exist_ok=True)
-        p = _file_path(dir_path, key)
-        with open(p, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False)
+        get_store(dir_path).put(ns, key, encode_transcription(data))
         return True
     except Exception:
         return False
+
+def load_transcription(dir_path: str, key: str, ttl_hours: int = None):
+    return _load(dir_path, "transcription", key, ttl_hours)
+
+def load_transcription_compact(dir_path: str, key: str, ttl_hours: int = None):
+    """Como load_transcription, mas sem materializar os segmentos (útil para buscas e estatísticas)."""
+    try:
+        raw = get_store(dir_path).get("transcription", key, ttl_hours)
+        if raw is None:
+            return None
+        raw = bytes(raw)
+        if raw[:len(MAGIC)] == MAGIC:
+            return CompactTranscription(raw)
+        return CompactTranscription(encode_transcription(json.loads(raw)))
+    except Exception:
+        return None
+
+def save_transcription(dir_path: str, key: str, data: dict):
+    return _save(dir_path, "transcription", key, data)
+
+def chunk_cache_enabled() -> bool:
+    return (os.getenv("CHUNK_CACHE") or "1").lower() in ("1", "true", "yes")
+
+def chunk_key(audio_hash: str, model: str, language: str, start: int, end: int) -> str:
+    return hashlib.sha256(f"chunk:{audio_hash}|{model}|{language}|{start}|{end}".encode("utf-8")).hexdigest()
+
+def load_chunk(dir_path: str, key: str):
+    # segmentos relativos ao início do chunk; conteúdo não expira (a chave já fixa áudio e modelo)
+    return _load(dir_path, "chunk", key)
+
+def save_chunk(dir_path: str, key: str, segments: list):
+    return _save(dir_path, "chunk", key, {"segments": segments})
+
+def migrate(dir_path: str) -> dict:
+    """Regrava no formato compacto as entradas em JSON (transcrições e chunks), mantendo a data de criação."""
+    store = get_store(dir_path)
+    out = {"migrated": 0, "skipped": 0, "failed": 0, "bytes_before": 0, "bytes_after": 0}
+    for ns in ("transcription", "chunk"):
+        for key, raw, created in list(store.scan(ns)):
+            if raw[:len(MAGIC)] == MAGIC:
+                out["skipped"] += 1
+                continue
+            try:
+                packed = encode_transcription(json.loads(raw))
+                store.put(ns, key, packed, created=created)
+            except Exception:
+                out["failed"] += 1
+                continue
+            out["migrated"] += 1
+            out["bytes_before"] += len(raw)
+            out["bytes_after"] += len(packed)
+    return out
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Migra o cache de transcrições para o formato compacto")
+    p.add_argument("command", choices=["migrate"])
+    p.add_argument("--dir", default=os.getenv("SUMARIOS_CACHE_DIR") or "sumarios_cache")
+    args = p.parse_args(argv)
+    if not os.path.isdir(args.dir):
+        print(f"[ERRO] Diretório não encontrado: {args.dir}")
+        sys.exit(1)
+    print(json.dumps(migrate(args.dir), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,86 @@
 from faster_whisper import WhisperModel
 import os
+import time
+import threading
+import numpy as np
 
-def transcribe_audio(path: str, language: str = "pt"):
+# Pool de modelos por processo: carregar o WhisperModel custa mais do que
+# transcrever um chunk curto, então cada configuração é carregada uma vez só.
+# A chave inclui cpu_threads: um modelo carregado com outro orçamento não é reaproveitado.
+_MODELS = {}
+_STATS = {}
+_POOL_LOCK = threading.Lock()
+_KEY_LOCKS = {}
+# orçamento de threads do processo (definido pelo worker do backend "process"; 0 = padrão do CTranslate2)
+_CPU_THREADS = 0
+
+def model_config():
     m = os.getenv("WHISPER_MODEL") or "small"
     dev = os.getenv("WHISPER_DEVICE") or "cpu"
     ct = os.getenv("WHISPER_COMPUTE_TYPE") or "int8"
     dr = os.getenv("WHISPER_DOWNLOAD_ROOT") or None
-    try:
-        model = WhisperModel(m, device=dev, compute_type=ct, download_root=dr)
-    except Exception:
-        model = WhisperModel(m, device="cpu", compute_type="int8")
-    segments, info = model.transcribe(path, language=language, vad_filter=True, word_timestamps=True)
+    return (m, dev, ct, dr)
+
+def set_cpu_threads(n: int):
+    global _CPU_THREADS
+    _CPU_THREADS = max(0, int(n or 0))
+
+def _key_lock(key):
+    with _POOL_LOCK:
+        lk = _KEY_LOCKS.get(key)
+        if lk is None:
+            lk = threading.Lock()
+            _KEY_LOCKS[key] = lk
+        return lk
+
+def get_model(key=None, cpu_threads: int = None):
+    cpu_threads = _CPU_THREADS if cpu_threads is None else cpu_threads
+    key = tuple(key or model_config()) + (cpu_threads,)
+    model = _MODELS.get(key)
+    if model is not None:
+        with _POOL_LOCK:
+            _STATS[key]["reuses"] += 1
+        return model
+    # lock por chave: threads pedindo o mesmo modelo esperam um único carregamento
+    with _key_lock(key):
+        model = _MODELS.get(key)
+        if model is not None:
+            with _POOL_LOCK:
+                _STATS[key]["reuses"] += 1
+            return model
+        m, dev, ct, dr, _threads = key
+        t0 = time.time()
+        fallback = False
+        try:
+            model = WhisperModel(m, device=dev, compute_type=ct, download_root=dr, cpu_threads=cpu_threads)
+        except Exception:
+            model = WhisperModel(m, device="cpu", compute_type="int8", cpu_threads=cpu_threads)
+            fallback = True
+        load_ms = int((time.time() - t0) * 1000)
+        with _POOL_LOCK:
+            _MODELS[key] = model
+            _STATS[key] = {"load_ms": load_ms, "loads": 1, "reuses": 0, "cpu_fallback": fallback, "cpu_threads": cpu_threads}
+        return model
+
+def model_pool_stats():
+    with _POOL_LOCK:
+        out = []
+        for (m, dev, ct, dr, _threads), st in _STATS.items():
+            out.append({"model": m, "device": dev, "compute_type": ct, "download_root": dr, **st})
+        return out
+
+def clear_model_pool():
+    with _POOL_LOCK:
+        _MODELS.clear()
+        _STATS.clear()
+        _KEY_LOCKS.clear()
+
+def transcribe_audio(audio, language: str = "pt"):
+    # aceita caminho de arquivo ou array PCM 16 kHz (int16 é normalizado para float32)
+    if isinstance(audio, np.ndarray) and audio.dtype != np.float32:
+        audio = audio.astype(np.float32) / 32768.0
+    model = get_model()
+    segments, info = model.transcribe(audio, language=language, vad_filter=True, word_timestamps=True)
     out = []
     for s in segments:
         out.append({
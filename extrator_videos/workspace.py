@@ -0,0 +1,81 @@
+"""
+Workspace temporário por execução.
+
+Cada execução do pipeline recebe um diretório próprio (em vez de nomes fixos
+no tempdir compartilhado), o que permite rodar várias URLs em paralelo no
+mesmo host. O diretório é removido ao sair do contexto.
+
+Com `name`, o diretório é fixo (`<base>/<name>`) e reaproveitado: uma nova
+execução da mesma URL encontra o que a anterior deixou (ex.: o manifesto de
+retomada do download de segmentos).
+
+Variáveis de ambiente:
+    WORKSPACE_DIR    diretório base (padrão: tempdir do sistema)
+    WORKSPACE_TMPFS  1 = usar /dev/shm quando disponível (áudio em RAM)
+    WORKSPACE_KEEP   1 = não remover ao final (depuração)
+"""
+import os
+import shutil
+import tempfile
+
+def _flag(name: str) -> bool:
+    return (os.getenv(name) or "").lower() in ("1", "true", "yes")
+
+def workspace_base() -> str:
+    base = os.getenv("WORKSPACE_DIR") or None
+    if not base and _flag("WORKSPACE_TMPFS") and os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        base = "/dev/shm"
+    if base:
+        os.makedirs(base, exist_ok=True)
+    return base or tempfile.gettempdir()
+
+class Workspace:
+    def __init__(self, prefix: str = "extrator_", base_dir: str = None, keep: bool = None, name: str = None):
+        self.prefix = prefix
+        self.name = name
+        self.base_dir = base_dir
+        self.keep = _flag("WORKSPACE_KEEP") if keep is None else keep
+        self.path = None
+        self.peak_bytes = 0
+
+    def create(self):
+        if not self.path:
+            base = self.base_dir or workspace_base()
+            if self.name:
+                self.path = os.path.join(base, self.name)
+                os.makedirs(self.path, exist_ok=True)
+            else:
+                self.path = tempfile.mkdtemp(prefix=self.prefix, dir=base)
+        return self
+
+    def file(self, name: str) -> str:
+        self.create()
+        return os.path.join(self.path, name)
+
+    def size_bytes(self) -> int:
+        total = 0
+        if not self.path:
+            return 0
+        for root, _dirs, files in os.walk(self.path):
+            for fn in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, fn))
+                except OSError:
+                    pass
+        self.peak_bytes = max(self.peak_bytes, total)
+        return total
+
+    def stats(self) -> dict:
+        return {"path": self.path, "bytes": self.size_bytes(), "peak_bytes": self.peak_bytes}
+
+    def cleanup(self):
+        if self.path and not self.keep:
+            shutil.rmtree(self.path, ignore_errors=True)
+            self.path = None
+
+    def __enter__(self):
+        return self.create()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.cleanup()
+        return False
@@ -47,13 +47,14 @@ def is_youtube_url(url: str) -> bool:
     return False
 
 
-def download_audio_ytdlp(url: str, output_path: Optional[str] = None) -> Tuple[str, dict]:
+def download_audio_ytdlp(url: str, output_path: Optional[str] = None, work_dir: Optional[str] = None) -> Tuple[str, dict]:
     """
     Baixa áudio de uma URL usando yt-dlp e retorna caminho do arquivo WAV
     
     Args:
         url: URL do vídeo (YouTube, Vimeo, etc)
         output_path: Caminho opcional para o arquivo de saída
+        work_dir: Diretório do workspace da execução (padrão: tempdir do sistema)
         
     Returns:
         Tuple[str, dict]: (caminho do arquivo WAV, metadados do vídeo)
@@ -64,11 +65,12 @@ def download_audio_ytdlp(url: str, output_path: Optional[str] = None) -> Tuple[s
     import yt_dlp
     
     # Gerar caminho de saída se não fornecido
+    base = work_dir or tempfile.gettempdir()
     if not output_path:
-        output_path = os.path.join(tempfile.gettempdir(), f"ytdlp_audio_{os.getpid()}.wav")
+        output_path = os.path.join(base, f"ytdlp_audio_{os.getpid()}.wav")
     
     # Caminho temporário para o áudio extraído (antes da conversão para WAV)
-    temp_audio = os.path.join(tempfile.gettempdir(), f"ytdlp_temp_{os.getpid()}")
+    temp_audio = os.path.join(base, f"ytdlp_temp_{os.getpid()}")
     
     # Configurações do yt-dlp para extrair apenas áudio
     ydl_opts = {
@@ -0,0 +1,105 @@
+import os
+import time
+import asyncio
+import threading
+import unittest
+from unittest import mock
+from extrator_videos.async_pipeline import AsyncPipeline, run_async
+from extrator_videos.pipeline import format_utilization
+
+def jobs(n):
+    return [{"url": f"https://x.test/{i}", "n": i} for i in range(n)]
+
+class TestAsyncPipeline(unittest.TestCase):
+    def test_results_in_order(self):
+        def a(job):
+            job["a"] = job["n"] * 2
+        def b(job):
+            job["outputs"] = {"json": f"{job['a'] + 1}.json"}
+        async def main():
+            async with AsyncPipeline([("a", a, 3), ("b", b, 2)], on_thread_exit=lambda: None) as p:
+                return await p.run_jobs(jobs(10))
+        results = asyncio.run(main())
+        self.assertEqual([r.outputs["json"] for r in results], [f"{i * 2 + 1}.json" for i in range(10)])
+        self.assertTrue(all(r.ok and set(r.timings) == {"a", "b"} for r in results))
+
+    def test_stage_limit(self):
+        active = [0]
+        peak = [0]
+        lock = threading.Lock()
+        def slow(job):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.03)
+            with lock:
+                active[0] -= 1
+        run_async(jobs(8), [("a", slow, 2), ("b", lambda job: None, 4)])
+        self.assertEqual(peak[0], 2)
+
+    def test_error_stops_job_and_calls_on_done(self):
+        done = []
+        events = []
+        def a(job):
+            if job["n"] == 1:
+                raise RuntimeError("boom")
+        def b(job):
+            job["b"] = True
+        out, report = run_async(jobs(3), [("a", a, 1), ("b", b, 1)], on_done=done.append,
+                                on_event=lambda job, stage, status: events.append((job["n"], stage, status)))
+        self.assertEqual(out[1]["error"], {"stage": "a", "error": "boom"})
+        self.assertNotIn("b", out[1])
+        self.assertTrue(out[0]["b"] and out[2]["b"])
+        self.assertEqual(len(done), 3)
+        self.assertEqual(report["stages"][0]["errors"], 1)
+        self.assertIn((1, "a", "error"), events)
+        self.assertNotIn((1, "b", "start"), events)
+        self.assertIn("utilização", format_utilization(report))
+
+    def test_thread_exit_once_per_worker_thread(self):
+        ran = set()
+        exited = []
+        lock = threading.Lock()
+        def a(job):
+            with lock:
+                ran.add(threading.get_ident())
+            time.sleep(0.02)
+        def on_exit():
+            with lock:
+                exited.append(threading.get_ident())
+        async def main():
+            async with AsyncPipeline([("a", a, 3)], on_thread_exit=on_exit) as p:
+                await p.run_jobs(jobs(6))
+        asyncio.run(main())
+        # o fechamento roda exatamente nas threads que rodaram a etapa, uma vez em cada
+        self.assertEqual(set(exited), ran)
+        self.assertEqual(len(exited), len(ran))
+
+    def test_unused_workers_are_not_started(self):
+        exited = []
+        async def main():
+            async with AsyncPipeline([("a", lambda job: None, 4)], on_thread_exit=lambda: exited.append(threading.get_ident())) as p:
+                await p.run_jobs(jobs(1))
+        asyncio.run(main())
+        self.assertEqual(len(exited), 1)
+
+    def test_default_stages_do_not_touch_transcribe_slots(self):
+        from extrator_videos import batch_cli
+        from extrator_videos.async_pipeline import default_stages
+        before = batch_cli.transcribe_slots()
+        with mock.patch.dict(os.environ, {"ASYNC_TRANSCRIBE_WORKERS": "3"}):
+            stages = default_stages()
+        self.assertIs(batch_cli.transcribe_slots(), before)
+        self.assertEqual(dict((name, n) for name, _fn, n in stages)["transcribe"], 3)
+
+    def test_cancel_skips_next_stages(self):
+        async def main():
+            p = AsyncPipeline([("a", lambda job: p.cancel(), 1), ("b", lambda job: job.update(b=True), 1)], on_thread_exit=lambda: None)
+            async with p:
+                return await p.run_jobs(jobs(2))
+        results = asyncio.run(main())
+        self.assertEqual([r.error["error"] for r in results], ["cancelado", "cancelado"])
+        self.assertFalse(any(r.ok for r in results))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+from extrator_videos import batch_cli
+from extrator_videos.batch_state import BatchState
+
+class TestBatchState(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "state.jsonl")
+
+    def test_records_survive_reload(self):
+        st = BatchState(self.path)
+        art = st.save_artifact("u1", "transcribe", {"segments": [{"text": "oi"}]})
+        st.record("u1", "transcribe", {"tr": art})
+        st.record("u2", "resolve", {"manifest": "m.m3u8"})
+        again = BatchState(self.path)
+        self.assertEqual(set(again.stages("u1")), {"transcribe"})
+        tr = again.load_artifact(again.stages("u1")["transcribe"]["artifacts"]["tr"])
+        self.assertEqual(tr["segments"][0]["text"], "oi")
+        self.assertEqual(again.summary(), {"transcribe": 1, "resolve": 1})
+
+    def test_truncated_line_is_ignored(self):
+        st = BatchState(self.path)
+        st.record("u1", "resolve", {})
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write('{"url": "u1", "stage": "wri')
+        self.assertEqual(set(BatchState(self.path).stages("u1")), {"resolve"})
+
+    def test_record_after_truncated_line_is_kept(self):
+        BatchState(self.path).record("u1", "resolve", {})
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write('{"url": "u1", "stage": "wri')
+        # primeiro checkpoint depois da queda
+        BatchState(self.path).record("u1", "transcribe", {"tr": "x.json"})
+        self.assertEqual(set(BatchState(self.path).stages("u1")), {"resolve", "transcribe"})
+
+class TestCheckpoints(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "state.jsonl")
+        self.state = BatchState(self.path)
+        self.tr = {"language": "pt", "duration": None, "segments": [{"start": 0.0, "end": 5.0, "text": "oi"}]}
+
+    def job(self):
+        return batch_cli.new_job("https://curso/aula/1", None, ".", None, None)
+
+    def test_checkpointed_records_only_clean_stages(self):
+        def resolve(job):
+            job.update({"manifest": "https://cdn/master.m3u8", "errors": {"resolve": None}})
+        def failed_resolve(job):
+            job.update({"manifest": None, "errors": {"resolve": "timeout"}})
+        job = self.job()
+        batch_cli.checkpointed("resolve", failed_resolve, self.state)(job)
+        self.assertEqual(self.state.stages(job["url"]), {})
+        batch_cli.checkpointed("resolve", resolve, self.state)(job)
+        self.assertEqual(self.state.stages(job["url"])["resolve"]["artifacts"], {"manifest": "https://cdn/master.m3u8"})
+
+    def test_checkpointed_skips_restored_stages(self):
+        calls = []
+        job = self.job()
+        job["skip"] = {"ingest"}
+        batch_cli.checkpointed("ingest", calls.append, self.state)(job)
+        self.assertEqual(calls, [])
+
+    def test_restore_job_resumes_after_summarize(self):
+        u = "https://curso/aula/1"
+        self.state.record(u, "resolve", {"manifest": "m"})
+        self.state.record(u, "transcribe", {"tr": self.state.save_artifact(u, "transcribe", self.tr), "ytdlp_metadata": {}})
+        self.state.record(u, "summarize", {"summary": self.state.save_artifact(u, "summarize", {"res": {"ok": 1}, "sj": "{}"})})
+        job = self.job()
+        batch_cli.restore_job(job, BatchState(self.path))
+        self.assertEqual(job["resumed_from"], "summarize")
+        self.assertEqual(job["skip"], {"ingest", "transcribe", "summarize"})
+        self.assertEqual(job["tr"], self.tr)
+        self.assertEqual(job["res"], {"ok": 1})
+        self.assertEqual(job["checkpoint"]["resolve"], {"manifest": "m"})
+
+    def test_restore_job_finished_url_skips_everything(self):
+        u = "https://curso/aula/1"
+        self.state.record(u, "write", {})
+        job = self.job()
+        batch_cli.restore_job(job, self.state)
+        self.assertEqual(job["skip"], {name for name, _fn in batch_cli.STAGES})
+
+    def test_restore_job_missing_artifact_redoes_stages(self):
+        u = "https://curso/aula/1"
+        art = self.state.save_artifact(u, "transcribe", self.tr)
+        self.state.record(u, "transcribe", {"tr": art})
+        os.remove(art)
+        job = self.job()
+        batch_cli.restore_job(job, self.state)
+        for k in ("tr", "tp", "skip", "resumed_from"):
+            self.assertNotIn(k, job)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+from unittest import mock
+from extrator_videos import browser_pool
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.contexts = 0
+
+    def is_connected(self):
+        return self.connected
+
+    def new_context(self, **kwargs):
+        self.contexts += 1
+        return object()
+
+    def close(self):
+        self.connected = False
+
+class FakePlaywright:
+    def __init__(self):
+        self.launched = []
+        self.chromium = self
+
+    def start(self):
+        return self
+
+    def launch(self, headless=False):
+        b = FakeBrowser()
+        self.launched.append(b)
+        return b
+
+    def stop(self):
+        pass
+
+class TestBrowserPool(unittest.TestCase):
+    def setUp(self):
+        self.play = FakePlaywright()
+        patcher = mock.patch.object(browser_pool, "sync_playwright", lambda: self.play)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reuse_and_recycle(self):
+        pool = browser_pool.BrowserPool(max_uses=3)
+        got = [pool.browser(None, True) for _ in range(4)]
+        self.assertIs(got[0], got[2])
+        self.assertIsNot(got[0], got[3])
+        self.assertFalse(got[0].is_connected())
+        self.assertEqual(pool.stats["launches"], 2)
+        self.assertEqual(pool.stats["recycled"], 1)
+
+    def test_crashed_browser_is_replaced(self):
+        pool = browser_pool.BrowserPool()
+        b = pool.browser(None, False)
+        b.connected = False
+        self.assertIsNot(pool.browser(None, False), b)
+        self.assertEqual(pool.stats["crashed"], 1)
+
+    def test_one_browser_per_config(self):
+        pool = browser_pool.BrowserPool()
+        self.assertIsNot(pool.browser("http://p:1", True), pool.browser(None, True))
+        self.assertEqual(len(self.play.launched), 2)
+
+    def test_context_reuse_per_domain(self):
+        pool = browser_pool.BrowserPool()
+        b = pool.browser()
+        with mock.patch.dict("os.environ", {"BROWSER_REUSE_CONTEXT": "1"}):
+            c1, shared, ua = pool.context(b, "hub.la", {"user_agent": "UA1"})
+            c2, _s, ua2 = pool.context(b, "hub.la", {"user_agent": "UA2"})
+            c3, _s, _u = pool.context(b, "outro.com", {})
+        self.assertTrue(shared)
+        self.assertIs(c1, c2)
+        self.assertEqual(ua2, "UA1")
+        self.assertIsNot(c1, c3)
+        c4, shared, _u = pool.context(b, "hub.la", {})
+        self.assertFalse(shared)
+        self.assertIsNot(c4, c1)
+
+if __name__ == "__main__":
+    unittest.main()
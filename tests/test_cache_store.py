@@ -0,0 +1,84 @@
+import os
+import json
+import time
+import tempfile
+import unittest
+from unittest import mock
+from extrator_videos import resolve_cache, transcription_cache
+from extrator_videos.cache_store import SqliteStore, FileStore
+
+class TestSqliteStore(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def test_roundtrip_ttl_and_counters(self):
+        st = SqliteStore(self.dir, max_bytes=0)
+        st.put("transcription", "k", b"abc")
+        self.assertEqual(st.get("transcription", "k"), b"abc")
+        self.assertIsNone(st.get("transcription", "nope"))
+        st.put("transcription", "old", b"x", created=time.time() - 7200)
+        self.assertIsNone(st.get("transcription", "old", ttl_hours=1))
+        ns = st.stats()["namespaces"]["transcription"]
+        self.assertEqual((ns["hits"], ns["misses"], ns["writes"], ns["entries"]), (1, 2, 2, 2))
+        self.assertEqual(st.prune(ttl_hours=1)["expired"], 1)
+
+    def test_lru_eviction_under_byte_budget(self):
+        st = SqliteStore(self.dir, max_bytes=250)
+        for k in ("a", "b", "c"):
+            st.put("chunk", k, b"0" * 100)
+            time.sleep(0.01)
+        self.assertIsNone(st.get("chunk", "a"))
+        self.assertIsNotNone(st.get("chunk", "b"))
+        time.sleep(0.01)
+        st.put("chunk", "d", b"0" * 100)
+        # "b" foi lido por último, então "c" sai primeiro
+        self.assertIsNotNone(st.get("chunk", "b"))
+        self.assertIsNone(st.get("chunk", "c"))
+        self.assertEqual(st.stats()["namespaces"]["chunk"]["evictions"], 2)
+
+    def test_running_total_tracks_replace_and_delete(self):
+        st = SqliteStore(self.dir, max_bytes=0)
+        st.put("chunk", "a", b"0" * 100)
+        st.put("chunk", "a", b"0" * 40)
+        st.put("chunk", "b", b"0" * 10)
+        st.delete("chunk", "b")
+        self.assertEqual(st._total_bytes(), 40)
+        # reabrir o mesmo banco não recalcula nem perde o total
+        self.assertEqual(SqliteStore(self.dir, max_bytes=0)._total_bytes(), 40)
+
+    def test_legacy_json_file_is_imported(self):
+        with open(os.path.join(self.dir, "abc.json"), "w", encoding="utf-8") as f:
+            json.dump({"segments": []}, f)
+        st = SqliteStore(self.dir, max_bytes=0)
+        self.assertEqual(json.loads(st.get("transcription", "abc")), {"segments": []})
+        self.assertFalse(os.path.exists(os.path.join(self.dir, "abc.json")))
+        self.assertIsNotNone(st.get("transcription", "abc"))
+
+class TestFileStore(unittest.TestCase):
+    def test_prune_by_budget(self):
+        d = tempfile.mkdtemp()
+        st = FileStore(d, max_bytes=0)
+        for k in ("a", "b", "c"):
+            st.put("resolve", k, b"0" * 100)
+        self.assertEqual(st.get("resolve", "a"), b"0" * 100)
+        self.assertEqual(st.prune(max_bytes=150)["evicted"], 2)
+        self.assertEqual(st.stats()["entries"], 1)
+
+class TestCacheModules(unittest.TestCase):
+    def test_both_caches_share_one_file(self):
+        d = tempfile.mkdtemp()
+        resolve_cache.save(d, "https://x/aula", {"manifest": "m.m3u8"})
+        transcription_cache.save_transcription(d, "k", {"segments": [{"text": "oi"}]})
+        self.assertEqual(resolve_cache.load(d, "https://x/aula", ttl_hours=1), {"manifest": "m.m3u8"})
+        self.assertEqual(transcription_cache.load_transcription(d, "k")["segments"][0]["text"], "oi")
+        self.assertEqual([f for f in os.listdir(d) if not f.startswith("cache.db")], [])
+
+    def test_files_backend(self):
+        d = tempfile.mkdtemp()
+        with mock.patch.dict(os.environ, {"CACHE_BACKEND": "files"}):
+            transcription_cache.save_transcription(d, "k", {"segments": []})
+            self.assertTrue(os.path.exists(os.path.join(d, "k.json")))
+            self.assertEqual(transcription_cache.load_transcription(d, "k"), {"segments": []})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+from unittest import mock
+from extrator_videos import crawler
+from extrator_videos.crawler import filter_lessons, lesson_pattern, pick_manifest, resolve_in_tabs
+from extrator_videos.network_capture import NetworkCapture
+
+class FakeResponse:
+    def __init__(self, url, ct=None):
+        self.url = url
+        self.status = 200
+        self.headers = {"content-type": ct} if ct else {}
+
+class FakeTab:
+    def __init__(self, sess):
+        self.sess = sess
+        self.closed = False
+
+    def wait_for_timeout(self, ms):
+        self.sess.tick()
+
+    def close(self):
+        self.closed = True
+
+class FakeSession:
+    """Cada aba recebe o manifest depois de `delay` ticks; URLs sem entrada nunca respondem."""
+    def __init__(self, delays):
+        self.delays = delays
+        self.tabs = {}
+        self.ticks = 0
+        self.max_open = 0
+
+    def open_tab(self, url):
+        if url.endswith("/quebrada"):
+            raise RuntimeError("net::ERR_FAILED")
+        tab, cap = FakeTab(self), NetworkCapture()
+        self.tabs[url] = (tab, cap, self.ticks)
+        self.max_open = max(self.max_open, sum(1 for t, _c, _s in self.tabs.values() if not t.closed))
+        return tab, cap
+
+    def tick(self):
+        self.ticks += 1
+        for url, (tab, cap, opened) in self.tabs.items():
+            d = self.delays.get(url)
+            if not tab.closed and d is not None and self.ticks - opened == d:
+                cap.on_response(FakeResponse(url + "/master.m3u8"))
+
+class TestCrawler(unittest.TestCase):
+    def test_filter_lessons_hubla(self):
+        course = "https://app.hub.la/m/abc"
+        hrefs = [
+            "https://app.hub.la/m/abc/p/1",
+            "https://app.hub.la/m/abc/p/1#comentarios",
+            "https://app.hub.la/m/abc/p/2",
+            "https://app.hub.la/m/abc",
+            "https://app.hub.la/perfil",
+            "https://outro.site/m/abc/p/3",
+            "javascript:void(0)",
+        ]
+        self.assertEqual(filter_lessons(hrefs, course), ["https://app.hub.la/m/abc/p/1", "https://app.hub.la/m/abc/p/2"])
+
+    def test_patterns(self):
+        self.assertIn("item", lesson_pattern("https://alunos.segueadii.com.br/area/produto/7033"))
+        hrefs = ["https://x.com/curso/modulo-1", "https://x.com/curso/aula/intro"]
+        self.assertEqual(filter_lessons(hrefs, "https://x.com/curso"), ["https://x.com/curso/aula/intro"])
+        self.assertEqual(filter_lessons(hrefs, "https://x.com/curso", pattern=r"modulo-\d"), ["https://x.com/curso/modulo-1"])
+
+    def test_pick_manifest_prefers_hls(self):
+        cap = NetworkCapture()
+        cap.on_response(FakeResponse("https://cdn/teaser.mp4", "video/mp4"))
+        cap.on_response(FakeResponse("https://cdn/manifest.mpd"))
+        cap.on_response(FakeResponse("https://cdn/master.m3u8"))
+        self.assertEqual(pick_manifest(cap), "https://cdn/master.m3u8")
+        self.assertIsNone(pick_manifest(NetworkCapture()))
+
+    def test_resolve_in_tabs(self):
+        links = [f"https://x.com/aula/{i}" for i in range(5)] + ["https://x.com/aula/quebrada"]
+        delays = {links[0]: 1, links[1]: 3, links[2]: 2, links[3]: 1}
+        sess = FakeSession(delays)
+        seen = []
+        out = resolve_in_tabs(sess, links, tabs=2, timeout_s=0.5, grace_ms=0, on_result=lambda u, m: seen.append(u))
+        for u in links[:4]:
+            self.assertEqual(out[u], u + "/master.m3u8")
+        # a aula 4 nunca responde e sai pelo tempo limite; a quebrada falha ao abrir
+        self.assertIsNone(out[links[4]])
+        self.assertIsNone(out[links[5]])
+        self.assertEqual(sorted(seen), sorted(links))
+        self.assertLessEqual(sess.max_open, 2)
+        self.assertTrue(all(t.closed for t, _c, _s in sess.tabs.values()))
+
+    def test_course_index_opened_without_video_wait(self):
+        calls = []
+
+        class IndexSession:
+            page = None
+
+            def __init__(self, **kwargs):
+                pass
+
+            def collect(self, url, wait_video=True):
+                calls.append((url, wait_video))
+
+            def close(self):
+                pass
+
+        with mock.patch.object(crawler, "BrowserSession", IndexSession), \
+             mock.patch.object(crawler, "lesson_links", return_value=["https://curso/aula/1"]), \
+             mock.patch.object(crawler, "resolve_in_tabs", return_value={}):
+            lessons = crawler.crawl_course("https://curso/modulo")
+        self.assertEqual(calls, [("https://curso/modulo", False)])
+        self.assertEqual(lessons, [{"url": "https://curso/aula/1", "manifest": None}])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+from extrator_videos.dom_scan import SCAN_JS, scan_frames, is_candidate
+
+class FakeFrame:
+    def __init__(self, url, found=None, fail=False):
+        self.url = url
+        self.found = found or []
+        self.fail = fail
+        self.scripts = []
+
+    def evaluate(self, script):
+        self.scripts.append(script)
+        if self.fail:
+            raise RuntimeError("Frame was detached")
+        return self.found
+
+    def content(self):
+        raise AssertionError("o HTML do frame não deve ser serializado")
+
+class FakePage:
+    def __init__(self, frames):
+        self.frames = frames
+        self.main_frame = frames[0]
+
+class TestDomScan(unittest.TestCase):
+    def test_main_frame_first(self):
+        main = FakeFrame("https://x.com/aula", ["https://cdn/a/master.m3u8"])
+        child = FakeFrame("https://player/embed", ["https://cdn/b/master.m3u8"])
+        self.assertEqual(scan_frames(FakePage([main, child])), ["https://cdn/a/master.m3u8"])
+        self.assertEqual(child.scripts, [])
+        self.assertEqual(main.scripts, [SCAN_JS])
+
+    def test_falls_back_to_iframes(self):
+        main = FakeFrame("https://x.com/aula", ["https://x.com/logo"])
+        broken = FakeFrame("about:blank", fail=True)
+        child = FakeFrame("https://customer-1.cloudflarestream.com/abc/iframe",
+                          ["https://customer-1.cloudflarestream.com/abc/manifest/video.m3u8"])
+        out = scan_frames(FakePage([main, broken, child]))
+        self.assertEqual(out, ["https://customer-1.cloudflarestream.com/abc/manifest/video.m3u8"])
+
+    def test_nothing_found(self):
+        self.assertEqual(scan_frames(FakePage([FakeFrame("https://x.com")])), [])
+        self.assertEqual(scan_frames(object()), [])
+
+    def test_is_candidate(self):
+        self.assertTrue(is_candidate("https://cdn/v.m3u8?token=1"))
+        self.assertTrue(is_candidate("https://cdn/aula.mp4"))
+        self.assertTrue(is_candidate("https://cdn/m.mpd"))
+        self.assertFalse(is_candidate("https://cdn/play?id=1"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,28 @@
+import unittest
+from extrator_videos.schema import VideoVariant
+from extrator_videos.hls import carries_audio, select_audio_variant, select_audio_source
+
+def v(url, br, codec=None):
+    return VideoVariant(url=url, type="hls", bitrate_bps=br, codec=codec)
+
+class TestAudioSelection(unittest.TestCase):
+    def test_carries_audio(self):
+        self.assertTrue(carries_audio(v("a", 1, "avc1.64001f,mp4a.40.2")))
+        self.assertTrue(carries_audio(v("a", 1, None)))
+        self.assertFalse(carries_audio(v("a", 1, "avc1.64001f")))
+
+    def test_lowest_bitrate_with_audio(self):
+        ladder = [
+            v("1080", 6000000, "avc1.640028,mp4a.40.2"),
+            v("240", 300000, "avc1.42c015"),
+            v("360", 800000, "avc1.4d401e,mp4a.40.2"),
+        ]
+        self.assertEqual(select_audio_variant(ladder).url, "360")
+
+    def test_rendition_preferred(self):
+        h = {"audios": [{"uri": "aud_en", "default": False}, {"uri": "aud_pt", "default": True}], "variants": [v("360", 1)]}
+        self.assertEqual(select_audio_source(h, "master"), "aud_pt")
+        self.assertEqual(select_audio_source({"audios": [], "variants": []}, "master"), "master")
+
+if __name__ == "__main__":
+    unittest.main()
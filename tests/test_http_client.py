@@ -0,0 +1,82 @@
+import os
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from extrator_videos import http_client
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    hits = {}
+    ports = set()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        Handler.hits[self.path] = Handler.hits.get(self.path, 0) + 1
+        Handler.ports.add(self.client_address[1])
+        if self.path == "/flaky" and Handler.hits[self.path] == 1:
+            status, body = 503, b"busy"
+        else:
+            status, body = 200, b"ok"
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Set-Cookie", "sid=abc; Path=/")
+        self.end_headers()
+        self.wfile.write(body)
+
+class TestHttpClient(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        Handler.hits.clear()
+        Handler.ports.clear()
+
+    def test_sessions_share_the_connection_pool(self):
+        a = http_client.session()
+        b = http_client.session()
+        self.assertIs(a.get_adapter("https://x"), b.get_adapter("https://x"))
+        # fechar uma sessão não derruba o pool das outras
+        a.get(self.base + "/a", timeout=5)
+        a.close()
+        b.get(self.base + "/b", timeout=5)
+        self.assertEqual(len(Handler.ports), 1)
+
+    def test_shared_session_drops_cookies(self):
+        http_client.get(self.base + "/c", timeout=5)
+        self.assertEqual(len(http_client.shared().cookies), 0)
+        s = http_client.session()
+        s.get(self.base + "/c", timeout=5)
+        self.assertEqual(s.cookies.get("sid"), "abc")
+
+    def test_retries_on_503(self):
+        with mock.patch.dict(os.environ, {"HTTP_RETRIES": "2", "HTTP_BACKOFF_S": "0"}):
+            s = http_client.session(pool=3)
+        r = s.get(self.base + "/flaky", timeout=5)
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(Handler.hits["/flaky"], 2)
+        # sem retentativa para quem já faz as próprias (segmentos)
+        Handler.hits.clear()
+        r = http_client.session(pool=3, retries=False).get(self.base + "/flaky", timeout=5)
+        self.assertEqual(r.status_code, 503)
+
+    def test_metrics_and_proxy(self):
+        http_client.get(self.base + "/m", timeout=5)
+        st = http_client.stats()["127.0.0.1"]
+        self.assertGreaterEqual(st["requests"], 1)
+        self.assertIn("avg_ms", st)
+        s = http_client.session(proxy="http://proxy:3128")
+        self.assertEqual(s.proxies, {"http": "http://proxy:3128", "https": "http://proxy:3128"})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import os
+import unittest
+from unittest import mock
+from extrator_videos import manifest_cache
+from extrator_videos.hls import parse_hls
+
+MASTER = """#EXTM3U
+#EXT-X-STREAM-INF:BANDWIDTH=800000,RESOLUTION=640x360,CODECS="avc1.4d401e,mp4a.40.2"
+360/index.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=3000000,RESOLUTION=1280x720,CODECS="avc1.64001f,mp4a.40.2"
+720/index.m3u8
+"""
+VOD = "#EXTM3U\n#EXTINF:6.0,\nseg0.ts\n#EXT-X-ENDLIST\n"
+LIVE = "#EXTM3U\n#EXTINF:6.0,\nseg0.ts\n"
+
+class FakeResp:
+    def __init__(self, text="", status=200, headers=None):
+        self.text = text
+        self.status_code = status
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise manifest_cache.requests.HTTPError(str(self.status_code))
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.calls.append((url, dict(headers or {})))
+        return self.responses.pop(0)
+
+class TestManifestCache(unittest.TestCase):
+    def setUp(self):
+        manifest_cache.clear()
+        self.env = mock.patch.dict(os.environ, {"MANIFEST_CACHE": "1", "MANIFEST_CACHE_TTL_S": "30"})
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+        manifest_cache.clear()
+
+    def use(self, *responses):
+        sess = FakeSession(responses)
+        p = mock.patch.object(manifest_cache, "_session", return_value=sess)
+        p.start()
+        self.addCleanup(p.stop)
+        return sess
+
+    def test_hit_within_ttl(self):
+        sess = self.use(FakeResp(MASTER))
+        a = parse_hls("https://CDN.example.com/v/master.m3u8#x")
+        b = parse_hls("https://cdn.example.com/v/master.m3u8")
+        self.assertEqual(len(sess.calls), 1)
+        self.assertEqual([v.url for v in a["variants"]], ["https://CDN.example.com/v/360/index.m3u8", "https://CDN.example.com/v/720/index.m3u8"])
+        self.assertEqual(len(b["variants"]), 2)
+        self.assertEqual(manifest_cache.stats()["hits"], 1)
+
+    def test_auth_headers_split_entries(self):
+        sess = self.use(FakeResp(VOD), FakeResp(VOD))
+        manifest_cache.fetch_text("https://cdn/v.m3u8", {"Cookie": "a=1", "Referer": "https://x"})
+        manifest_cache.fetch_text("https://cdn/v.m3u8", {"Cookie": "a=1", "Referer": "https://y"})
+        manifest_cache.fetch_text("https://cdn/v.m3u8", {"Cookie": "a=2"})
+        self.assertEqual(len(sess.calls), 2)
+
+    def test_revalidates_with_etag(self):
+        sess = self.use(FakeResp(VOD, headers={"ETag": '"abc"'}), FakeResp(status=304))
+        with mock.patch.dict(os.environ, {"MANIFEST_CACHE_TTL_S": "0"}):
+            manifest_cache.fetch_text("https://cdn/v.m3u8")
+            with mock.patch.object(manifest_cache.time, "time", return_value=manifest_cache.time.time() + 5):
+                text = manifest_cache.fetch_text("https://cdn/v.m3u8")
+        self.assertEqual(text, VOD)
+        self.assertEqual(sess.calls[1][1].get("If-None-Match"), '"abc"')
+        self.assertEqual(manifest_cache.stats()["revalidated"], 1)
+
+    def test_live_playlists_not_cached(self):
+        sess = self.use(FakeResp(LIVE), FakeResp(LIVE))
+        manifest_cache.fetch_text("https://cdn/live.m3u8")
+        manifest_cache.fetch_text("https://cdn/live.m3u8")
+        self.assertEqual(len(sess.calls), 2)
+
+    def test_http_error_raises_and_is_not_cached(self):
+        self.use(FakeResp(status=403), FakeResp(VOD))
+        with self.assertRaises(manifest_cache.requests.HTTPError):
+            manifest_cache.fetch_text("https://cdn/v.m3u8")
+        self.assertEqual(manifest_cache.fetch_text("https://cdn/v.m3u8"), VOD)
+
+    def test_failed_revalidation_drops_stale_entry(self):
+        sess = self.use(FakeResp(VOD, headers={"ETag": '"abc"'}), FakeResp(status=500), FakeResp(VOD))
+        with mock.patch.dict(os.environ, {"MANIFEST_CACHE_TTL_S": "0"}):
+            manifest_cache.fetch_text("https://cdn/v.m3u8")
+            with mock.patch.object(manifest_cache.time, "time", return_value=manifest_cache.time.time() + 5):
+                with self.assertRaises(manifest_cache.requests.HTTPError):
+                    manifest_cache.fetch_text("https://cdn/v.m3u8")
+                self.assertEqual(manifest_cache.stats()["entries"], 0)
+                self.assertEqual(manifest_cache._KEY_LOCKS, {})
+                manifest_cache.fetch_text("https://cdn/v.m3u8")
+        # sem entrada antiga o terceiro pedido é incondicional
+        self.assertNotIn("If-None-Match", sess.calls[2][1])
+
+    def test_lru_cap(self):
+        self.use(*[FakeResp(VOD) for _ in range(4)])
+        with mock.patch.dict(os.environ, {"MANIFEST_CACHE_MAX_ENTRIES": "2"}):
+            manifest_cache.fetch_text("https://cdn/a.m3u8")
+            manifest_cache.fetch_text("https://cdn/b.m3u8")
+            manifest_cache.fetch_text("https://cdn/a.m3u8")
+            manifest_cache.fetch_text("https://cdn/c.m3u8")
+            manifest_cache.fetch_text("https://cdn/a.m3u8")
+            manifest_cache.fetch_text("https://cdn/b.m3u8")
+        st = manifest_cache.stats()
+        # b foi o menos usado quando c entrou, então saiu e teve de ser baixado de novo
+        self.assertEqual(st["entries"], 2)
+        self.assertEqual(st["hits"], 2)
+        self.assertEqual(st["misses"], 4)
+        self.assertLessEqual(len(manifest_cache._KEY_LOCKS), 2)
+
+    def test_disabled(self):
+        sess = self.use(FakeResp(VOD), FakeResp(VOD))
+        with mock.patch.dict(os.environ, {"MANIFEST_CACHE": "0"}):
+            manifest_cache.fetch_text("https://cdn/v.m3u8")
+            manifest_cache.fetch_text("https://cdn/v.m3u8")
+        self.assertEqual(len(sess.calls), 2)
+
+if __name__ == "__main__":
+    unittest.main()
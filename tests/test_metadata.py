@@ -0,0 +1,91 @@
+import json
+import time
+import threading
+import unittest
+from unittest import mock
+from extrator_videos import metadata
+from extrator_videos.schema import VideoExtractionResult, VideoSource, VideoVariant
+
+def ladder(n=6):
+    vs = [VideoVariant(url=f"https://cdn/v{i}.m3u8", type="hls", bitrate_bps=(i + 1) * 800000) for i in range(n)]
+    return VideoExtractionResult(url="https://x.com/aula", sources=[VideoSource(source_url="https://cdn/master.m3u8", type="hls", variants=vs)])
+
+class FakeProc:
+    returncode = 0
+    stdout = json.dumps({"streams": [{"codec_name": "h264", "width": 1280, "height": 720, "avg_frame_rate": "30/1"}], "format": {"duration": "600.0"}})
+
+class TestMetadata(unittest.TestCase):
+    def setUp(self):
+        metadata.has_ffprobe.cache_clear()
+        metadata._FFPROBE_SLOTS = None
+
+    def tearDown(self):
+        metadata.has_ffprobe.cache_clear()
+        metadata._FFPROBE_SLOTS = None
+
+    def test_full_mode_enriches_every_variant(self):
+        res = ladder()
+        with mock.patch.object(metadata, "hls_duration", return_value=600.0) as hd, \
+             mock.patch.object(metadata, "has_ffprobe", return_value=True), \
+             mock.patch.object(metadata, "ffprobe_info", return_value={"codec": "h264", "width": 1280, "height": 720}) as fi:
+            metadata.enrich_metadata(res, mode="full")
+        self.assertEqual(hd.call_count, 6)
+        self.assertEqual(fi.call_count, 6)
+        for v in res.sources[0].variants:
+            self.assertEqual(v.duration_seconds, 600.0)
+            self.assertEqual(v.estimated_size_bytes, int(v.bitrate_bps * 600 / 8))
+            self.assertEqual((v.codec, v.resolution), ("h264", "1280x720"))
+
+    def test_lazy_mode_fetches_one_playlist_and_no_ffprobe(self):
+        res = ladder()
+        with mock.patch.object(metadata, "hls_duration", return_value=300.0) as hd, \
+             mock.patch.object(metadata, "ffprobe_info") as fi:
+            metadata.enrich_metadata(res, mode="lazy")
+        self.assertEqual(hd.call_count, 1)
+        fi.assert_not_called()
+        self.assertTrue(all(v.duration_seconds == 300.0 for v in res.sources[0].variants))
+        self.assertTrue(all(v.codec is None for v in res.sources[0].variants))
+
+    def test_probe_variant_on_demand(self):
+        v = VideoVariant(url="https://cdn/v.m3u8", type="hls")
+        with mock.patch.object(metadata, "has_ffprobe", return_value=True), \
+             mock.patch.object(metadata.subprocess, "run", return_value=FakeProc()):
+            metadata.probe_variant(v)
+        self.assertEqual((v.codec, v.resolution, v.frame_rate, v.duration_seconds), ("h264", "1280x720", 30.0, 600.0))
+
+    def test_ffprobe_concurrency_is_bounded(self):
+        state = {"now": 0, "peak": 0}
+        lock = threading.Lock()
+
+        def fake_run(*a, **k):
+            with lock:
+                state["now"] += 1
+                state["peak"] = max(state["peak"], state["now"])
+            time.sleep(0.05)
+            with lock:
+                state["now"] -= 1
+            return FakeProc()
+
+        res = ladder()
+        with mock.patch.dict("os.environ", {"FFPROBE_CONCURRENCY": "2", "METADATA_WORKERS": "6"}), \
+             mock.patch.object(metadata, "hls_duration", return_value=None), \
+             mock.patch.object(metadata, "has_ffprobe", return_value=True), \
+             mock.patch.object(metadata.subprocess, "run", side_effect=fake_run):
+            metadata.enrich_metadata(res, mode="full")
+        self.assertEqual(state["peak"], 2)
+        self.assertTrue(all(v.codec == "h264" for v in res.sources[0].variants))
+
+    def test_has_ffprobe_is_cached(self):
+        with mock.patch.object(metadata.shutil, "which", return_value="/usr/bin/ffprobe") as w:
+            self.assertTrue(metadata.has_ffprobe())
+            self.assertTrue(metadata.has_ffprobe())
+        self.assertEqual(w.call_count, 1)
+
+    def test_off_mode(self):
+        res = ladder(2)
+        with mock.patch.object(metadata, "hls_duration") as hd:
+            metadata.enrich_metadata(res, mode="off")
+        hd.assert_not_called()
+
+if __name__ == "__main__":
+    unittest.main()
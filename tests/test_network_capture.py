@@ -0,0 +1,76 @@
+import unittest
+from extrator_videos.network_capture import NetworkCapture
+
+class FakeRequest:
+    def __init__(self, url, resource_type="xhr"):
+        self.url = url
+        self.method = "GET"
+        self.resource_type = resource_type
+        self.headers = {"accept": "*/*"}
+
+class FakeResponse:
+    def __init__(self, url, ct=None):
+        self.url = url
+        self.status = 200
+        self.headers = {"content-type": ct, "x-extra": "1"} if ct else {"x-extra": "1"}
+
+class TestNetworkCapture(unittest.TestCase):
+    def test_bounded_ring_keeps_candidates(self):
+        cap = NetworkCapture(mode="bounded", ring_size=10)
+        cap.on_response(FakeResponse("https://cdn/master.m3u8", "application/vnd.apple.mpegurl"))
+        for i in range(1000):
+            cap.on_request(FakeRequest(f"https://analytics/ping?{i}"))
+            cap.on_response(FakeResponse(f"https://analytics/ping?{i}", "application/json"))
+        self.assertEqual(len(cap.requests), 10)
+        self.assertEqual(len(cap.responses), 10)
+        self.assertEqual(cap.seen, {"requests": 1000, "responses": 1001})
+        # o manifest saiu do ring buffer mas continua como candidato, com cabeçalhos
+        cands = cap.video_candidates()
+        self.assertEqual([c["url"] for c in cands], ["https://cdn/master.m3u8"])
+        self.assertIn("headers", cands[0])
+        self.assertNotIn("headers", cap.responses[-1])
+        self.assertNotIn("headers", cap.requests[-1])
+
+    def test_full_mode_keeps_everything(self):
+        cap = NetworkCapture(mode="full")
+        for i in range(50):
+            cap.on_request(FakeRequest(f"https://x/{i}"))
+            cap.on_response(FakeResponse(f"https://x/{i}", "text/html"))
+        self.assertEqual(len(cap.responses), 50)
+        self.assertIn("headers", cap.requests[0])
+        self.assertEqual(cap.video_candidates(), [])
+
+    def test_indexed_lookup(self):
+        cap = NetworkCapture(mode="bounded")
+        cap.on_response(FakeResponse("https://cdn/a/master.m3u8?token=1", "application/vnd.apple.mpegurl; charset=utf-8"))
+        cap.on_response(FakeResponse("https://cdn/a/manifest", "application/dash+xml"))
+        cap.on_response(FakeResponse("https://cdn/a/aula.mp4", "video/mp4"))
+        cap.on_response(FakeResponse("https://cdn/a/app.js", "application/javascript"))
+        self.assertEqual(len(cap.video_candidates()), 3)
+        self.assertEqual([r["url"] for r in cap.find(ext=".m3u8")], ["https://cdn/a/master.m3u8?token=1"])
+        self.assertEqual([r["url"] for r in cap.find(ext="mp4")], ["https://cdn/a/aula.mp4"])
+        self.assertEqual([r["url"] for r in cap.find(content_type="application/dash+xml")], ["https://cdn/a/manifest"])
+        self.assertEqual(len(cap.find(content_type="application/vnd.apple.mpegurl", ext=".m3u8")), 1)
+        self.assertEqual(cap.find(content_type="video/mp4", ext=".m3u8"), [])
+
+    def test_segments_after_manifest_are_not_indexed(self):
+        cap = NetworkCapture(mode="bounded", ring_size=10)
+        cap.on_response(FakeResponse("https://cdn/a/master.m3u8", "application/vnd.apple.mpegurl"))
+        cap.on_response(FakeResponse("https://cdn/a/master.m3u8", "application/vnd.apple.mpegurl"))
+        for i in range(10000):
+            cap.on_response(FakeResponse(f"https://cdn/a/seg{i}.ts", "video/mp2t"))
+        self.assertEqual([c["url"] for c in cap.video_candidates()], ["https://cdn/a/master.m3u8"])
+        self.assertEqual(cap.find(ext=".ts"), [])
+        self.assertEqual(cap.dropped, 10000)
+        self.assertEqual(len(cap.responses), 10)
+
+    def test_candidates_are_capped(self):
+        cap = NetworkCapture(mode="bounded")
+        cap.max_candidates = 5
+        for i in range(50):
+            cap.on_response(FakeResponse(f"https://cdn/v{i}.mp4", "video/mp4"))
+        self.assertEqual(len(cap.video_candidates()), 5)
+        self.assertEqual(cap.dropped, 45)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import time
+import threading
+import unittest
+from extrator_videos.pipeline import run_pipeline, format_utilization
+
+class TestPipeline(unittest.TestCase):
+    def test_order_and_stats(self):
+        def a(job):
+            job["a"] = job["n"] * 2
+        def b(job):
+            job["b"] = job["a"] + 1
+        jobs, report = run_pipeline([{"n": i} for i in range(10)], [("a", a, 3), ("b", b, 2)])
+        self.assertEqual([j["b"] for j in jobs], [i * 2 + 1 for i in range(10)])
+        self.assertEqual([st["items"] for st in report["stages"]], [10, 10])
+        self.assertIn("utilização", format_utilization(report))
+
+    def test_failed_job_skips_remaining_stages(self):
+        done = []
+        def a(job):
+            if job["n"] == 1:
+                raise RuntimeError("boom")
+        def b(job):
+            job["b"] = True
+        jobs, report = run_pipeline([{"n": i} for i in range(3)], [("a", a, 1), ("b", b, 1)], on_done=done.append)
+        self.assertEqual(jobs[1]["error"], {"stage": "a", "error": "boom"})
+        self.assertNotIn("b", jobs[1])
+        self.assertTrue(jobs[0]["b"] and jobs[2]["b"])
+        self.assertEqual(len(done), 3)
+        self.assertEqual(report["stages"][0]["errors"], 1)
+
+    def test_stages_overlap(self):
+        active = set()
+        seen = []
+        lock = threading.Lock()
+        def stage(name):
+            def fn(job):
+                with lock:
+                    active.add(name)
+                    seen.append(len(active))
+                time.sleep(0.05)
+                with lock:
+                    active.discard(name)
+            return fn
+        run_pipeline([{} for _ in range(4)], [("a", stage("a"), 1), ("b", stage("b"), 1)], queue_size=1)
+        self.assertGreater(max(seen), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import unittest
+from extrator_videos.browser import BrowserSession, is_play_control
+from extrator_videos.network_capture import NetworkCapture, is_video_response
+
+class FakeResponse:
+    def __init__(self, url, ct=None):
+        self.url = url
+        self.status = 200
+        self.headers = {"content-type": ct} if ct else {}
+
+class FakePage:
+    """Entrega as respostas agendadas conforme as fatias de espera passam."""
+    def __init__(self, capture, schedule):
+        self.capture = capture
+        self.schedule = dict(schedule)
+        self.waits = []
+        self.calls = 0
+        self.stopped = False
+        self.load_state = None
+        self.gotos = []
+
+    def goto(self, url, wait_until=None, timeout=None):
+        self.gotos.append((url, wait_until))
+
+    def wait_for_timeout(self, ms):
+        self.waits.append(ms)
+        self.calls += 1
+        res = self.schedule.pop(self.calls, None)
+        if res is not None:
+            self.capture.on_response(res)
+
+    def wait_for_load_state(self, state, timeout=None):
+        self.load_state = state
+
+    def evaluate(self, script):
+        if "window.stop" in script:
+            self.stopped = True
+
+class FakeElement:
+    def __init__(self, cls=None, aria=None):
+        self.attrs = {"class": cls, "aria-label": aria}
+        self.clicked = False
+
+    def get_attribute(self, name):
+        return self.attrs.get(name)
+
+    def is_visible(self):
+        return True
+
+    def click(self, timeout=None):
+        self.clicked = True
+
+class FakeLocator:
+    def __init__(self, elements):
+        self.elements = elements
+
+    def count(self):
+        return len(self.elements)
+
+    def nth(self, i):
+        return self.elements[i]
+
+class TestVideoResponse(unittest.TestCase):
+    def test_predicate(self):
+        self.assertTrue(is_video_response("https://cdn/x/master.m3u8?t=1", None))
+        self.assertTrue(is_video_response("https://cdn/x/manifest", "application/dash+xml"))
+        self.assertTrue(is_video_response("https://cdn/x/blob", "video/mp4"))
+        self.assertFalse(is_video_response("https://cdn/app.js", "application/javascript"))
+
+    def test_capture_marks_first_video(self):
+        cap = NetworkCapture()
+        cap.on_response(FakeResponse("https://x/app.js", "application/javascript"))
+        self.assertIsNone(cap.video_seen_at)
+        cap.on_response(FakeResponse("https://x/v.m3u8"))
+        first = cap.video_seen_at
+        cap.on_response(FakeResponse("https://x/v_720.m3u8"))
+        self.assertEqual(cap.video_seen_at, first)
+        self.assertEqual(len(cap.video_candidates()), 2)
+
+class TestWaitForVideo(unittest.TestCase):
+    def session(self, schedule):
+        s = BrowserSession(pool=object())
+        s.page = FakePage(s.capture, schedule)
+        return s
+
+    def test_returns_on_first_manifest(self):
+        s = self.session({3: FakeResponse("https://cdn/master.m3u8")})
+        self.assertTrue(s.wait_for_video(timeout_s=5, grace_ms=0))
+        self.assertEqual(s.page.calls, 3)
+        self.assertTrue(s.page.stopped)
+
+    def test_grace_window(self):
+        s = self.session({1: FakeResponse("https://cdn/master.m3u8")})
+        self.assertTrue(s.wait_for_video(timeout_s=5, grace_ms=60000))
+        # uma fatia até o manifest + a janela de graça
+        self.assertEqual(len(s.page.waits), 2)
+        self.assertGreater(s.page.waits[-1], 50000)
+
+    def test_nudges_player_before_timeout(self):
+        s = self.session({2: FakeResponse("https://cdn/master.m3u8")})
+        nudges = []
+        s._nudge_player = lambda: nudges.append(s.page.calls)
+        self.assertTrue(s.wait_for_video(timeout_s=5, grace_ms=0, nudge_s=0))
+        # scroll/play antes da primeira fatia de espera, uma única vez
+        self.assertEqual(nudges, [0])
+
+    def test_play_control_predicate(self):
+        self.assertTrue(is_play_control("vjs-big-play-button vjs-control", None))
+        self.assertTrue(is_play_control("player__play-button", None))
+        self.assertTrue(is_play_control("btn", "Play Video"))
+        for cls in ("display-flex", "playlist-item", "player-wrapper", "lesson-card replay-count"):
+            self.assertFalse(is_play_control(cls, None), cls)
+        self.assertFalse(is_play_control("btn", "Display options"))
+
+    def test_nudge_skips_non_play_elements(self):
+        s = self.session({})
+        card = FakeElement("lesson-card playlist-item")
+        wrapper = FakeElement("player-wrapper")
+        play = FakeElement("vjs-big-play-button")
+        s.page.locator = lambda selector: FakeLocator([card, wrapper, play])
+        s._nudge_player()
+        self.assertEqual((card.clicked, wrapper.clicked, play.clicked), (False, False, True))
+
+    def test_index_page_skips_video_wait(self):
+        s = self.session({})
+        s.wait_video = False
+        s._nudge_player = lambda: self.fail("não deve clicar no player")
+        s._goto_target("https://curso/modulo")
+        self.assertEqual(s.page.gotos, [("https://curso/modulo", "domcontentloaded")])
+        self.assertEqual(s.page.waits, [])
+        self.assertIsNone(s.page.load_state)
+
+    def test_timeout_falls_back_to_idle(self):
+        s = self.session({})
+        self.assertFalse(s.wait_for_video(timeout_s=0, grace_ms=0))
+        self.assertEqual(s.page.load_state, "networkidle")
+        self.assertFalse(s.page.stopped)
+
+if __name__ == "__main__":
+    unittest.main()
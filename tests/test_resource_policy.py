@@ -0,0 +1,69 @@
+import os
+import unittest
+from unittest import mock
+from extrator_videos.resource_policy import ResourcePolicy, install_for_resolve
+from extrator_videos.network_capture import NetworkCapture
+
+class FakeRequest:
+    def __init__(self, url, resource_type):
+        self.url = url
+        self.resource_type = resource_type
+
+class FakeRoute:
+    def __init__(self, url, resource_type):
+        self.request = FakeRequest(url, resource_type)
+        self.result = None
+
+    def continue_(self):
+        self.result = "continue"
+
+    def abort(self):
+        self.result = "abort"
+
+class FakePage:
+    def __init__(self):
+        self.handler = None
+
+    def route(self, pattern, handler):
+        self.handler = handler
+
+class TestResourcePolicy(unittest.TestCase):
+    def test_decide(self):
+        p = ResourcePolicy(block_types=["image", "font"], deny=[], allow=[])
+        self.assertIsNone(p.decide("https://x.com/aula", "document"))
+        self.assertIsNone(p.decide("https://x.com/player.js", "script"))
+        self.assertEqual(p.decide("https://x.com/capa.jpg", "image"), "image")
+        self.assertEqual(p.decide("https://x.com/f.woff2", "font"), "font")
+        self.assertEqual(p.decide("https://www.google-analytics.com/collect", "xhr"), "tracker")
+        # segmentos só são bloqueados depois do manifest
+        self.assertIsNone(p.decide("https://cdn/seg_1.ts", "xhr"))
+        self.assertEqual(p.decide("https://cdn/seg_1.ts", "xhr", video_seen=True), "segment")
+        # manifest nunca é bloqueado
+        self.assertIsNone(p.decide("https://cdn/v_720.m3u8", "xhr", video_seen=True))
+
+    def test_allow_wins(self):
+        p = ResourcePolicy(block_types=["image"], deny=["cdn.exemplo.com"], allow=["cdn.exemplo.com/thumb"])
+        self.assertEqual(p.decide("https://cdn.exemplo.com/x.js", "script"), "tracker")
+        self.assertIsNone(p.decide("https://cdn.exemplo.com/thumb/a.png", "image"))
+
+    def test_install_routes_with_capture(self):
+        page = FakePage()
+        cap = NetworkCapture()
+        p = ResourcePolicy(block_types=["image"], deny=[], allow=[]).install(page, cap)
+        r1 = FakeRoute("https://cdn/seg_1.ts", "xhr")
+        page.handler(r1)
+        cap.video_seen_at = 1.0
+        r2 = FakeRoute("https://cdn/seg_2.ts", "xhr")
+        page.handler(r2)
+        self.assertEqual((r1.result, r2.result), ("continue", "abort"))
+        self.assertEqual(p.stats["blocked"], 1)
+        self.assertEqual(p.stats["by_reason"], {"segment": 1})
+
+    def test_full_profile(self):
+        with mock.patch.dict(os.environ, {"RESOLVE_PROFILE": "full"}):
+            page = FakePage()
+            self.assertIsNone(install_for_resolve(page))
+            self.assertIsNone(page.handler)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import io
+import os
+import time
+import random
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from extrator_videos import hls_downloader, batch_cli
+from extrator_videos.segment_fetcher import fetch_segments, stream_segments
+
+class FakeResponse:
+    def __init__(self, content, status=200):
+        self.content = content
+        self.status_code = status
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+class FakeSession:
+    def __init__(self, fail_once=(), fail_always=()):
+        self.calls = []
+        self.fail_once = set(fail_once)
+        self.fail_always = set(fail_always)
+        self.lock = threading.Lock()
+
+    def get(self, url, headers=None, timeout=None):
+        with self.lock:
+            self.calls.append(url)
+            if url in self.fail_once:
+                self.fail_once.discard(url)
+                return FakeResponse(b"", 503)
+        if url in self.fail_always:
+            return FakeResponse(b"", 500)
+        time.sleep(random.uniform(0, 0.01))
+        return FakeResponse(url.encode("utf-8") + b"|")
+
+class TestFetchSegments(unittest.TestCase):
+    def setUp(self):
+        self.out = os.path.join(tempfile.mkdtemp(), "out.ts")
+        self.urls = [f"https://cdn/seg{i}.ts" for i in range(20)]
+        self.expected = b"".join(u.encode("utf-8") + b"|" for u in self.urls)
+
+    def test_ordered_output_with_retries(self):
+        sess = FakeSession(fail_once=[self.urls[3], self.urls[11]])
+        stats = fetch_segments(sess, self.urls, self.out, concurrency=4, backoff_ms=1)
+        with open(self.out, "rb") as f:
+            self.assertEqual(f.read(), self.expected)
+        self.assertEqual(stats["segments"], 20)
+        self.assertEqual(len(sess.calls), 22)
+        self.assertFalse(os.path.exists(self.out + ".resume.json"))
+
+    def test_resume_after_failure(self):
+        sess = FakeSession(fail_always=[self.urls[12]])
+        with self.assertRaises(RuntimeError):
+            fetch_segments(sess, self.urls, self.out, concurrency=4, retries=1, backoff_ms=1)
+        self.assertTrue(os.path.exists(self.out + ".resume.json"))
+        sess = FakeSession()
+        stats = fetch_segments(sess, self.urls, self.out, concurrency=4, backoff_ms=1)
+        self.assertGreaterEqual(stats["resumed_from"], 12)
+        self.assertNotIn(self.urls[0], sess.calls)
+        with open(self.out, "rb") as f:
+            self.assertEqual(f.read(), self.expected)
+
+    def test_stream_segments_in_order(self):
+        buf = io.BytesIO()
+        stats = stream_segments(FakeSession(), self.urls, buf, concurrency=5, backoff_ms=1)
+        self.assertEqual(buf.getvalue(), self.expected)
+        self.assertEqual(stats["bytes"], len(self.expected))
+
+    def test_download_to_ts_resumes_between_attempts(self):
+        sess = FakeSession(fail_once=[self.urls[12]])
+        with mock.patch.object(hls_downloader, "segment_urls", return_value=self.urls), \
+             mock.patch.object(hls_downloader, "_session", return_value=sess), \
+             mock.patch.dict(os.environ, {"HLS_SEGMENT_RETRIES": "0", "HLS_SEGMENT_BACKOFF_MS": "1"}):
+            self.assertTrue(hls_downloader.download_segments_to_ts("https://cdn/v.m3u8", {}, self.out, attempts=2))
+        # a segunda tentativa continua do manifesto de retomada: o início não é baixado de novo
+        self.assertEqual(sess.calls.count(self.urls[0]), 1)
+        with open(self.out, "rb") as f:
+            self.assertEqual(f.read(), self.expected)
+
+    def test_interrupted_download_resumes_in_new_job(self):
+        base = tempfile.mkdtemp()
+        page = "https://curso/aula/1"
+
+        def ingest(job, sess):
+            ws = job["ws"].create()
+            with mock.patch.object(hls_downloader, "select_stream", return_value="https://cdn/v.m3u8"), \
+                 mock.patch.object(hls_downloader, "segment_urls", return_value=self.urls), \
+                 mock.patch.object(hls_downloader, "_session", return_value=sess), \
+                 mock.patch.object(hls_downloader, "download_segments_to_wav", side_effect=RuntimeError("pipe")), \
+                 mock.patch.object(hls_downloader, "convert_ts_to_wav", side_effect=lambda ts, wav: wav):
+                return hls_downloader.download_hls_to_wav("https://cdn/master.m3u8", {}, work_dir=ws.path)
+
+        env = {"WORKSPACE_DIR": base, "HLS_SEGMENT_RETRIES": "0", "HLS_SEGMENT_BACKOFF_MS": "1", "HLS_SEGMENT_RESUME_ATTEMPTS": "1"}
+        with mock.patch.dict(os.environ, env):
+            # primeira execução: o download morre no segmento 12 e o job termina com erro de ingest
+            job = batch_cli.new_job(page, None, ".", None, None)
+            with self.assertRaises(RuntimeError):
+                ingest(job, FakeSession(fail_always=[self.urls[12]]))
+            job["errors"] = {"ingest": "fallback segments: HTTP 500"}
+            batch_cli.finish_job(job)
+            ts = os.path.join(job["ws"].path, "hls_audio.ts")
+            self.assertTrue(os.path.exists(ts + ".resume.json"))
+            # nova execução da mesma URL: mesmo workspace, retoma de onde parou
+            job2 = batch_cli.new_job(page, None, ".", None, None)
+            sess = FakeSession()
+            self.assertIsNotNone(ingest(job2, sess))
+            self.assertEqual(job2["ws"].path, job["ws"].path)
+            self.assertNotIn(self.urls[0], sess.calls)
+            self.assertIn(self.urls[19], sess.calls)
+            job2["errors"] = {}
+            batch_cli.finish_job(job2)
+        self.assertEqual(os.listdir(base), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import time
+import json
+import tempfile
+import unittest
+from unittest import mock
+from extrator_videos import session_store, auth
+
+COOKIE = {"name": "sid", "value": "abc", "domain": "alunos.exemplo.com", "path": "/", "expires": -1}
+
+class TestSessionStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env = mock.patch.dict(os.environ, {"SESSION_STATE_DIR": self.tmp.name, "SESSION_STATE_TTL_HOURS": "24"})
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def test_roundtrip(self):
+        st = {"cookies": [COOKIE], "origins": [{"origin": "https://alunos.exemplo.com", "localStorage": []}]}
+        self.assertTrue(session_store.save_state("alunos.exemplo.com", "a@b.com", st))
+        self.assertEqual(session_store.load_state("alunos.exemplo.com", "a@b.com"), st)
+        # outra conta no mesmo domínio não compartilha o estado
+        self.assertIsNone(session_store.load_state("alunos.exemplo.com", "c@d.com"))
+        p = session_store._path("alunos.exemplo.com", "a@b.com")
+        self.assertEqual(os.stat(p).st_mode & 0o777, 0o600)
+
+    def test_ttl_expired(self):
+        session_store.save_state("x.com", "a@b.com", {"cookies": [COOKIE]})
+        p = session_store._path("x.com", "a@b.com")
+        with open(p, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        data["saved_at"] = time.time() - 25 * 3600
+        with open(p, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        self.assertIsNone(session_store.load_state("x.com", "a@b.com"))
+        self.assertFalse(os.path.exists(p))
+
+    def test_expired_cookies(self):
+        old = dict(COOKIE, expires=time.time() - 60)
+        session_store.save_state("x.com", "a@b.com", {"cookies": [old]})
+        self.assertIsNone(session_store.load_state("x.com", "a@b.com"))
+
+    def test_looks_logged_out(self):
+        self.assertTrue(session_store.looks_logged_out("https://x.com/login?next=/aula"))
+        self.assertTrue(session_store.looks_logged_out("https://app.hub.la/signin"))
+        self.assertFalse(session_store.looks_logged_out("https://x.com/curso/aula-1"))
+
+    def test_programmatic_login_reuses_state(self):
+        session_store.save_state("x.com", "a@b.com", {"cookies": [COOKIE]})
+        with mock.patch.object(auth, "session_valid", return_value=True), \
+             mock.patch.object(auth, "_form_login") as form:
+            cookies = auth.programmatic_login("https://x.com/aula", "a@b.com", "segredo")
+        self.assertEqual(cookies, [COOKIE])
+        form.assert_not_called()
+
+    def test_programmatic_login_relogs_when_invalid(self):
+        session_store.save_state("x.com", "a@b.com", {"cookies": [COOKIE]})
+        fresh = [dict(COOKIE, value="novo")]
+        with mock.patch.object(auth, "session_valid", return_value=False), \
+             mock.patch.object(auth, "_form_login", return_value=fresh) as form:
+            cookies = auth.programmatic_login("https://x.com/aula", "a@b.com", "segredo")
+        self.assertEqual(cookies, fresh)
+        form.assert_called_once()
+        self.assertEqual(session_store.load_state("x.com", "a@b.com")["cookies"], fresh)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from extrator_videos import transcribe_backend
+
+def fake_transcribe(audio, language="pt"):
+    n = len(audio) if not isinstance(audio, str) else 0
+    return {"language": language, "duration": None, "segments": [{"start": 0.0, "end": n / 16000.0, "text": str(n)}]}
+
+def fake_init(key, cpu_threads):
+    pass
+
+def fake_worker(task, language):
+    audio = transcribe_backend.read_shared_chunk(task["shm"], task["start"], task["end"])
+    return fake_transcribe(audio, language)
+
+class TestCpuBudget(unittest.TestCase):
+    def test_workers_times_threads_fit_cores(self):
+        self.assertEqual(transcribe_backend.cpu_budget(4, cores=32), (4, 8))
+        self.assertEqual(transcribe_backend.cpu_budget(64, cores=32), (32, 1))
+        self.assertEqual(transcribe_backend.cpu_budget(3, cores=8), (3, 2))
+        self.assertEqual(transcribe_backend.cpu_budget(0, cores=4), (1, 4))
+
+class TestTranscribeChunks(unittest.TestCase):
+    def chunks(self):
+        pcm = np.arange(48000, dtype=np.int16)
+        return [{"audio": pcm[i:i + 16000], "path": None, "offset": i / 16000.0} for i in range(0, 48000, 16000)]
+
+    def test_thread_backend_applies_offsets_and_sorts(self):
+        with mock.patch.object(transcribe_backend, "transcribe_audio", fake_transcribe):
+            segs, errors, stats = transcribe_backend.transcribe_chunks(self.chunks(), max_parallel=3, backend="thread")
+        self.assertEqual(errors, [])
+        self.assertEqual(stats["backend"], "thread")
+        self.assertEqual([s["start"] for s in segs], [0.0, 1.0, 2.0])
+
+    def test_thread_backend_consumes_generator(self):
+        with mock.patch.object(transcribe_backend, "transcribe_audio", fake_transcribe):
+            segs, errors, stats = transcribe_backend.transcribe_chunks(iter(self.chunks()), max_parallel=2, backend="thread")
+        self.assertEqual(stats["chunks"], 3)
+        self.assertEqual(len(segs), 3)
+
+    def test_chunk_cache_only_retranscribes_missing_chunks(self):
+        cache = tempfile.mkdtemp()
+        calls = []
+        def flaky(audio, language="pt"):
+            calls.append(len(audio))
+            if len(calls) == 2:
+                raise RuntimeError("falhou")
+            return fake_transcribe(audio, language)
+        with mock.patch.object(transcribe_backend, "transcribe_audio", flaky):
+            segs, errors, _stats = transcribe_backend.transcribe_chunks(self.chunks(), max_parallel=1, backend="thread", cache_dir=cache)
+        self.assertEqual((len(segs), len(errors)), (2, 1))
+        with mock.patch.object(transcribe_backend, "transcribe_audio", fake_transcribe):
+            segs, errors, stats = transcribe_backend.transcribe_chunks(self.chunks(), max_parallel=1, backend="thread", cache_dir=cache)
+        self.assertEqual(errors, [])
+        self.assertEqual(stats["chunk_cache_hits"], 2)
+        self.assertEqual(stats["chunks"], 1)
+        self.assertEqual([s["start"] for s in segs], [0.0, 1.0, 2.0])
+
+    def test_chunk_cache_keyed_on_model(self):
+        cache = tempfile.mkdtemp()
+        with mock.patch.object(transcribe_backend, "transcribe_audio", fake_transcribe):
+            transcribe_backend.transcribe_chunks(self.chunks(), backend="thread", cache_dir=cache)
+            with mock.patch.dict("os.environ", {"WHISPER_MODEL": "large-v3"}):
+                _segs, _errors, stats = transcribe_backend.transcribe_chunks(self.chunks(), backend="thread", cache_dir=cache)
+        self.assertEqual(stats["chunk_cache_hits"], 0)
+
+    def test_shared_chunk_roundtrip(self):
+        chunks = self.chunks()
+        shm, tasks = transcribe_backend._share_chunks(chunks)
+        try:
+            for t, c in zip(tasks, chunks):
+                audio = transcribe_backend.read_shared_chunk(t["shm"], t["start"], t["end"])
+                self.assertEqual(audio.dtype, np.float32)
+                np.testing.assert_allclose(audio * 32768.0, c["audio"].astype(np.float32))
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def test_process_backend_reuses_spawned_pool(self):
+        # spawn: o worker importa as funções pelo nome, então os substitutos ficam no módulo do teste
+        transcribe_backend.shutdown_process_pool()
+        try:
+            with mock.patch.object(transcribe_backend, "_init_worker", fake_init), \
+                    mock.patch.object(transcribe_backend, "_worker_transcribe", fake_worker):
+                segs, errors, stats = transcribe_backend.transcribe_chunks(self.chunks(), max_parallel=2, backend="process")
+                pool = transcribe_backend._POOL
+                transcribe_backend.transcribe_chunks(self.chunks(), max_parallel=2, backend="process")
+                self.assertIs(transcribe_backend._POOL, pool)
+            self.assertEqual(pool._mp_context.get_start_method(), "spawn")
+        finally:
+            transcribe_backend.shutdown_process_pool()
+        self.assertEqual(errors, [])
+        self.assertEqual(stats["backend"], "process")
+        self.assertEqual([s["text"] for s in segs], ["16000"] * 3)
+
+if __name__ == "__main__":
+    unittest.main()
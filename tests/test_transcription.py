@@ -0,0 +1,109 @@
+import io
+import os
+import wave
+import tempfile
+import unittest
+import numpy as np
+from extrator_videos.transcription import split_wav_chunks, chunk_source, cleanup_chunks, plan_chunks, iter_pcm_chunks, audio_fingerprint, wav_fingerprint
+
+def write_wav(path, samples, rate=16000):
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(samples.astype("<i2").tobytes())
+
+class TestSplitWavChunks(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.wav = os.path.join(self.dir, "in.wav")
+        self.samples = (np.arange(16000 * 5) % 2000 - 1000).astype(np.int16)
+        write_wav(self.wav, self.samples)
+
+    def test_in_memory_chunks_are_views_with_offsets(self):
+        chunks = split_wav_chunks(self.wav, 2, in_memory=True, split_mode="fixed")
+        self.assertEqual([c["offset"] for c in chunks], [0.0, 2.0, 4.0])
+        for c in chunks:
+            self.assertIsNone(c["path"])
+            self.assertIsInstance(c["audio"], np.memmap)
+        joined = np.concatenate([chunk_source(c) for c in chunks])
+        np.testing.assert_array_equal(joined, self.samples)
+
+    def test_file_mode_matches_memory_mode(self):
+        files = split_wav_chunks(self.wav, 2)
+        mem = split_wav_chunks(self.wav, 2, in_memory=True)
+        self.assertEqual(len(files), len(mem))
+        for f, m in zip(files, mem):
+            with wave.open(chunk_source(f), "rb") as w:
+                data = np.frombuffer(w.readframes(w.getnframes()), dtype="<i2")
+            np.testing.assert_array_equal(data, m["audio"])
+        cleanup_chunks(files)
+        self.assertFalse(any(os.path.exists(f["path"]) for f in files))
+
+class TestAudioFingerprint(unittest.TestCase):
+    def test_same_audio_same_fingerprint(self):
+        rng = np.random.default_rng(0)
+        pcm = rng.integers(-3000, 3000, 16000 * 60).astype(np.int16)
+        d = tempfile.mkdtemp()
+        a, b = os.path.join(d, "a.wav"), os.path.join(d, "b.wav")
+        write_wav(a, pcm)
+        write_wav(b, pcm)
+        self.assertEqual(wav_fingerprint(a), wav_fingerprint(b))
+        self.assertEqual(wav_fingerprint(a), audio_fingerprint(pcm))
+
+    def test_different_audio_or_length_changes_fingerprint(self):
+        pcm = (np.arange(16000 * 60) % 500).astype(np.int16)
+        other = pcm.copy()
+        other[:16000] += 1
+        self.assertNotEqual(audio_fingerprint(pcm), audio_fingerprint(other))
+        self.assertNotEqual(audio_fingerprint(pcm), audio_fingerprint(pcm[:-1]))
+
+class TestPlanChunks(unittest.TestCase):
+    def speech_with_pauses(self, pauses, total_seconds, rate=16000):
+        rng = np.random.default_rng(0)
+        pcm = (rng.standard_normal(total_seconds * rate) * 3000).astype(np.int16)
+        for p in pauses:
+            pcm[int(p * rate):int((p + 0.5) * rate)] = 0
+        return pcm
+
+    def test_cuts_land_in_nearest_silence(self):
+        pcm = self.speech_with_pauses([11.5, 18.2], 30)
+        bounds = plan_chunks(pcm, 10, tolerance_seconds=2)
+        self.assertEqual(len(bounds), 3)
+        self.assertEqual(bounds[0][0], 0)
+        self.assertEqual(bounds[-1][1], len(pcm))
+        cuts = [b[1] / 16000 for b in bounds[:-1]]
+        self.assertTrue(11.5 <= cuts[0] <= 12.0)
+        self.assertTrue(18.2 <= cuts[1] <= 18.7)
+        for (a, b), (c, _) in zip(bounds, bounds[1:]):
+            self.assertEqual(b, c)
+
+    def test_without_silence_stays_within_tolerance_and_balanced(self):
+        pcm = self.speech_with_pauses([], 25)
+        bounds = plan_chunks(pcm, 10, tolerance_seconds=1)
+        self.assertEqual(len(bounds), 3)
+        for k, (_, end) in enumerate(bounds[:-1], start=1):
+            self.assertLessEqual(abs(end - k * len(pcm) / 3), 16000 + 480)
+
+    def test_short_audio_is_single_chunk(self):
+        pcm = self.speech_with_pauses([], 3)
+        self.assertEqual(plan_chunks(pcm, 10), [(0, len(pcm))])
+        self.assertEqual(plan_chunks(pcm[:0], 10), [])
+
+class TestIterPcmChunks(unittest.TestCase):
+    def test_fixed_chunks_from_stream(self):
+        pcm = (np.arange(16000 * 5) % 500).astype("<i2")
+        chunks = list(iter_pcm_chunks(io.BytesIO(pcm.tobytes()), 2, split_mode="fixed"))
+        self.assertEqual([c["offset"] for c in chunks], [0.0, 2.0, 4.0])
+        np.testing.assert_array_equal(np.concatenate([c["audio"] for c in chunks]), pcm)
+
+    def test_stream_cut_at_silence(self):
+        rng = np.random.default_rng(1)
+        pcm = (rng.standard_normal(16000 * 7) * 3000).astype("<i2")
+        pcm[int(2.6 * 16000):int(3.1 * 16000)] = 0
+        chunks = list(iter_pcm_chunks(io.BytesIO(pcm.tobytes()), 2, split_mode="silence", tolerance_seconds=1))
+        self.assertTrue(2.6 <= chunks[1]["offset"] <= 3.1)
+        np.testing.assert_array_equal(np.concatenate([c["audio"] for c in chunks]), pcm)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import json
+import tempfile
+import unittest
+from extrator_videos import transcription_cache as tc
+from extrator_videos.cache_store import get_store
+
+def sample(n=200):
+    return {"language": "pt", "duration": None,
+            "segments": [{"start": i * 2.5, "end": i * 2.5 + 2.26, "text": f" frase número {i} com acentuação"} for i in range(n)]}
+
+def rounded(tr):
+    # tempos são guardados em milissegundos
+    return {**tr, "segments": [{**s, "start": round(s["start"], 3), "end": round(s["end"], 3)} for s in tr["segments"]]}
+
+class TestCompactPayload(unittest.TestCase):
+    def test_roundtrip_and_size(self):
+        tr = sample()
+        packed = tc.encode_transcription(tr)
+        self.assertTrue(packed.startswith(tc.MAGIC))
+        self.assertEqual(rounded(tc.decode_transcription(packed)), rounded(tr))
+        self.assertLess(len(packed), len(json.dumps(tr).encode("utf-8")) // 4)
+
+    def test_lazy_access(self):
+        c = tc.CompactTranscription(tc.encode_transcription(sample()))
+        self.assertEqual(len(c), 200)
+        self.assertEqual(c.text(10), " frase número 10 com acentuação")
+        self.assertEqual(c.segment(3), {"start": 7.5, "end": 9.76, "text": " frase número 3 com acentuação"})
+        self.assertAlmostEqual(float(c.starts[-1]), 497.5)
+
+    def test_extra_segment_fields_are_kept(self):
+        tr = {"language": "pt", "segments": [{"start": 0.0, "end": 1.0, "text": "a", "speaker": 1}]}
+        self.assertEqual(tc.decode_transcription(tc.encode_transcription(tr)), tr)
+
+    def test_empty(self):
+        tr = {"language": "pt", "duration": None, "segments": []}
+        self.assertEqual(tc.decode_transcription(tc.encode_transcription(tr)), tr)
+
+class TestMigration(unittest.TestCase):
+    def test_migrate_json_entries(self):
+        d = tempfile.mkdtemp()
+        tr = sample(50)
+        store = get_store(d)
+        store.put("transcription", "old", json.dumps(tr).encode("utf-8"), created=1000.0)
+        tc.save_transcription(d, "new", tr)
+        self.assertEqual(tc.load_transcription(d, "old"), tr)
+        out = tc.migrate(d)
+        self.assertEqual((out["migrated"], out["skipped"]), (1, 1))
+        self.assertLess(out["bytes_after"], out["bytes_before"])
+        raw = store.get("transcription", "old")
+        self.assertTrue(bytes(raw).startswith(tc.MAGIC))
+        self.assertIsNone(tc.load_transcription(d, "old", ttl_hours=1))
+        self.assertEqual(rounded(tc.load_transcription(d, "old")), rounded(tr))
+
+if __name__ == "__main__":
+    unittest.main()
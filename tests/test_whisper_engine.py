@@ -0,0 +1,54 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from extrator_videos import whisper_engine
+
+class FakeModel:
+    instances = 0
+
+    def __init__(self, *args, **kwargs):
+        FakeModel.instances += 1
+        self.kwargs = kwargs
+
+class TestWhisperModelPool(unittest.TestCase):
+    def setUp(self):
+        whisper_engine.clear_model_pool()
+        FakeModel.instances = 0
+
+    def tearDown(self):
+        whisper_engine.clear_model_pool()
+
+    def test_model_loaded_once_per_key(self):
+        key = ("small", "cpu", "int8", None)
+        with mock.patch.object(whisper_engine, "WhisperModel", FakeModel):
+            with ThreadPoolExecutor(max_workers=4) as ex:
+                models = list(ex.map(lambda _: whisper_engine.get_model(key), range(8)))
+        self.assertEqual(FakeModel.instances, 1)
+        self.assertTrue(all(m is models[0] for m in models))
+        stats = whisper_engine.model_pool_stats()
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(stats[0]["loads"], 1)
+        self.assertEqual(stats[0]["reuses"], 7)
+
+    def test_distinct_keys_get_distinct_models(self):
+        with mock.patch.object(whisper_engine, "WhisperModel", FakeModel):
+            a = whisper_engine.get_model(("small", "cpu", "int8", None))
+            b = whisper_engine.get_model(("base", "cpu", "int8", None))
+        self.assertIsNot(a, b)
+        self.assertEqual(FakeModel.instances, 2)
+
+    def test_cpu_threads_is_part_of_the_key(self):
+        key = ("small", "cpu", "int8", None)
+        with mock.patch.object(whisper_engine, "WhisperModel", FakeModel):
+            default = whisper_engine.get_model(key)
+            whisper_engine.set_cpu_threads(4)
+            try:
+                budgeted = whisper_engine.get_model(key)
+            finally:
+                whisper_engine.set_cpu_threads(0)
+        # o modelo do pai (cpu_threads=0) não serve a um worker com orçamento de 4 threads
+        self.assertIsNot(default, budgeted)
+        self.assertEqual(budgeted.kwargs["cpu_threads"], 4)
+
+if __name__ == "__main__":
+    unittest.main()
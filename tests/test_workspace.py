@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from extrator_videos.workspace import Workspace, workspace_base
+from extrator_videos.transcription import split_wav_chunks
+import wave
+
+class TestWorkspace(unittest.TestCase):
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+
+    def test_distinct_dirs_and_cleanup(self):
+        with Workspace(base_dir=self.base) as a, Workspace(base_dir=self.base) as b:
+            self.assertNotEqual(a.path, b.path)
+            with open(a.file("x.bin"), "wb") as f:
+                f.write(b"\0" * 1000)
+            self.assertEqual(a.size_bytes(), 1000)
+            self.assertEqual(b.size_bytes(), 0)
+            pa = a.path
+        self.assertFalse(os.path.exists(pa))
+        self.assertEqual(os.listdir(self.base), [])
+
+    def test_keep(self):
+        with Workspace(base_dir=self.base, keep=True) as ws:
+            p = ws.path
+        self.assertTrue(os.path.isdir(p))
+
+    def test_named_workspace_is_reused(self):
+        a = Workspace(base_dir=self.base, name="run_abc").create()
+        with open(a.file("x.resume.json"), "w") as f:
+            f.write("{}")
+        b = Workspace(base_dir=self.base, name="run_abc").create()
+        self.assertEqual(a.path, b.path)
+        self.assertTrue(os.path.exists(b.file("x.resume.json")))
+        b.cleanup()
+        self.assertEqual(os.listdir(self.base), [])
+
+    def test_env_base(self):
+        with mock.patch.dict(os.environ, {"WORKSPACE_DIR": self.base}):
+            self.assertEqual(workspace_base(), self.base)
+
+    def test_chunks_written_inside_workspace(self):
+        with Workspace(base_dir=self.base) as ws:
+            wav = ws.file("input.wav")
+            with wave.open(wav, "wb") as w:
+                w.setnchannels(1)
+                w.setsampwidth(2)
+                w.setframerate(16000)
+                w.writeframes(np.zeros(16000 * 5, dtype="<i2").tobytes())
+            chunks = split_wav_chunks(wav, 2, split_mode="fixed", work_dir=ws.path)
+            self.assertTrue(all(os.path.dirname(c["path"]) == ws.path for c in chunks))
+            self.assertGreater(ws.size_bytes(), 16000 * 5 * 2)
+
+if __name__ == "__main__":
+    unittest.main()
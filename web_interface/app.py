@@ -45,7 +45,8 @@ processing_state = {
     'status': 'idle',
     'start_time': None,
     'logs': [],
-    'current_proc': None
+    'current_proc': None,
+    'pipeline': None
 }
 
 @app.route('/')
@@ -190,6 +191,7 @@ def start_processing():
         if 'current_proc' in cur:
             cur['has_current_proc'] = bool(cur['current_proc'])
             del cur['current_proc']
+        cur.pop('pipeline', None)
         total = cur.get('total_videos') or 0
         current = cur.get('current_video') or 0
         pct = int((current / total) * 100) if total > 0 else 0
@@ -272,8 +274,10 @@ def start_processing():
     })
     
     # Iniciar processamento em thread separada
+    # WEB_PIPELINE=async: todas as URLs no pipeline asyncio do próprio processo, em vez de um batch_cli por URL
+    use_async = (os.getenv('WEB_PIPELINE') or 'subprocess').lower() == 'async'
     thread = threading.Thread(
-        target=process_videos_batch,
+        target=process_videos_async if use_async else process_videos_batch,
         args=(valid_urls,),
         daemon=True
     )
@@ -375,6 +379,7 @@ def get_status():
     if 'current_proc' in safe:
         safe['has_current_proc'] = bool(safe['current_proc'])
         del safe['current_proc']
+    safe.pop('pipeline', None)
     total = safe.get('total_videos') or 0
     cur = safe.get('current_video') or 0
     pct = int((cur / total) * 100) if total > 0 else 0
@@ -735,6 +740,141 @@ def view_report(domain, video_id):
     timestamp = int(time.time())
     return render_template('report_standalone.html', domain=domain, video_id=video_id, timestamp=timestamp)
 
+def save_manifest_hint(url, project_root):
+    """Grava no resolve_cache o manifest capturado pela extensão para a URL (se houver) e o devolve"""
+    hint_manifest = None
+    try:
+        manifests_file = project_root / 'captured_manifests.json'
+        if manifests_file.exists():
+            with open(manifests_file, 'r', encoding='utf-8') as f:
+                manifests = json.load(f)
+                rec = manifests.get(url)
+                if isinstance(rec, dict):
+                    hint_manifest = rec.get('manifestUrl')
+        # Normalizar hint para token em path se vier com ?p=
+        if hint_manifest and hint_manifest.startswith('http'):
+            try:
+                from urllib.parse import urlparse, parse_qs
+                pu = urlparse(hint_manifest)
+                if ('cloudflarestream.com' in pu.netloc) and ('/manifest/video.m3u8' in pu.path) and (pu.query and 'p=' in pu.query):
+                    qs = parse_qs(pu.query or '')
+                    token = (qs.get('p') or [''])[0].strip()
+                    if token and ('.' in token) and (len(token.split('.')) == 3):
+                        hint_manifest = f"{pu.scheme}://{pu.netloc}/{token}/manifest/video.m3u8"
+            except Exception:
+                pass
+            rc_dir = project_root / Path(os.getenv('RESOLVE_CACHE_DIR', 'resolve_cache'))
+            rc.save(str(rc_dir), url, {'manifest': hint_manifest})
+            print(f"🔗 [DEBUG] Manifest hint salvo em resolve_cache para {url}")
+    except Exception as e:
+        print(f"⚠️ [DEBUG] Falha ao salvar hint de manifest: {e}")
+    return hint_manifest
+
+STAGE_LABELS = {
+    'resolve': '🔍 Resolvendo vídeo',
+    'ingest': '📥 Baixando áudio',
+    'transcribe': '🎤 Transcrevendo áudio',
+    'summarize': '🤖 Gerando resumo',
+    'write': '📝 Gerando relatório',
+}
+
+# caminhos relativos (padrão ou vindos do .env) que o batch_cli resolve a partir da raiz do projeto
+PROJECT_PATH_DEFAULTS = (
+    ('SUMARIOS_DIR', 'sumarios'),
+    ('LOG_DIR', 'logs'),
+    ('RESOLVE_CACHE_DIR', 'resolve_cache'),
+    ('SUMARIOS_CACHE_DIR', 'sumarios_cache'),
+    ('SESSION_STATE_DIR', 'session_state'),
+    ('BATCH_STATE_FILE', None),
+    ('PROMPT_PATH', None),
+    ('PROMPT_MODELO2_PATH', 'prompt_padrao.json'),
+    ('PROMPT_MODELO4_PATH', 'prompt_modelo4.json'),
+)
+
+def pin_paths_to_project(project_root):
+    """
+    O servidor roda em web_interface/, mas o modo assíncrono executa as etapas no próprio
+    processo: fixa os caminhos relativos na raiz do projeto (cwd do batch_cli), para que
+    saídas, caches e logins salvos sejam os mesmos do CLI e do modo subprocess.
+    """
+    for key, default in PROJECT_PATH_DEFAULTS:
+        value = os.getenv(key) or default
+        if value and not os.path.isabs(value):
+            os.environ[key] = str(project_root / value)
+
+def process_videos_async(urls):
+    """Processar lista de URLs no próprio processo com o pipeline asyncio (WEB_PIPELINE=async)"""
+    global processing_state
+    import asyncio
+    from urllib.parse import urlparse
+    from extrator_videos.async_pipeline import AsyncPipeline, transcribe_workers
+    from extrator_videos.batch_cli import configure_env, new_job, finish_job, set_transcribe_slots
+    
+    project_root = Path(__file__).parent.parent
+    configure_env()
+    set_transcribe_slots(transcribe_workers())
+    pin_paths_to_project(project_root)
+    
+    jobs = []
+    for url in urls:
+        hint_manifest = save_manifest_hint(url, project_root)
+        pu = urlparse(url)
+        job = new_job(hint_manifest if (hint_manifest and hint_manifest.startswith('http')) else url,
+                      f"{pu.scheme}://{pu.netloc}", str(project_root), os.getenv('EMAIL'), os.getenv('SENHA'))
+        job['web_url'] = url
+        jobs.append(job)
+    total = len(jobs)
+    done = {'count': 0}
+    
+    def on_event(job, stage, status):
+        url = job.get('web_url', job['url'])
+        if status == 'start':
+            processing_state['current_url'] = url
+            processing_state['current_step'] = f"{STAGE_LABELS.get(stage, stage)} ({done['count']}/{total} concluídos)..."
+            elapsed = (datetime.now() - processing_state['start_time']).total_seconds() if processing_state['start_time'] else 0
+            socketio.emit('progress', {
+                'current': done['count'] + 1,
+                'total': total,
+                'percent': int((done['count'] / total) * 100),
+                'url': url,
+                'status': 'processing',
+                'stage': stage,
+                'elapsed_sec': int(elapsed)
+            })
+    
+    def on_done(job):
+        finish_job(job)
+        done['count'] += 1
+        processing_state['current_video'] = done['count']
+        url = job.get('web_url', job['url'])
+        if job.get('error'):
+            socketio.emit('video_error', {'url': url, 'error': f"etapa {job['error']['stage']}: {job['error']['error']}", 'current': done['count'], 'total': total})
+        else:
+            socketio.emit('video_complete', {'url': url, 'status': 'success', 'current': done['count'], 'total': total})
+    
+    async def run():
+        async with AsyncPipeline(on_event=on_event, on_done=on_done) as pipeline:
+            processing_state['pipeline'] = pipeline
+            await pipeline.run_jobs(jobs)
+    
+    try:
+        asyncio.run(run())
+    except Exception as e:
+        print(f"❌ [DEBUG] Erro no pipeline assíncrono: {e}")
+    finally:
+        processing_state['pipeline'] = None
+    
+    if processing_state['status'] != 'cancelled':
+        processing_state.update({
+            'is_processing': False,
+            'status': 'completed',
+            'current_video': total
+        })
+        socketio.emit('batch_complete', {
+            'total': total,
+            'status': 'completed'
+        })
+
 def process_videos_batch(urls):
     """Processar lista de URLs em batch"""
     global processing_state
@@ -774,32 +914,7 @@ def process_videos_batch(urls):
             # Processar vídeo usando subprocess (isolado)
             import subprocess
             # Dica de manifest: se existir, salvar no resolve_cache antes de invocar o CLI
-            try:
-                manifests_file = project_root / 'captured_manifests.json'
-                hint_manifest = None
-                if manifests_file.exists():
-                    with open(manifests_file, 'r', encoding='utf-8') as f:
-                        manifests = json.load(f)
-                        rec = manifests.get(url)
-                        if isinstance(rec, dict):
-                            hint_manifest = rec.get('manifestUrl')
-                # Normalizar hint para token em path se vier com ?p=
-                if hint_manifest and hint_manifest.startswith('http'):
-                    try:
-                        from urllib.parse import urlparse, parse_qs
-                        pu = urlparse(hint_manifest)
-                        if ('cloudflarestream.com' in pu.netloc) and ('/manifest/video.m3u8' in pu.path) and (pu.query and 'p=' in pu.query):
-                            qs = parse_qs(pu.query or '')
-                            token = (qs.get('p') or [''])[0].strip()
-                            if token and ('.' in token) and (len(token.split('.')) == 3):
-                                hint_manifest = f"{pu.scheme}://{pu.netloc}/{token}/manifest/video.m3u8"
-                    except Exception:
-                        pass
-                    rc_dir = project_root / Path(os.getenv('RESOLVE_CACHE_DIR', 'resolve_cache'))
-                    rc.save(str(rc_dir), url, {'manifest': hint_manifest})
-                    print(f"🔗 [DEBUG] Manifest hint salvo em resolve_cache para {url}")
-            except Exception as e:
-                print(f"⚠️ [DEBUG] Falha ao salvar hint de manifest: {e}")
+            hint_manifest = save_manifest_hint(url, project_root)
             
             # Atualizar step: Preparando
             processing_state['current_step'] = f"📋 Preparando vídeo {i}/{len(urls)}..."
@@ -966,6 +1081,9 @@ def cancel_processing():
             except Exception:
                 pass
         processing_state['current_proc'] = None
+    pipeline = processing_state.get('pipeline')
+    if pipeline:
+        pipeline.cancel()
     processing_state['is_processing'] = False
     processing_state['status'] = 'cancelled'
     